@@ -0,0 +1,134 @@
+"""
+Alert message bodies: optional zlib compression and claim-check for oversized alerts
+
+The producer marks an encoded body with message attributes:
+    content_encoding = 'zlib+base64'   body is base64 of zlib-compressed JSON
+    claim_check = 'local' | 's3'       body is {"claim_check": key}; the real body
+                                       (possibly compressed) is in that store
+Bodies without these attributes are plain JSON, so consumers decode old and
+new messages alike.
+"""
+import base64
+import json
+import os
+import uuid
+import zlib
+from typing import Dict, Optional, Tuple
+
+from .config import ALERT_CODEC_CONFIG
+
+CONTENT_ENCODING_ATTRIBUTE = 'content_encoding'
+CLAIM_CHECK_ATTRIBUTE = 'claim_check'
+ZLIB_BASE64 = 'zlib+base64'
+
+
+class LocalClaimCheckStore:
+    """Claim-check bodies as files in a directory shared by producer and consumer"""
+    kind = 'local'
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def put(self, key: str, data: bytes) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        temp_path = os.path.join(self.path, f".{key}.tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, os.path.join(self.path, key))
+
+    def get(self, key: str) -> bytes:
+        with open(os.path.join(self.path, os.path.basename(key)), 'rb') as f:
+            return f.read()
+
+
+class S3ClaimCheckStore:
+    """Claim-check bodies as S3 objects; expire them with a bucket lifecycle rule"""
+    kind = 's3'
+
+    def __init__(self, bucket: str, prefix: str = ''):
+        import boto3
+        self.s3 = boto3.client('s3')
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def put(self, key: str, data: bytes) -> None:
+        self.s3.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def get(self, key: str) -> bytes:
+        return self.s3.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body'].read()
+
+
+_stores = {}
+
+
+def get_claim_check_store(kind: str):
+    """Configured store for a claim-check kind, created once per process"""
+    store = _stores.get(kind)
+    if store is None:
+        if kind == 'local':
+            store = LocalClaimCheckStore(ALERT_CODEC_CONFIG['claim_check_path'])
+        elif kind == 's3':
+            store = S3ClaimCheckStore(ALERT_CODEC_CONFIG['claim_check_bucket'], ALERT_CODEC_CONFIG['claim_check_prefix'])
+        else:
+            raise ValueError(f"Unknown claim-check store: {kind}")
+        _stores[kind] = store
+    return store
+
+
+def _string_attribute(value: str) -> Dict:
+    return {'StringValue': value, 'DataType': 'String'}
+
+
+def encode_alert_body(alert_data: Dict, compress: Optional[bool] = None,
+                      claim_check: Optional[str] = None) -> Tuple[str, Dict]:
+    """
+    Encode an alert for SQS.
+
+    :param compress: Compress bodies of at least compression_min_bytes when it
+                     makes them smaller; defaults to the configured setting
+    :param claim_check: Store kind ('local' or 's3') for bodies over
+                        claim_check_threshold_bytes; defaults to the configured one
+    :return: (message body, message attributes to add)
+    """
+    compress = ALERT_CODEC_CONFIG['compression'] if compress is None else compress
+    claim_check = ALERT_CODEC_CONFIG['claim_check'] if claim_check is None else claim_check
+
+    body = json.dumps(alert_data, default=str)
+    attributes = {}
+    if compress and len(body) >= ALERT_CODEC_CONFIG['compression_min_bytes']:
+        compressed = base64.b64encode(
+            zlib.compress(body.encode('utf-8'), ALERT_CODEC_CONFIG['compression_level'])
+        ).decode('ascii')
+        if len(compressed) < len(body):
+            body = compressed
+            attributes[CONTENT_ENCODING_ATTRIBUTE] = _string_attribute(ZLIB_BASE64)
+
+    if claim_check and len(body.encode('utf-8')) > ALERT_CODEC_CONFIG['claim_check_threshold_bytes']:
+        key = f"{uuid.uuid4().hex}.json"
+        get_claim_check_store(claim_check).put(key, body.encode('utf-8'))
+        body = json.dumps({'claim_check': key})
+        attributes[CLAIM_CHECK_ATTRIBUTE] = _string_attribute(claim_check)
+
+    return body, attributes
+
+
+def record_attribute(attributes: Dict, name: str) -> Optional[str]:
+    """String attribute from either Lambda event ('stringValue') or SQS API ('StringValue') records"""
+    attribute = attributes.get(name) or {}
+    return attribute.get('stringValue', attribute.get('StringValue'))
+
+
+def decode_alert_body(body: str, attributes: Optional[Dict] = None) -> Dict:
+    """Decode a message body produced by encode_alert_body (or plain JSON)"""
+    attributes = attributes or {}
+    claim_check = record_attribute(attributes, CLAIM_CHECK_ATTRIBUTE)
+    if claim_check:
+        body = get_claim_check_store(claim_check).get(json.loads(body)['claim_check']).decode('utf-8')
+
+    encoding = record_attribute(attributes, CONTENT_ENCODING_ATTRIBUTE)
+    if encoding == ZLIB_BASE64:
+        body = zlib.decompress(base64.b64decode(body)).decode('utf-8')
+    elif encoding:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    return json.loads(body)
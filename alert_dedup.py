@@ -0,0 +1,128 @@
+"""
+Per-card/per-merchant alert deduplication with token buckets
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from .alert_lanes import severity_priority
+
+logger = logging.getLogger(__name__)
+
+SUPPRESSED_COUNT_FIELD = 'suppressed_count'
+
+
+def dedup_key(transaction: Dict) -> Optional[str]:
+    """Compact key for a card and merchant pair; the card number itself is not kept"""
+    cc_num = transaction.get('cc_num')
+    if cc_num is None:
+        return None
+    raw = f"{cc_num}|{transaction.get('merchant', '')}".encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+class AlertRateLimiter:
+    """Token bucket per key: ``burst`` alerts, refilled evenly over ``window_seconds``
+
+    Alerts beyond the bucket are suppressed and counted; the count is attached
+    to the next alert let through for the same key. An alert more severe than
+    the last one let through for its key is never suppressed. Alerts already
+    let through (by ``id_field``, e.g. an SQS message redelivered after a
+    failed store, or a Kinesis record retried after a failed publish) pass
+    again without taking a token. Buckets are kept in last-seen
+    order, so expired ones (idle for a whole window, i.e. full again) are
+    evicted from the front in O(1) amortized time. At most ``max_keys``
+    buckets and remembered alert ids are kept.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, burst: int = 1, max_keys: int = 100_000,
+                 clock: Callable[[], float] = time.monotonic, id_field: str = 'alertID'):
+        self.id_field = id_field
+        self.window_seconds = window_seconds
+        self.burst = burst
+        self.refill_rate = burst / window_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [tokens, last_seen, suppressed, priority of the last alert let through]
+        self._buckets: 'OrderedDict[str, list]' = OrderedDict()
+        # alert id -> (allowed at, suppressed count it was let through with)
+        self._allowed: 'OrderedDict[str, Tuple[float, int]]' = OrderedDict()
+        self.suppressed_total = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self.window_seconds:
+                break
+            self._drop(key)
+        while self._allowed and now - next(iter(self._allowed.values()))[0] >= self.window_seconds:
+            self._allowed.popitem(last=False)
+
+    def _drop(self, key: str) -> None:
+        bucket = self._buckets.pop(key)
+        if bucket[2]:
+            logger.info(f"{bucket[2]} suppressed alerts expired without a later alert")
+
+    def allow(self, key: str, priority: Optional[int] = None) -> Tuple[bool, int]:
+        """
+        Take a token for ``key``.
+
+        :param priority: Severity priority of the alert (lower is more severe); an
+                         alert more severe than the last one let through is
+                         allowed even when the bucket is empty
+        :return: (allowed, alerts suppressed since the last allowed one)
+        """
+        now = self.clock()
+        self._evict(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now, 0, None]
+            if len(self._buckets) > self.max_keys:
+                self._drop(next(iter(self._buckets)))
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.refill_rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        escalated = priority is not None and bucket[3] is not None and priority < bucket[3]
+        if bucket[0] >= 1 or escalated:
+            bucket[0] = max(0.0, bucket[0] - 1)
+            bucket[3] = priority
+            suppressed, bucket[2] = bucket[2], 0
+            return True, suppressed
+
+        bucket[2] += 1
+        self.suppressed_total += 1
+        return False, bucket[2]
+
+    def apply(self, alert: Dict) -> Optional[Dict]:
+        """
+        Return the alert to send (with the suppressed count attached), or None if suppressed.
+        Alerts without a dedup_key are always let through.
+        """
+        key = alert.get('dedup_key')
+        if not key:
+            return alert
+        alert_id = alert.get(self.id_field)
+        if alert_id is not None:
+            seen = self._allowed.get(str(alert_id))
+            if seen is not None and self.clock() - seen[0] < self.window_seconds:
+                # Redelivered: let it through again with the same count
+                return {**alert, SUPPRESSED_COUNT_FIELD: seen[1]} if seen[1] else alert
+        allowed, suppressed = self.allow(key, severity_priority(alert['severity']) if 'severity' in alert else None)
+        if not allowed:
+            return None
+        if suppressed:
+            alert = {**alert, SUPPRESSED_COUNT_FIELD: suppressed + int(alert.get(SUPPRESSED_COUNT_FIELD) or 0)}
+        if alert_id is not None:
+            self._allowed[str(alert_id)] = (self.clock(), int(alert.get(SUPPRESSED_COUNT_FIELD) or 0))
+            self._allowed.move_to_end(str(alert_id))
+            if len(self._allowed) > self.max_keys:
+                self._allowed.popitem(last=False)
+        return alert
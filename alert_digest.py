@@ -0,0 +1,83 @@
+"""
+Coalesces alert notifications into per-severity digests
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class DigestGroup:
+    """Alerts of one severity collected during one window"""
+
+    def __init__(self, severity: str, opened_at: float):
+        self.severity = severity
+        self.opened_at = opened_at
+        self.alerts: List[Dict] = []
+
+    @property
+    def max_score(self) -> float:
+        return max((float(alert.get('fraud_score') or 0) for alert in self.alerts), default=0.0)
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+
+class AlertDigest:
+    """Groups alerts by severity into time windows and releases each window as one digest
+
+    A group is released once its window (``window_seconds`` after its first
+    alert) has elapsed, or as soon as it holds ``max_alerts_per_digest``
+    alerts. Alerts whose severity is in ``bypass_severities`` are released
+    immediately as a digest of one. At most ``max_groups`` groups are open;
+    opening another releases the oldest, so state stays bounded at
+    max_groups * max_alerts_per_digest alerts.
+    """
+
+    def __init__(self, window_seconds: float = 60.0, max_alerts_per_digest: int = 100,
+                 bypass_severities: Iterable[str] = ('CRITICAL',), max_groups: int = 8,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self.max_alerts_per_digest = max_alerts_per_digest
+        self.bypass_severities = {severity.upper() for severity in bypass_severities}
+        self.max_groups = max_groups
+        self.clock = clock
+        self._groups: 'OrderedDict[str, DigestGroup]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(group) for group in self._groups.values())
+
+    def add(self, alert: Dict) -> List[DigestGroup]:
+        """Add an alert; returns the digests that are ready to send"""
+        severity = str(alert.get('severity', 'UNKNOWN')).upper()
+        now = self.clock()
+        if severity in self.bypass_severities:
+            group = DigestGroup(severity, now)
+            group.alerts.append(alert)
+            return [group] + self.due(now)
+
+        ready = []
+        group = self._groups.get(severity)
+        if group is None:
+            if len(self._groups) >= self.max_groups:
+                ready.append(self._groups.popitem(last=False)[1])
+            group = self._groups[severity] = DigestGroup(severity, now)
+        group.alerts.append(alert)
+
+        if len(group) >= self.max_alerts_per_digest:
+            ready.append(self._groups.pop(severity))
+        return ready + self.due(now)
+
+    def due(self, now: Optional[float] = None) -> List[DigestGroup]:
+        """Release every group whose window has elapsed"""
+        now = self.clock() if now is None else now
+        expired = [
+            severity for severity, group in self._groups.items()
+            if now - group.opened_at >= self.window_seconds
+        ]
+        return [self._groups.pop(severity) for severity in expired]
+
+    def drain(self) -> List[DigestGroup]:
+        """Release every open group, e.g. before the invocation ends"""
+        groups = list(self._groups.values())
+        self._groups.clear()
+        return groups
@@ -0,0 +1,43 @@
+"""
+Severity lanes: routing alerts to per-severity queues and ordering work by severity
+"""
+from typing import Dict, List
+
+from .config import ALERT_QUEUE_URL, ALERT_LANES_CONFIG
+
+# Highest priority first
+SEVERITY_ORDER = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+_PRIORITY = {severity: index for index, severity in enumerate(SEVERITY_ORDER)}
+
+
+def severity_priority(severity) -> int:
+    """Sort key for a severity: 0 for CRITICAL, unknown severities last"""
+    return _PRIORITY.get(str(severity).upper(), len(SEVERITY_ORDER))
+
+
+def lane_queue_url(severity) -> str:
+    """Queue for a severity's lane; severities without their own queue use ALERT_QUEUE_URL"""
+    return ALERT_LANES_CONFIG['queue_urls'].get(str(severity).upper()) or ALERT_QUEUE_URL
+
+
+def lane_queue_urls() -> List[str]:
+    """Distinct lane queues, highest priority first"""
+    urls = []
+    for severity in SEVERITY_ORDER:
+        url = lane_queue_url(severity)
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+def to_lambda_record(message: Dict) -> Dict:
+    """Shape a ReceiveMessage message like an SQS record in a Lambda event"""
+    return {
+        'messageId': message['MessageId'],
+        'receiptHandle': message['ReceiptHandle'],
+        'body': message['Body'],
+        'messageAttributes': {
+            name: {'stringValue': attribute.get('StringValue'), 'dataType': attribute.get('DataType')}
+            for name, attribute in message.get('MessageAttributes', {}).items()
+        }
+    }
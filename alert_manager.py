@@ -1,43 +1,108 @@
 """
 Alert manager for sending fraud alerts
 """
-import json
 import boto3
 import logging
 from datetime import datetime
 from typing import Dict
-from .config import ALERT_QUEUE_URL
+from .alert_codec import encode_alert_body
+from .alert_dedup import AlertRateLimiter
+from .alert_lanes import lane_queue_url, severity_priority
+from .config import SQS_BATCH_CONFIG, ALERT_DEDUP_CONFIG, ALERT_LANES_CONFIG
+from .sqs_publisher import BatchPublishError, BufferedSqsPublisher
 
 logger = logging.getLogger(__name__)
 
 # AWS client
 sqs = boto3.client('sqs')
 
+# Shared across warm invocations so suppression windows span Kinesis batches.
+# Producer alerts have no alertID yet; a Kinesis retry of a transaction whose
+# alert failed to publish is recognised by its transaction id instead.
+_rate_limiter = AlertRateLimiter(
+    window_seconds=ALERT_DEDUP_CONFIG['window_seconds'],
+    burst=ALERT_DEDUP_CONFIG['burst'],
+    max_keys=ALERT_DEDUP_CONFIG['max_keys'],
+    id_field='transaction_id'
+) if ALERT_DEDUP_CONFIG['enabled'] else None
+
 
 class AlertManager:
     """Manages fraud alerts"""
     
+    def __init__(self, buffered: bool = SQS_BATCH_CONFIG['enabled']):
+        """
+        :param buffered: Collect alerts and send them with SendMessageBatch;
+                         call flush() before the invocation ends
+        """
+        self.rate_limiter = _rate_limiter
+        self.buffered = buffered
+        self.immediate_severities = {severity.upper() for severity in ALERT_LANES_CONFIG['immediate_severities']}
+        # One publisher per lane queue, created on first use
+        self.publishers: Dict[str, BufferedSqsPublisher] = {}
+        self.publisher_priority: Dict[str, int] = {}
+    
+    def _publisher(self, queue_url: str, severity: str) -> BufferedSqsPublisher:
+        publisher = self.publishers.get(queue_url)
+        if publisher is None:
+            publisher = self.publishers[queue_url] = BufferedSqsPublisher(
+                sqs,
+                queue_url,
+                max_latency_seconds=SQS_BATCH_CONFIG['max_latency_seconds'],
+                max_retries=SQS_BATCH_CONFIG['max_retries'],
+                base_backoff_seconds=SQS_BATCH_CONFIG['base_backoff_seconds'],
+                max_backoff_seconds=SQS_BATCH_CONFIG['max_backoff_seconds']
+            )
+        priority = severity_priority(severity)
+        self.publisher_priority[queue_url] = min(priority, self.publisher_priority.get(queue_url, priority))
+        return publisher
+    
     def send_alert(self, alert_data: Dict) -> None:
-        """Send alert to SQS queue"""
-        if not ALERT_QUEUE_URL:
+        """Send alert to its severity's SQS queue"""
+        severity = str(alert_data['severity']).upper()
+        queue_url = lane_queue_url(severity)
+        if not queue_url:
             logger.warning("Alert queue URL not configured")
             return
         
+        if self.rate_limiter is not None:
+            alert_data = self.rate_limiter.apply(alert_data)
+            if alert_data is None:
+                logger.info("Alert suppressed by card/merchant rate limit")
+                return
+        
         try:
+            message_body, encoding_attributes = encode_alert_body(alert_data)
+            message_attributes = {
+                'severity': {
+                    'StringValue': alert_data['severity'],
+                    'DataType': 'String'
+                },
+                'detection_method': {
+                    'StringValue': alert_data['detection_method'],
+                    'DataType': 'String'
+                },
+                **encoding_attributes
+            }
+            
+            if self.buffered:
+                publisher = self._publisher(queue_url, severity)
+                if severity in self.immediate_severities:
+                    # Don't hold urgent alerts back for batching; a failure is reported by flush()
+                    if publisher.send_now(message_body, message_attributes, tag=alert_data['transaction_id']):
+                        logger.info(f"{severity} alert sent to SQS: {alert_data['transaction_id']}")
+                    else:
+                        logger.error(f"{severity} alert not sent to SQS: {alert_data['transaction_id']}")
+                else:
+                    publisher.publish(message_body, message_attributes, tag=alert_data['transaction_id'])
+                    logger.info(f"Alert queued for SQS: {alert_data['transaction_id']}")
+                return
+            
             # Send message to SQS
             response = sqs.send_message(
-                QueueUrl=ALERT_QUEUE_URL,
-                MessageBody=json.dumps(alert_data, default=str),
-                MessageAttributes={
-                    'severity': {
-                        'StringValue': alert_data['severity'],
-                        'DataType': 'String'
-                    },
-                    'detection_method': {
-                        'StringValue': alert_data['detection_method'],
-                        'DataType': 'String'
-                    }
-                }
+                QueueUrl=queue_url,
+                MessageBody=message_body,
+                MessageAttributes=message_attributes
             )
             
             logger.info(f"Alert sent to SQS: {response['MessageId']}")
@@ -45,3 +110,20 @@ class AlertManager:
         except Exception as e:
             logger.error(f"Error sending alert to SQS: {str(e)}")
             raise
+    
+    def flush(self) -> None:
+        """
+        Send any buffered alerts, highest-severity lanes first.
+
+        :raises BatchPublishError: with the failed messages of every lane; its
+                                   tags are the alerts' transaction ids
+        """
+        failed, tags = [], []
+        for queue_url in sorted(self.publishers, key=self.publisher_priority.get):
+            try:
+                self.publishers[queue_url].flush()
+            except BatchPublishError as e:
+                failed.extend(e.failed)
+                tags.extend(e.tags)
+        if failed:
+            raise BatchPublishError(f"{len(failed)} alerts were not sent after retries", failed, tags)
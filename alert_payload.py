@@ -0,0 +1,29 @@
+"""
+Transaction fields carried by fraud alerts
+
+In 'reference' mode an alert carries only the transaction_id and a small
+summary; the full transaction stays in the transactions table and is
+looked up when needed. 'full' mode embeds the whole transaction as before.
+"""
+from typing import Dict
+
+from .config import ALERT_PAYLOAD_CONFIG
+
+SUMMARY_FIELDS = ('amt', 'merchant', 'category')
+
+
+def transaction_summary(transaction: Dict) -> Dict:
+    """The transaction fields needed to triage an alert"""
+    return {field: transaction[field] for field in SUMMARY_FIELDS if field in transaction}
+
+
+def alert_transaction_fields(transaction: Dict, mode: str = None) -> Dict:
+    """Transaction attributes to put in an alert for the configured payload mode"""
+    if (mode or ALERT_PAYLOAD_CONFIG['mode']) == 'full':
+        return {'transaction_data': transaction}
+    return {'transaction_summary': transaction_summary(transaction)}
+
+
+def alert_transaction(alert_data: Dict) -> Dict:
+    """Transaction fields of an alert in either mode (summary or full data)"""
+    return alert_data.get('transaction_summary') or alert_data.get('transaction_data') or {}
@@ -3,21 +3,103 @@ Alert processor for handling SQS messages
 """
 import json
 import logging
-from datetime import datetime
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
+from .alert_codec import decode_alert_body
+from .alert_dedup import AlertRateLimiter, SUPPRESSED_COUNT_FIELD
+from .alert_digest import AlertDigest
+from .alert_lanes import lane_queue_urls, severity_priority, to_lambda_record
 from .data_handler import AlertDataHandler
 from .email_service import EmailNotificationService
+from .notification_dispatcher import NotificationDispatcher, EmailChannel, WebhookChannel
+from .time_index import utc_now
+from .local_store import LocalAlertDataHandler
+from .config import (
+    STORAGE_CONFIG, ALERT_PROCESSING_CONFIG, DIGEST_CONFIG, ALERT_DEDUP_CONFIG, NOTIFICATION_CONFIG
+)
 
 logger = logging.getLogger(__name__)
 
+# Groups one SQS batch: drained at the end of every batch, since alerts held past the
+# invocation would be lost with the container, their SQS messages already deleted
+_digest = AlertDigest(
+    window_seconds=float('inf'),
+    max_alerts_per_digest=DIGEST_CONFIG['max_alerts_per_digest'],
+    bypass_severities=DIGEST_CONFIG['bypass_severities']
+) if DIGEST_CONFIG['enabled'] else None
+
+# Catches duplicates from several producers or from redelivered messages
+_rate_limiter = AlertRateLimiter(
+    window_seconds=ALERT_DEDUP_CONFIG['window_seconds'],
+    burst=ALERT_DEDUP_CONFIG['burst'],
+    max_keys=ALERT_DEDUP_CONFIG['max_keys']
+) if ALERT_DEDUP_CONFIG['enabled'] else None
+
+_dispatcher = None
+
+
+def get_dispatcher(email_service: EmailNotificationService) -> NotificationDispatcher:
+    """Process-wide dispatcher; pending notifications spilled by an earlier invocation are queued again"""
+    global _dispatcher
+    if _dispatcher is None:
+        channels = [EmailChannel(email_service)]
+        if NOTIFICATION_CONFIG['webhook_url']:
+            channels.append(WebhookChannel(NOTIFICATION_CONFIG['webhook_url']))
+        _dispatcher = NotificationDispatcher(
+            channels,
+            workers=NOTIFICATION_CONFIG['workers'],
+            max_queue=NOTIFICATION_CONFIG['max_queue'],
+            max_retries=NOTIFICATION_CONFIG['max_retries'],
+            base_backoff_seconds=NOTIFICATION_CONFIG['base_backoff_seconds'],
+            max_backoff_seconds=NOTIFICATION_CONFIG['max_backoff_seconds'],
+            spill_dir=NOTIFICATION_CONFIG['spill_dir'],
+            spill_pending=NOTIFICATION_CONFIG['spill_pending']
+        )
+    replayed = _dispatcher.replay_pending()
+    if replayed:
+        logger.info(f"Queued {replayed} notifications spilled by an earlier invocation")
+    return _dispatcher
+
 
 class AlertProcessor:
     """Processes fraud alerts from SQS queue"""
     
     def __init__(self):
-        self.data_handler = AlertDataHandler()
+        if STORAGE_CONFIG['backend'] == 'sqlite':
+            self.data_handler = LocalAlertDataHandler(STORAGE_CONFIG['sqlite_path'])
+        else:
+            self.data_handler = AlertDataHandler()
         self.email_service = EmailNotificationService()
+        self.digest = _digest
+        self.rate_limiter = _rate_limiter
+        self.dispatcher = get_dispatcher(self.email_service) if NOTIFICATION_CONFIG['enabled'] else None
+    
+    def build_alert(self, record: Dict) -> Dict:
+        """Build the alert item for one SQS record"""
+        # Extract message attributes
+        attributes = record.get('messageAttributes', {})
+        
+        # Parse SQS message (compressed or claim-checked bodies are decoded transparently)
+        message_body = decode_alert_body(record['body'], attributes)
+        severity = attributes.get('severity', {}).get('stringValue', 'medium')
+        detection_method = attributes.get('detection_method', {}).get('stringValue', 'unknown')
+        
+        return {
+            'alertID': record['messageId'],
+            'transaction_id': message_body.get('transaction_id'),
+            'fraud_score': message_body.get('fraud_score'),
+            'detection_method': detection_method,
+            'detection_details': message_body.get('detection_details', {}),
+            # Reference-mode alerts carry a summary instead of the full transaction
+            **{
+                field: message_body[field]
+                for field in ('transaction_summary', 'transaction_data', 'dedup_key', SUPPRESSED_COUNT_FIELD)
+                if field in message_body
+            },
+            'timestamp': utc_now().isoformat(),
+            'severity': severity
+        }
     
     def process_sqs_messages(self, records: List[Dict]) -> int:
         """Process SQS messages containing fraud alerts"""
@@ -25,31 +107,19 @@ class AlertProcessor:
         
         for record in records:
             try:
-                # Parse SQS message
-                message_body = json.loads(record['body'])
-                
-                # Extract message attributes
-                attributes = record.get('messageAttributes', {})
-                severity = attributes.get('severity', {}).get('stringValue', 'medium')
-                detection_method = attributes.get('detection_method', {}).get('stringValue', 'unknown')
-                
-                # Process the alert
-                alert_data = {
-                    'alertID': record['messageId'],
-                    'transaction_id': message_body.get('transaction_id'),
-                    'fraud_score': message_body.get('fraud_score'),
-                    'detection_method': detection_method,
-                    'detection_details': message_body.get('detection_details', {}),
-                    'transaction_data': message_body.get('transaction_data', {}),
-                    'timestamp': datetime.now().isoformat(),
-                    'severity': severity
-                }
+                alert_data = self.deduplicate([self.build_alert(record)])
+                if not alert_data:
+                    continue
+                alert_data = alert_data[0]
                 
                 # Store alert in DynamoDB
                 self.data_handler.store_alert(alert_data)
 
                 # Send notifications
-                self.email_service.send_email_notification(alert_data)
+                if self.dispatcher is not None:
+                    self.dispatcher.submit('alert', alert_data, severity_priority(alert_data['severity']))
+                else:
+                    self.email_service.send_email_notification(alert_data)
                 
                 processed_count += 1
                 logger.info(f"Processed alert: {alert_data['alertID']}")
@@ -58,4 +128,155 @@ class AlertProcessor:
                 logger.error(f"Error processing SQS message: {str(e)}")
                 continue
         
+        self.wait_for_notifications()
         return processed_count
+    
+    def process_sqs_batch(self, records: List[Dict]) -> Dict:
+        """
+        Process a whole SQS batch: store every alert with one batch writer, then
+        hand notifications to the dispatcher (or send them concurrently on a
+        bounded pool when it is disabled). Alerts that were not stored or
+        notified are reported as failed.
+        
+        Requires ReportBatchItemFailures on the event source mapping; only the
+        returned messages are redelivered. alertID is the SQS messageId, so a
+        redelivered alert overwrites its earlier copy instead of duplicating it.
+        
+        :return: {'batchItemFailures': [{'itemIdentifier': messageId}, ...]}
+        """
+        failed_ids = []
+        alerts = []
+        for record in records:
+            try:
+                alerts.append(self.build_alert(record))
+            except Exception as e:
+                logger.error(f"Error parsing SQS message {record.get('messageId')}: {str(e)}")
+                failed_ids.append(record.get('messageId'))
+        
+        # Highest severity first, so it is let through, stored and notified first
+        alerts.sort(key=lambda alert: severity_priority(alert['severity']))
+        alerts = self.deduplicate(alerts)
+        
+        # Store alerts; don't notify for alerts that will be redelivered
+        not_stored = set(self.data_handler.store_alerts(alerts)) if alerts else set()
+        stored = [alert for alert in alerts if str(alert['alertID']) not in not_stored]
+        failed_ids.extend(alert['alertID'] for alert in alerts if str(alert['alertID']) in not_stored)
+        
+        # Send notifications
+        if self.digest is not None:
+            failed_ids.extend(self.send_digests(stored))
+        elif stored:
+            failed_ids.extend(self.notify(stored))
+        if not stored:
+            # Nothing was notified, but notifications replayed from pending.jsonl may be queued
+            self.wait_for_notifications()
+        
+        logger.info(f"Processed {len(records) - len(failed_ids)} of {len(records)} alerts")
+        return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failed_ids]}
+    
+    def poll_lanes(self, sqs, max_messages: int = 10, wait_seconds: int = 0) -> int:
+        """
+        Receive and process one batch from the highest-priority lane queue
+        that has messages, for consumers polling the lanes themselves
+        instead of through Lambda event source mappings. Call it in a loop:
+        lower lanes are only read while every higher lane is empty.
+        
+        :return: number of messages received (0 when all lanes are empty)
+        """
+        for queue_url in lane_queue_urls():
+            response = sqs.receive_message(
+                QueueUrl=queue_url,
+                MaxNumberOfMessages=max_messages,
+                WaitTimeSeconds=wait_seconds,
+                MessageAttributeNames=['All']
+            )
+            messages = response.get('Messages', [])
+            if not messages:
+                continue
+            
+            records = [to_lambda_record(message) for message in messages]
+            failed = {item['itemIdentifier'] for item in self.process_sqs_batch(records)['batchItemFailures']}
+            done = [record for record in records if record['messageId'] not in failed]
+            if done:
+                sqs.delete_message_batch(
+                    QueueUrl=queue_url,
+                    Entries=[
+                        {'Id': str(index), 'ReceiptHandle': record['receiptHandle']}
+                        for index, record in enumerate(done)
+                    ]
+                )
+            return len(messages)
+        return 0
+    
+    def notify(self, alerts: List[Dict]) -> List[str]:
+        """
+        Send one notification per alert.
+        
+        :return: alertIDs whose notification failed (with the dispatcher:
+                 was dead-lettered or not sent in time)
+        """
+        if self.dispatcher is not None:
+            sent = self._dispatch([
+                ('alert', alert, severity_priority(alert['severity'])) for alert in alerts
+            ])
+        else:
+            sent = self._notify_concurrently(self.email_service.send_email_notification, alerts)
+        return [alert['alertID'] for alert, ok in zip(alerts, sent) if not ok]
+    
+    def wait_for_notifications(self) -> None:
+        """Let the dispatcher finish before the invocation returns and Lambda freezes its threads"""
+        if self.dispatcher is None:
+            return
+        if not self.dispatcher.wait(NOTIFICATION_CONFIG['wait_timeout_seconds']):
+            logger.warning("Notifications still pending at the end of the invocation were not sent")
+        logger.info(f"Notification metrics: {json.dumps(self.dispatcher.metrics())}")
+    
+    def deduplicate(self, alerts: List[Dict]) -> List[Dict]:
+        """Drop alerts over the card/merchant rate limit; survivors carry the suppressed count"""
+        if self.rate_limiter is None:
+            return alerts
+        kept = [alert for alert in map(self.rate_limiter.apply, alerts) if alert is not None]
+        if len(kept) < len(alerts):
+            logger.info(f"Suppressed {len(alerts) - len(kept)} duplicate alerts")
+        return kept
+    
+    def send_digests(self, alerts: List[Dict]) -> List[str]:
+        """
+        Group the batch's alerts into digests and send them all before the
+        batch is acknowledged.
+        
+        :return: alertIDs whose digest could not be sent
+        """
+        stale = self.digest.drain()
+        if stale:
+            # Left by an invocation that failed before draining; those messages are redelivered
+            logger.warning(f"Dropped {sum(len(group) for group in stale)} alerts left from an earlier batch")
+        
+        groups = []
+        for alert in alerts:
+            groups.extend(self.digest.add(alert))
+        groups.extend(self.digest.drain())
+        if not groups:
+            return []
+        
+        if self.dispatcher is not None:
+            sent = self._dispatch([
+                ('digest', {'severity': group.severity, 'alerts': group.alerts}, severity_priority(group.severity))
+                for group in groups
+            ])
+        else:
+            sent = self._notify_concurrently(self.email_service.send_digest_notification, groups)
+        
+        return [alert['alertID'] for group, ok in zip(groups, sent) if not ok for alert in group.alerts]
+    
+    def _dispatch(self, notifications: List[Tuple[str, Dict, int]]) -> List[bool]:
+        """Submit (kind, payload, priority) notifications and wait for them; returns which were delivered"""
+        submitted = [self.dispatcher.submit(*notification) for notification in notifications]
+        self.wait_for_notifications()
+        return [notification.delivered for notification in submitted]
+    
+    def _notify_concurrently(self, send, items: List) -> List[bool]:
+        """Run a notification function over items on a bounded thread pool"""
+        workers = min(ALERT_PROCESSING_CONFIG['notification_workers'], len(items))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(send, items))
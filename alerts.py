@@ -4,7 +4,7 @@ Alerts section component for the dashboard
 import streamlit as st
 import pandas as pd
 from utils import (
-    parse_transaction_data, 
+    get_alert_transaction, 
     extract_transaction_amount, 
     extract_merchant_name,
     format_currency,
@@ -47,7 +47,7 @@ def _render_alert_card(alert):
     severity = alert['severity'].lower()
     
     # Parse transaction data to get key info
-    transaction_data = parse_transaction_data(alert.get('transaction_data', {}))
+    transaction_data = get_alert_transaction(alert)
     
     # Extract key transaction details
     amount = extract_transaction_amount(transaction_data)
@@ -2,18 +2,25 @@
 Alerts details tab component for the dashboard
 """
 import streamlit as st
+import pandas as pd
 import plotly.express as px
-from utils import parse_transaction_data, safe_float
+from utils import parse_transaction_data, get_alert_transaction, safe_float
+from frame_schema import to_float64
 from config import COLOR_SCHEMES
 
 
-def render_alerts_details_tab(df_alerts):
-    """Render the alerts details tab content"""
+def render_alerts_details_tab(df_alerts, transaction_lookup=None):
+    """
+    Render the alerts details tab content
+    
+    transaction_lookup(ids) -> {str(id): transaction} hydrates reference-mode
+    alerts, which only carry a transaction summary.
+    """
     st.subheader("Alerts Details")
     
     if not df_alerts.empty:
         # Display detailed alerts
-        _render_detailed_alerts(df_alerts)
+        _render_detailed_alerts(df_alerts, transaction_lookup)
         
         # Visualizations
         _render_alerts_visualizations(df_alerts)
@@ -21,8 +28,19 @@ def render_alerts_details_tab(df_alerts):
         st.info("No alerts available")
 
 
-def _render_detailed_alerts(df_alerts):
+def _render_detailed_alerts(df_alerts, transaction_lookup=None):
     """Render detailed alert expandable sections"""
+    # Fetch full transactions for reference-mode alerts in one lookup
+    hydrated = {}
+    if transaction_lookup is not None:
+        missing = [
+            alert.get('transaction_id') for _, alert in df_alerts.iterrows()
+            if not parse_transaction_data(alert.get('transaction_data', {}))
+            and pd.notna(alert.get('transaction_id'))
+        ]
+        if missing:
+            hydrated = transaction_lookup(missing)
+    
     for _, alert in df_alerts.iterrows():
         with st.expander(f"Alert {alert['alertID']} - {alert['severity']}"):
             col1, col2 = st.columns(2)
@@ -32,6 +50,9 @@ def _render_detailed_alerts(df_alerts):
                 st.write(f"**Fraud Score:** {safe_float(alert.get('fraud_score', 0)):.6f}")
                 st.write(f"**Detection Method:** {alert.get('detection_method', 'N/A')}")
                 st.write(f"**Timestamp:** {alert.get('timestamp', 'N/A')}")
+                suppressed = safe_float(alert.get('suppressed_count', 0))
+                if suppressed > 0:
+                    st.write(f"**Similar Alerts Suppressed:** {int(suppressed)}")
             
             with col2:
                 st.write("**Detection Details:**")
@@ -42,7 +63,11 @@ def _render_detailed_alerts(df_alerts):
                     st.write("No detection details available")
             
             st.write("**Transaction Data:**")
-            transaction_data = parse_transaction_data(alert.get('transaction_data', {}))
+            transaction_data = (
+                parse_transaction_data(alert.get('transaction_data', {}))
+                or hydrated.get(str(alert.get('transaction_id')))
+                or get_alert_transaction(alert)
+            )
             if transaction_data:
                 st.json(transaction_data)
             else:
@@ -66,7 +91,7 @@ def _render_alerts_visualizations(df_alerts):
     
     with col2:
         # Fraud scores distribution
-        fraud_scores = df_alerts['fraud_score'].apply(safe_float).tolist()
+        fraud_scores = to_float64(df_alerts['fraud_score']).tolist()
         fig_scores = px.histogram(
             x=fraud_scores,
             title='Alert Fraud Scores Distribution',
@@ -0,0 +1,205 @@
+"""
+Streaming per-category and per-merchant amount baselines for adaptive rules
+"""
+import json
+import math
+import os
+import struct
+import time
+import logging
+from array import array
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+BUCKETS_PER_OCTAVE = 8
+BUCKET_COUNT = 8 * 20  # log-spaced buckets covering amounts up to ~$1M
+EMPTY_HISTOGRAM = array('I', [0]) * BUCKET_COUNT
+
+
+def amount_bucket(amount: float) -> int:
+    """Map an amount to its log-spaced histogram bucket"""
+    if amount <= 0:
+        return 0
+    return min(int(math.log2(1.0 + amount) * BUCKETS_PER_OCTAVE), BUCKET_COUNT - 1)
+
+
+def bucket_upper_bound(bucket: int) -> float:
+    """Upper amount bound of a histogram bucket"""
+    return 2.0 ** ((bucket + 1) / BUCKETS_PER_OCTAVE) - 1.0
+
+
+class AmountBaselineStore:
+    """Compact array-backed running amount statistics
+
+    Each key (e.g. ``category:grocery_pos`` or ``merchant:fraud_Kirlin``)
+    owns one slot in flat arrays holding a Welford running mean/variance
+    and a fixed-size log-bucketed histogram used for approximate quantiles.
+    Updates and lookups are O(1) per key.
+    """
+
+    def __init__(self, path: Optional[str] = None, persist_every: int = 500,
+                 persist_interval_seconds: float = 60.0):
+        self.path = path
+        self.persist_every = persist_every
+        self.persist_interval_seconds = persist_interval_seconds
+
+        self._slots: Dict[str, int] = {}
+        self._count = array('d')
+        self._mean = array('d')
+        self._m2 = array('d')
+        self._histogram = array('I')
+
+        self._pending_updates = 0
+        self._last_persist = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _slot(self, key: str) -> int:
+        """Return the slot for a key, allocating one if needed"""
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._slots)
+            self._slots[key] = slot
+            self._count.append(0.0)
+            self._mean.append(0.0)
+            self._m2.append(0.0)
+            self._histogram.extend(EMPTY_HISTOGRAM)
+        return slot
+
+    def observe(self, key: str, amount: float) -> None:
+        """Fold one amount into the running statistics for a key"""
+        slot = self._slot(key)
+        count = self._count[slot] + 1.0
+        delta = amount - self._mean[slot]
+        mean = self._mean[slot] + delta / count
+        self._count[slot] = count
+        self._mean[slot] = mean
+        self._m2[slot] += delta * (amount - mean)
+        self._histogram[slot * BUCKET_COUNT + amount_bucket(amount)] += 1
+
+        self._pending_updates += 1
+        self.maybe_persist()
+
+    def stats(self, key: str) -> Tuple[int, float, float]:
+        """Return (count, mean, standard deviation) for a key"""
+        slot = self._slots.get(key)
+        if slot is None:
+            return 0, 0.0, 0.0
+        count = self._count[slot]
+        variance = self._m2[slot] / (count - 1) if count > 1 else 0.0
+        return int(count), self._mean[slot], math.sqrt(variance)
+
+    def z_score(self, key: str, amount: float) -> float:
+        """Standard score of an amount against a key's baseline"""
+        count, mean, std = self.stats(key)
+        if count < 2 or std == 0.0:
+            return 0.0
+        return (amount - mean) / std
+
+    def quantile(self, key: str, q: float) -> float:
+        """Approximate amount at quantile q for a key"""
+        slot = self._slots.get(key)
+        if slot is None:
+            return math.inf
+        target = q * self._count[slot]
+        offset = slot * BUCKET_COUNT
+        cumulative = 0
+        for bucket in range(BUCKET_COUNT):
+            cumulative += self._histogram[offset + bucket]
+            if cumulative >= target:
+                return bucket_upper_bound(bucket)
+        return bucket_upper_bound(BUCKET_COUNT - 1)
+
+    def is_outlier(self, key: str, amount: float, z_threshold: float,
+                   percentile: float, min_samples: int) -> bool:
+        """Check an amount against a key's z-score and percentile limits"""
+        count, _, _ = self.stats(key)
+        if count < min_samples:
+            return False
+        if self.z_score(key, amount) >= z_threshold:
+            return True
+        return amount > self.quantile(key, percentile)
+
+    def maybe_persist(self) -> None:
+        """Persist state if enough updates or time have accumulated"""
+        if not self.path or not self._pending_updates:
+            return
+        elapsed = time.monotonic() - self._last_persist
+        if (self._pending_updates >= self.persist_every
+                or elapsed >= self.persist_interval_seconds):
+            self.save()
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Write state atomically to disk"""
+        path = path or self.path
+        if not path:
+            return
+        header = json.dumps({
+            'version': STATE_VERSION,
+            'buckets': BUCKET_COUNT,
+            'buckets_per_octave': BUCKETS_PER_OCTAVE,
+            'keys': sorted(self._slots, key=self._slots.get)
+        }).encode('utf-8')
+
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as fh:
+                fh.write(struct.pack('<I', len(header)))
+                fh.write(header)
+                for values in (self._count, self._mean, self._m2, self._histogram):
+                    fh.write(values.tobytes())
+            os.replace(tmp_path, path)
+            self._pending_updates = 0
+            self._last_persist = time.monotonic()
+        except OSError as e:
+            logger.error(f"Error persisting amount baselines: {str(e)}")
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'AmountBaselineStore':
+        """Load state from disk, starting empty if missing or incompatible"""
+        store = cls(path=path, **kwargs)
+        if not os.path.exists(path):
+            return store
+
+        try:
+            with open(path, 'rb') as fh:
+                (header_size,) = struct.unpack('<I', fh.read(4))
+                header = json.loads(fh.read(header_size))
+                if (header['version'] != STATE_VERSION
+                        or header['buckets'] != BUCKET_COUNT
+                        or header['buckets_per_octave'] != BUCKETS_PER_OCTAVE):
+                    logger.warning("Amount baseline state is incompatible, starting fresh")
+                    return store
+
+                keys = header['keys']
+                for values, width in ((store._count, 1), (store._mean, 1),
+                                      (store._m2, 1), (store._histogram, BUCKET_COUNT)):
+                    values.frombytes(fh.read(len(keys) * width * values.itemsize))
+                    if len(values) != len(keys) * width:
+                        raise ValueError("state file is truncated")
+                store._slots = {key: slot for slot, key in enumerate(keys)}
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logger.error(f"Error loading amount baselines, starting fresh: {str(e)}")
+            return cls(path=path, **kwargs)
+
+        logger.info(f"Loaded amount baselines for {len(store)} keys")
+        return store
+
+
+# Shared across warm Lambda invocations
+_shared_store: Optional[AmountBaselineStore] = None
+
+
+def get_shared_store(config: Dict) -> AmountBaselineStore:
+    """Return the process-wide baseline store, loading it on first use"""
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = AmountBaselineStore.load(
+            config['state_path'],
+            persist_every=config['persist_every'],
+            persist_interval_seconds=config['persist_interval_seconds']
+        )
+    return _shared_store
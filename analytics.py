@@ -2,9 +2,8 @@
 Analytics tab component for the dashboard
 """
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from utils import safe_float
+from frame_schema import to_float64, to_datetime
 from config import COLOR_SCHEMES
 
 
@@ -61,7 +60,7 @@ def _render_amount_analysis(df_transactions):
     with col1:
         # Amount distribution by fraud status
         df_amounts = df_transactions.copy()
-        df_amounts['amount_float'] = df_amounts['amt'].apply(safe_float)
+        df_amounts['amount_float'] = to_float64(df_amounts['amt'])
         df_amounts['fraud_status'] = df_amounts['is_fraud'].map({0: 'Legitimate', 1: 'Fraud'})
         
         fig_amounts = px.box(
@@ -78,8 +77,8 @@ def _render_time_series_analysis(df_alerts):
     """Render time series analysis if data is available"""
     if not df_alerts.empty and 'timestamp' in df_alerts.columns:
         df_alerts_time = df_alerts.copy()
-        df_alerts_time['timestamp'] = pd.to_datetime(df_alerts_time['timestamp'])
-        df_alerts_time['fraud_score_float'] = df_alerts_time['fraud_score'].apply(safe_float)
+        df_alerts_time['timestamp'] = to_datetime(df_alerts_time['timestamp'])
+        df_alerts_time['fraud_score_float'] = to_float64(df_alerts_time['fraud_score'])
         
         fig_time_series = px.line(
             df_alerts_time.sort_values('timestamp'),
@@ -2,6 +2,7 @@ __package__ = 'backend'
 
 import decimal
 from backend.dynamo.database_operations import AnomalyTransactions
+from .email_templates import render_alert_html
 from dotenv import load_dotenv
 from decimal import Decimal
 import json
@@ -90,61 +91,7 @@ def send_email_notification(alert_data):
     
 def create_email_html(alert_data):
     """Create HTML email body"""
-    severity_colors = {
-        'high': '#dc3545',
-        'medium': '#ffc107',
-        'low': '#28a745'
-    }
-    
-    severity_color = severity_colors.get(alert_data['severity'], '#6c757d')
-    
-    html = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-        <div style="background-color: {severity_color}; color: white; padding: 20px; text-align: center;">
-            <h1>🚨 Fraud Alert Detected</h1>
-            <h2>Severity: {alert_data['severity'].upper()}</h2>
-        </div>
-        
-        <div style="padding: 20px; background-color: #f8f9fa;">
-            <h3>Transaction Details</h3>
-            <table style="width: 100%; border-collapse: collapse;">
-                <tr>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Transaction ID:</strong></td>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;">{alert_data['transaction_id']}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Amount:</strong></td>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;">${alert_data.get('transaction_data', {}).get('amt', 'N/A')}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Fraud Score:</strong></td>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;">{alert_data['fraud_score']:.2f}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Detection Method:</strong></td>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;">{alert_data['detection_method']}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Timestamp:</strong></td>
-                    <td style="padding: 8px; border-bottom: 1px solid #ddd;">{alert_data['timestamp']}</td>
-                </tr>
-            </table>
-            
-            <h3>Detection Details</h3>
-            <div style="background-color: white; padding: 15px; border-radius: 5px; margin: 10px 0;">
-                <pre style="white-space: pre-wrap; font-family: monospace; font-size: 12px;">{json.dumps(alert_data['detection_details'], indent=2)}</pre>
-            </div>
-            
-            <div style="margin-top: 20px; padding: 15px; background-color: #fff3cd; border-radius: 5px;">
-                <strong>⚠️ Action Required:</strong> Please review this transaction immediately and take appropriate action.
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    return html
+    return render_alert_html(alert_data)
 
 def lambda_handler(event, context):
     for record in event['Records']:
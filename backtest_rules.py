@@ -0,0 +1,186 @@
+"""
+Backtest a business rule set against a labelled historical transactions file
+
+Usage:
+    python -m backend.backtest_rules history.csv --rules candidate.json --workers 8
+
+The input may also be the root of a Parquet archive written by
+backend.parquet_archive, optionally limited with --since/--until.
+
+The file must contain the sampled_transactions.csv columns used by the rules
+('amt', 'trans_date_trans_time') plus the 'is_fraud' label. CSV and Parquet
+inputs are streamed in chunks and evaluated on a process pool, so memory stays
+bounded by chunk size times the number of chunks in flight.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+from .business_rules import BusinessRulesEngine, RULE_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+BACKTEST_COLUMNS = ['amt', 'trans_date_trans_time', 'is_fraud']
+DEFAULT_CHUNKSIZE = 500_000
+
+
+def iter_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE, since: Optional[str] = None,
+                until: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Stream the rule input columns of a CSV or Parquet file in chunks"""
+    if os.path.isdir(os.path.join(path, 'transactions')):
+        # Parquet archive root: read its transactions, pruning date partitions
+        from .parquet_archive import date_filter, open_dataset
+        dataset = open_dataset(path, 'transactions')
+        for batch in dataset.to_batches(columns=BACKTEST_COLUMNS, filter=date_filter(since, until),
+                                        batch_size=chunksize):
+            yield batch.to_pandas()
+    elif path.endswith('.parquet') or os.path.isdir(path):
+        try:
+            import pyarrow.dataset as ds
+        except ImportError:
+            raise ImportError("pyarrow is required to backtest Parquet input")
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        for batch in dataset.to_batches(columns=BACKTEST_COLUMNS, batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path,
+            usecols=BACKTEST_COLUMNS,
+            dtype={'amt': 'float64', 'trans_date_trans_time': 'string'},
+            chunksize=chunksize
+        )
+
+
+def evaluate_chunk(chunk: pd.DataFrame, rules: Optional[Dict]) -> Dict[str, int]:
+    """Evaluate one chunk and return additive confusion and per-rule counts"""
+    engine = BusinessRulesEngine(rules=rules)
+    flags = engine.evaluate_frame(chunk)
+    labels = pd.to_numeric(chunk['is_fraud'], errors='coerce').fillna(0).to_numpy() == 1
+    flagged = flags['is_fraud'].to_numpy()
+
+    counts = {
+        'rows': len(chunk),
+        'actual_fraud': int(labels.sum()),
+        'flagged': int(flagged.sum()),
+        'true_positives': int((flagged & labels).sum())
+    }
+    for rule in RULE_WEIGHTS:
+        fired = flags[rule].to_numpy()
+        counts[f'{rule}_fired'] = int(fired.sum())
+        counts[f'{rule}_fired_fraud'] = int((fired & labels).sum())
+    return counts
+
+
+def summarize(counts: Dict[str, int]) -> Dict:
+    """Turn accumulated counts into backtest metrics"""
+    rows = counts.get('rows', 0)
+    flagged = counts.get('flagged', 0)
+    actual_fraud = counts.get('actual_fraud', 0)
+    true_positives = counts.get('true_positives', 0)
+    base_rate = actual_fraud / rows if rows else 0.0
+
+    per_rule = {}
+    for rule in RULE_WEIGHTS:
+        fired = counts.get(f'{rule}_fired', 0)
+        fired_fraud = counts.get(f'{rule}_fired_fraud', 0)
+        rule_precision = fired_fraud / fired if fired else 0.0
+        per_rule[rule] = {
+            'fired': fired,
+            'fire_rate': fired / rows if rows else 0.0,
+            'precision': rule_precision,
+            'recall': fired_fraud / actual_fraud if actual_fraud else 0.0,
+            'lift': rule_precision / base_rate if base_rate else 0.0
+        }
+
+    return {
+        'rows': rows,
+        'fraud_rate': base_rate,
+        'flagged': flagged,
+        'precision': true_positives / flagged if flagged else 0.0,
+        'recall': true_positives / actual_fraud if actual_fraud else 0.0,
+        'sagemaker_share': (rows - flagged) / rows if rows else 0.0,
+        'rules': per_rule
+    }
+
+
+def run_backtest(path: str, rules: Optional[Dict] = None, chunksize: int = DEFAULT_CHUNKSIZE,
+                 workers: Optional[int] = None, since: Optional[str] = None,
+                 until: Optional[str] = None) -> Dict:
+    """Stream a file through the rule set in parallel and return metrics"""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    totals: Dict[str, int] = {}
+
+    def accumulate(done):
+        for future in done:
+            for key, value in future.result().items():
+                totals[key] = totals.get(key, 0) + value
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in iter_chunks(path, chunksize, since, until):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                accumulate(done)
+            pending.add(pool.submit(evaluate_chunk, chunk, rules))
+        accumulate(wait(pending)[0])
+
+    return summarize(totals)
+
+
+def format_report(metrics: Dict) -> str:
+    """Render backtest metrics as a plain-text report"""
+    lines = [
+        f"Rows evaluated:        {metrics['rows']:,}",
+        f"Fraud rate:            {metrics['fraud_rate']:.4%}",
+        f"Flagged by rules:      {metrics['flagged']:,}",
+        f"Precision:             {metrics['precision']:.4f}",
+        f"Recall:                {metrics['recall']:.4f}",
+        f"Routed to SageMaker:   {metrics['sagemaker_share']:.2%}",
+        "",
+        f"{'Rule':<20}{'Fired':>12}{'Fire rate':>12}{'Precision':>12}{'Recall':>10}{'Lift':>8}"
+    ]
+    for rule, stats in metrics['rules'].items():
+        lines.append(
+            f"{rule:<20}{stats['fired']:>12,}{stats['fire_rate']:>12.4%}"
+            f"{stats['precision']:>12.4f}{stats['recall']:>10.4f}{stats['lift']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest business rules on labelled history")
+    parser.add_argument('path', help="CSV file, Parquet file, Parquet directory or archive root")
+    parser.add_argument('--rules', help="JSON file with BUSINESS_RULES overrides to evaluate")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--since', help="First archive date to read (YYYY-MM-DD)")
+    parser.add_argument('--until', help="Last archive date to read (YYYY-MM-DD)")
+    parser.add_argument('--json', action='store_true', help="Print metrics as JSON")
+    args = parser.parse_args(argv)
+
+    rules = None
+    if args.rules:
+        with open(args.rules, 'r', encoding='utf-8') as fh:
+            rules = json.load(fh)
+
+    started = time.perf_counter()
+    metrics = run_backtest(args.path, rules, args.chunksize, args.workers, args.since, args.until)
+    metrics['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+
+    if args.json:
+        print(json.dumps(metrics, indent=2))
+    else:
+        print(format_report(metrics))
+        print(f"\nCompleted in {metrics['elapsed_seconds']}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Buffered multi-table BatchWriteItem writer for DynamoDB
+"""
+import random
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from botocore.exceptions import ClientError
+from .dynamo_serializer import to_wire_item
+
+logger = logging.getLogger(__name__)
+
+# DynamoDB limit for a single BatchWriteItem request
+MAX_BATCH_ITEMS = 25
+
+RETRYABLE_ERROR_CODES = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'InternalServerError'
+}
+
+
+class BatchWriteError(Exception):
+    """Raised when items are still unprocessed after all retries"""
+
+    def __init__(self, message: str, unprocessed: Dict[str, List[Dict]]):
+        super().__init__(message)
+        self.unprocessed = unprocessed
+
+    def key_values(self, attribute: str) -> Set[str]:
+        """Values of one attribute (e.g. the partition key) across the unprocessed items, as strings"""
+        values = set()
+        for requests in self.unprocessed.values():
+            for request in requests:
+                value = request['PutRequest']['Item'].get(attribute)
+                if value:
+                    values.add(str(next(iter(value.values()))))
+        return values
+
+
+class BufferedBatchWriter:
+    """Collects puts for several tables and writes them with BatchWriteItem
+
+    Items are given as native Python values and encoded straight to the
+    DynamoDB wire format when buffered.
+
+    Items are flushed once ``flush_size`` items are buffered or the oldest
+    buffered item is older than ``max_latency_seconds``. ``UnprocessedItems``
+    are retried with capped exponential backoff and full jitter. Items that
+    still fail are kept and reported together by the next ``flush()``. Call
+    ``flush()`` (or use the writer as a context manager) before the
+    invocation returns so nothing is left in the buffer.
+    """
+
+    def __init__(self, dynamodb, key_attributes: Optional[Dict[str, Sequence[str]]] = None,
+                 flush_size: int = MAX_BATCH_ITEMS, max_latency_seconds: float = 2.0,
+                 max_retries: int = 6, base_backoff_seconds: float = 0.05,
+                 max_backoff_seconds: float = 2.0):
+        """
+        :param dynamodb: boto3 DynamoDB low-level client
+        :param key_attributes: Primary key attribute names per table, used to
+                               collapse repeated writes of the same item
+        """
+        self.dynamodb = dynamodb
+        self.key_attributes = key_attributes or {}
+        self.flush_size = min(flush_size, MAX_BATCH_ITEMS)
+        self.max_latency_seconds = max_latency_seconds
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._buffer: 'OrderedDict[Tuple, Tuple[str, Dict]]' = OrderedDict()
+        self._oldest: Optional[float] = None
+        self._sequence = 0
+        self._failed: Dict[str, List[Dict]] = {}
+        self.requests_sent = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def _buffer_key(self, table_name: str, item: Dict) -> Tuple:
+        """Key identifying an item within the buffer"""
+        key_attributes = self.key_attributes.get(table_name)
+        if key_attributes and all(attr in item for attr in key_attributes):
+            return (table_name,) + tuple(str(item[attr]) for attr in key_attributes)
+        self._sequence += 1
+        return (table_name, None, self._sequence)
+
+    def put(self, table_name: str, item: Dict) -> None:
+        """Buffer an item, flushing if the batch is full or overdue"""
+        buffer_key = self._buffer_key(table_name, item)
+        # BatchWriteItem rejects duplicate keys in one request; last write wins
+        self._buffer.pop(buffer_key, None)
+        self._buffer[buffer_key] = (table_name, to_wire_item(item))
+
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+        if len(self._buffer) >= self.flush_size:
+            self._write_buffered()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        """Write the buffer if the oldest buffered item has exceeded the deadline"""
+        if self._oldest is not None and time.monotonic() - self._oldest >= self.max_latency_seconds:
+            self._write_buffered()
+
+    def flush(self) -> None:
+        """Write every buffered item, raising for every item that remains unprocessed"""
+        self._write_buffered()
+        failed, self._failed = self._failed, {}
+        if failed:
+            count = sum(len(requests) for requests in failed.values())
+            raise BatchWriteError(f"{count} items were not written after retries", failed)
+
+    def _write_buffered(self) -> None:
+        while self._buffer:
+            request_items: Dict[str, List[Dict]] = {}
+            for _ in range(min(MAX_BATCH_ITEMS, len(self._buffer))):
+                _, (table_name, item) = self._buffer.popitem(last=False)
+                request_items.setdefault(table_name, []).append({'PutRequest': {'Item': item}})
+
+            for table_name, requests in self._write_batch(request_items).items():
+                self._failed.setdefault(table_name, []).extend(requests)
+
+        self._oldest = None
+
+    def _write_batch(self, request_items: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        """Send one BatchWriteItem request, retrying unprocessed items"""
+        attempt = 0
+        while request_items:
+            try:
+                response = self.dynamodb.batch_write_item(RequestItems=request_items)
+                self.requests_sent += 1
+                request_items = response.get('UnprocessedItems') or {}
+            except ClientError as err:
+                if err.response['Error']['Code'] not in RETRYABLE_ERROR_CODES:
+                    logger.error(f"Error writing batch to DynamoDB: {str(err)}")
+                    return request_items
+
+            if not request_items:
+                break
+
+            attempt += 1
+            if attempt > self.max_retries:
+                logger.error("Giving up on unprocessed items after %d retries", self.max_retries)
+                return request_items
+
+            backoff = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** attempt))
+            time.sleep(random.uniform(0, backoff))
+
+        return {}
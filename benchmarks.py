@@ -0,0 +1,459 @@
+"""
+Micro-benchmarks for the fraud detection pipeline hot paths
+
+Usage:
+    python -m backend.benchmarks [name ...]
+
+Runs every benchmark when no name is given. Inputs are built from
+sampled_transactions.csv so payloads have realistic shapes and sizes.
+"""
+import csv
+import json
+import math
+import os
+import random
+import socketserver
+import sys
+import threading
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from .alert_payload import alert_transaction_fields
+from .dynamo_serializer import to_dynamo, to_wire_item
+from .feature_codec import encode_features
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sampled_transactions.csv')
+
+
+def load_sample_transactions(file_path=SAMPLE_CSV):
+    """Read sample transactions with the same types the Kinesis producer sends"""
+    transactions = []
+    with open(file_path, 'r', encoding='utf-8') as csvfile:
+        for row in csv.DictReader(csvfile):
+            record = dict(row)
+            for field in ('amt', 'lat', 'long', 'merch_lat', 'merch_long'):
+                record[field] = float(row[field])
+            for field in ('transactionID', 'zip', 'city_pop', 'unix_time'):
+                record[field] = int(row[field])
+            record['cc_num'] = str(int(float(row['cc_num'])))
+            transactions.append(record)
+    return transactions
+
+
+def build_alert_payloads(count=1000):
+    """Build alert records shaped like the ones AlertProcessor stores"""
+    transactions = load_sample_transactions()
+    severities = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+    alerts = []
+    for i in range(count):
+        transaction = dict(transactions[i % len(transactions)])
+        transaction['transactionID'] = i
+        alerts.append({
+            'alertID': f"alert-{i}",
+            'transaction_id': i,
+            'fraud_score': random.random(),
+            'detection_method': 'business_rules' if i % 2 else 'AI_model',
+            'detection_details': ["High transaction amount", "Suspicious transaction timing"],
+            'transaction_data': transaction,
+            'timestamp': datetime.now().isoformat(),
+            'severity': severities[i % len(severities)]
+        })
+    return alerts
+
+
+def _legacy_convert_floats(obj):
+    """Recursive Decimal(str(x)) conversion the writers used previously"""
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    elif isinstance(obj, dict):
+        return {k: _legacy_convert_floats(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_legacy_convert_floats(i) for i in obj]
+    return obj
+
+
+def _legacy_email_html(alert_data):
+    """Per-alert f-string HTML the email service built previously"""
+    severity_colors = {'high': '#dc3545', 'medium': '#ffc107', 'low': '#28a745'}
+    severity_color = severity_colors.get(alert_data['severity'], '#6c757d')
+    transaction = alert_data.get('transaction_summary') or alert_data.get('transaction_data') or {}
+    row = '<td style="padding: 8px; border-bottom: 1px solid #ddd;">'
+    html = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background-color: {severity_color}; color: white; padding: 20px; text-align: center;">
+                <h1>🚨 Fraud Alert Detected</h1>
+                <h2>Severity: {alert_data['severity'].upper()}</h2>
+            </div>
+            <div style="padding: 20px; background-color: #f8f9fa;">
+                <h3>Transaction Details</h3>
+                <table style="width: 100%; border-collapse: collapse;">
+                    <tr>{row}<strong>Transaction ID:</strong></td>{row}{alert_data['transaction_id']}</td></tr>
+                    <tr>{row}<strong>Amount:</strong></td>{row}${transaction.get('amt', 'N/A')}</td></tr>
+                    <tr>{row}<strong>Merchant:</strong></td>{row}{transaction.get('merchant', 'N/A')}</td></tr>
+                    <tr>{row}<strong>Fraud Score:</strong></td>{row}{alert_data['fraud_score']:.2f}</td></tr>
+                    <tr>{row}<strong>Detection Method:</strong></td>{row}{alert_data['detection_method']}</td></tr>
+                    <tr>{row}<strong>Timestamp:</strong></td>{row}{alert_data['timestamp']}</td></tr>
+                </table>
+                <h3>Detection Details</h3>
+                <div style="background-color: white; padding: 15px; border-radius: 5px; margin: 10px 0;">
+                    <pre style="white-space: pre-wrap; font-family: monospace; font-size: 12px;">{json.dumps(alert_data['detection_details'], indent=2)}</pre>
+                </div>
+                <div style="margin-top: 20px; padding: 15px; background-color: #fff3cd; border-radius: 5px;">
+                    <strong>⚠️ Action Required:</strong> Please review this transaction immediately and take appropriate action.
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+    return html
+
+
+def estimate_item_size(wire_item):
+    """Estimate stored DynamoDB item size in bytes from a wire-format item"""
+    def value_size(value):
+        (type_code, raw), = value.items()
+        if type_code in ('S', 'B'):
+            return len(raw.encode('utf-8')) if type_code == 'S' else len(raw)
+        if type_code == 'N':
+            digits = len(raw.lstrip('-').replace('.', '').split('e')[0].split('E')[0].strip('0')) or 1
+            return math.ceil(digits / 2) + 1
+        if type_code in ('BOOL', 'NULL'):
+            return 1
+        if type_code == 'M':
+            return 3 + sum(len(k.encode('utf-8')) + value_size(v) + 1 for k, v in raw.items())
+        if type_code == 'L':
+            return 3 + sum(value_size(v) + 1 for v in raw)
+        return sum(len(str(v)) for v in raw)
+
+    return sum(len(name.encode('utf-8')) + value_size(value) for name, value in wire_item.items())
+
+
+def _report(label, seconds, operations):
+    """Print a single benchmark line"""
+    print(f"  {label:<44}{seconds / operations * 1e6:>10.2f} us/op"
+          f"{operations / seconds:>14,.0f} ops/s")
+
+
+def benchmark_serializer(repeat=5):
+    """Compare the legacy float conversion with the shared serializer"""
+    from boto3.dynamodb.types import TypeSerializer
+    serializer = TypeSerializer()
+    alerts = build_alert_payloads()
+
+    def legacy_resource_path():
+        # What put_item on a Table resource did: convert, then serialize
+        for alert in alerts:
+            item = _legacy_convert_floats(alert)
+            {k: serializer.serialize(v) for k, v in item.items()}
+
+    cases = [
+        ("legacy convert_floats", lambda: [_legacy_convert_floats(a) for a in alerts]),
+        ("to_dynamo", lambda: [to_dynamo(a) for a in alerts]),
+        ("legacy convert + TypeSerializer", legacy_resource_path),
+        ("to_wire_item", lambda: [to_wire_item(a) for a in alerts]),
+    ]
+
+    print(f"Serializer ({len(alerts)} alert payloads, best of {repeat})")
+    for label, func in cases:
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        _report(label, seconds, len(alerts))
+
+
+def benchmark_feature_storage():
+    """Compare detection item sizes with text and packed feature vectors"""
+    from .sagemaker_client import SageMakerClient
+    client = SageMakerClient()
+    transactions = load_sample_transactions()
+    timestamp = datetime.now().isoformat()
+
+    def items(encode):
+        for transaction in transactions:
+            features = client.preprocess_transaction(transaction)
+            stored = encode(features)
+            yield 'detection_results', {
+                'transactionID': transaction['transactionID'],
+                'prediction': 0.0123,
+                'csv_data': stored,
+                'timestamp': timestamp
+            }
+            yield 'detections', {
+                'transactionID': transaction['transactionID'],
+                'is_fraud': False,
+                'confidence': 0.0123,
+                'details': stored,
+                'timestamp': timestamp
+            }
+
+    encodings = [
+        ("text", lambda features: features),
+        ("binary float32", lambda features: encode_features(features, 'f')),
+        ("binary float64", lambda features: encode_features(features, 'd')),
+    ]
+
+    print(f"Detection item size ({len(transactions)} sample transactions)")
+    print(f"  {'encoding':<18}{'table':<20}{'avg bytes':>10}{'avg WCU':>9}{'scan RCU/1k':>13}")
+    for label, encode in encodings:
+        sizes = {}
+        for table, item in items(encode):
+            sizes.setdefault(table, []).append(estimate_item_size(to_wire_item(item)))
+        for table, table_sizes in sizes.items():
+            avg_size = sum(table_sizes) / len(table_sizes)
+            avg_wcu = sum(math.ceil(size / 1024) for size in table_sizes) / len(table_sizes)
+            # Eventually consistent scans read 8KB per RCU
+            scan_rcu = avg_size * 1000 / 8192
+            print(f"  {label:<18}{table:<20}{avg_size:>10.1f}{avg_wcu:>9.2f}{scan_rcu:>13.1f}")
+
+
+def benchmark_alert_payload():
+    """Compare SQS body and alert item sizes with full and reference-mode payloads"""
+    alerts = build_alert_payloads()
+
+    print(f"Alert payload size ({len(alerts)} alerts)")
+    print(f"  {'mode':<12}{'SQS body bytes':>16}{'alert item bytes':>18}{'avg WCU':>9}")
+    for mode in ('full', 'reference'):
+        body_sizes, item_sizes = [], []
+        for alert in alerts:
+            alert = dict(alert)
+            transaction = alert.pop('transaction_data')
+            alert.update(alert_transaction_fields(transaction, mode))
+            body_sizes.append(len(json.dumps(alert, default=str).encode('utf-8')))
+            item_sizes.append(estimate_item_size(to_wire_item(alert)))
+        avg_wcu = sum(math.ceil(size / 1024) for size in item_sizes) / len(item_sizes)
+        print(f"  {mode:<12}{sum(body_sizes) / len(body_sizes):>16.1f}"
+              f"{sum(item_sizes) / len(item_sizes):>18.1f}{avg_wcu:>9.2f}")
+
+
+def benchmark_email_render(count=2000, repeat=3):
+    """Compare per-alert f-string HTML and MIME objects with compiled templates and cached envelopes"""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from .email_templates import MessageEnvelope, render_alert_html
+
+    alerts = []
+    for alert in build_alert_payloads(count):
+        transaction = alert.pop('transaction_data')
+        alert.update(alert_transaction_fields(transaction, 'reference'))
+        alerts.append(alert)
+    envelope = MessageEnvelope('alerts@example.com', 'ops@example.com')
+
+    def subject(alert):
+        return f"🚨 Fraud Alert - {alert['severity'].upper()} - Transaction {alert['transaction_id']}"
+
+    def legacy_message(alert):
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject(alert)
+        msg['From'] = 'alerts@example.com'
+        msg['To'] = 'ops@example.com'
+        msg.attach(MIMEText(_legacy_email_html(alert), 'html'))
+        return msg.as_bytes()
+
+    cases = [
+        ("legacy f-string HTML", lambda: [_legacy_email_html(a) for a in alerts]),
+        ("compiled template HTML", lambda: [render_alert_html(a) for a in alerts]),
+        ("legacy HTML + MIMEMultipart", lambda: [legacy_message(a) for a in alerts]),
+        ("compiled template + cached envelope", lambda: [envelope.build(subject(a), render_alert_html(a)) for a in alerts]),
+    ]
+
+    print(f"Email rendering ({count} alerts, best of {repeat})")
+    for label, func in cases:
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        _report(label, seconds, count)
+
+
+def benchmark_alert_codec(repeat=3):
+    """Compare plain and zlib-compressed SQS bodies for alert payloads"""
+    from .alert_codec import decode_alert_body, encode_alert_body
+
+    alerts = build_alert_payloads()
+    print(f"Alert SQS bodies ({len(alerts)} alerts, best of {repeat})")
+    for mode in ('full', 'reference'):
+        payloads = []
+        for alert in alerts:
+            alert = dict(alert)
+            alert.update(alert_transaction_fields(alert.pop('transaction_data'), mode))
+            payloads.append(alert)
+        for compress in (False, True):
+            encoded = [encode_alert_body(alert, compress=compress, claim_check='') for alert in payloads]
+            average = sum(len(body) for body, _ in encoded) / len(encoded)
+            label = f"{mode}, {'zlib+base64' if compress else 'plain JSON'}"
+            print(f"  {label:<44}{average:>10.1f} bytes/body")
+            encode = min(timeit.repeat(
+                lambda: [encode_alert_body(alert, compress=compress, claim_check='') for alert in payloads],
+                number=1, repeat=repeat))
+            _report("  encode", encode, len(payloads))
+            decode = min(timeit.repeat(
+                lambda: [decode_alert_body(body, attributes) for body, attributes in encoded],
+                number=1, repeat=repeat))
+            _report("  decode", decode, len(encoded))
+
+
+def _dynamo_transaction_items(count):
+    """Transaction items as the dashboard reads them from DynamoDB: numbers as Decimal, timestamps as ISO strings"""
+    transactions = load_sample_transactions()
+    started = datetime(2024, 1, 1)
+    items = []
+    for i in range(count):
+        item = _legacy_convert_floats(dict(transactions[i % len(transactions)]))
+        item['transaction_id'] = str(i)
+        item['city_pop'] = Decimal(item['city_pop'])
+        item['is_fraud'] = Decimal(int(item.get('is_fraud', 0) or 0))
+        item['timestamp'] = (started + timedelta(seconds=37 * i)).isoformat()
+        items.append(item)
+    return items
+
+
+def _legacy_safe_float(value):
+    """Per-value conversion the dashboard applied on every render previously"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def benchmark_dataframe_schema(count=100_000, repeat=3):
+    """Compare untyped DataFrames converted per render with frames typed once at load"""
+    import pandas as pd
+    from .frame_schema import build_frame, to_datetime, to_float64
+
+    items = _dynamo_transaction_items(count)
+    print(f"Transactions DataFrame ({count} rows, best of {repeat})")
+
+    def legacy_render(df):
+        amounts = df['amt'].apply(_legacy_safe_float)
+        total = amounts.sum()
+        bins = pd.cut(amounts, bins=20).value_counts()
+        hours = pd.to_datetime(df['timestamp']).dt.hour.value_counts()
+        states = df.groupby('state')['amt'].count()
+        return total, bins, hours, states
+
+    def typed_render(df):
+        amounts = to_float64(df['amt'])
+        total = amounts.sum()
+        bins = pd.cut(amounts, bins=20).value_counts()
+        hours = to_datetime(df['timestamp']).dt.hour.value_counts()
+        states = df.groupby('state', observed=True)['amt'].count()
+        return total, bins, hours, states
+
+    for label, build, render in (("untyped", pd.DataFrame, legacy_render),
+                                 ("typed at load", lambda rows: build_frame(rows, 'transactions'), typed_render)):
+        frame = build(items)
+        megabytes = frame.memory_usage(deep=True).sum() / 1e6
+        print(f"  {label + ', memory':<44}{megabytes:>10.1f} MB")
+        load = min(timeit.repeat(lambda: build(items), number=1, repeat=repeat))
+        print(f"  {label + ', build':<44}{load * 1000:>10.1f} ms")
+        seconds = min(timeit.repeat(lambda: render(frame), number=1, repeat=repeat))
+        print(f"  {label + ', render':<44}{seconds * 1000:>10.1f} ms")
+
+
+class _SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: enough for smtplib to deliver messages (no TLS or AUTH)"""
+
+    def reply(self, line):
+        time.sleep(self.server.latency)
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.reply("250-stand-in\r\n250 8BITMIME")
+            elif command == b'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 OK")
+            elif command == b'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """SMTP stand-in on localhost; ``latency`` delays each reply to mimic a network round trip"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency=0.002):
+        super().__init__(('127.0.0.1', 0), _SMTPStandInHandler)
+        self.latency = latency
+        self.connections = 0
+        self.messages = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+def benchmark_smtp(count=200, latency=0.002, workers=8):
+    """Compare a connection per email with pooled sessions against a local SMTP stand-in"""
+    import smtplib
+    from email.mime.text import MIMEText
+    from .smtp_pool import SMTPConnectionPool
+
+    def build(i):
+        msg = MIMEText(f"<p>Alert {i}</p>", 'html')
+        msg['Subject'] = f"Fraud Alert {i}"
+        msg['From'] = 'alerts@example.com'
+        msg['To'] = 'ops@example.com'
+        return msg
+
+    messages = [build(i) for i in range(count)]
+    print(f"SMTP delivery ({count} emails, {latency * 1000:.0f} ms simulated round trip, "
+          f"TLS and AUTH not simulated)")
+
+    def connection_per_email(msg):
+        with smtplib.SMTP('127.0.0.1', server.port) as smtp:
+            smtp.send_message(msg)
+
+    cases = [
+        ("connection per email", connection_per_email, 1),
+        (f"connection per email, {workers} threads", connection_per_email, workers),
+        ("pooled sessions", None, 1),
+        (f"pooled sessions, {workers} threads", None, workers),
+    ]
+    for label, send, threads in cases:
+        server = LocalSMTPServer(latency)
+        pool = None
+        if send is None:
+            pool = SMTPConnectionPool('127.0.0.1', server.port, use_tls=False, max_size=threads,
+                                      max_messages_per_session=count)
+            send = pool.send_message
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(send, messages))
+        seconds = time.perf_counter() - started
+        if pool is not None:
+            pool.close()
+        _report(f"{label} ({server.connections} conns)", seconds, server.messages)
+        server.shutdown()
+        server.server_close()
+
+
+BENCHMARKS = {
+    'serializer': benchmark_serializer,
+    'feature_storage': benchmark_feature_storage,
+    'alert_payload': benchmark_alert_payload,
+    'smtp': benchmark_smtp,
+    'email_render': benchmark_email_render,
+    'alert_codec': benchmark_alert_codec,
+    'dataframe_schema': benchmark_dataframe_schema,
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        BENCHMARKS[name]()
+        print()
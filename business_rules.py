@@ -1,35 +1,67 @@
 """
 Business rules engine for fraud detection
 """
+import numpy as np
 import pandas as pd
-from typing import Dict
-from .config import BUSINESS_RULES
+from typing import Dict, Optional
+from .config import BUSINESS_RULES, ADAPTIVE_AMOUNT_RULES
+from .amount_baselines import AmountBaselineStore, get_shared_store
+from .transaction_context import TransactionContext
+
+# Confidence contributed by each stateless rule
+RULE_WEIGHTS = {
+    'high_amount': 0.2,
+    'suspicious_timing': 0.25,
+    'suspicious_amount': 0.3
+}
+FRAUD_CONFIDENCE_THRESHOLD = 0.5
 
 
 class BusinessRulesEngine:
     """Engine for applying business logic rules for fraud detection"""
     
-    def evaluate_transaction(self, transaction: Dict) -> Dict:
+    def __init__(self, baselines: Optional[AmountBaselineStore] = None,
+                 rules: Optional[Dict] = None):
+        """
+        :param baselines: Amount baselines for the adaptive rule (shared store if enabled)
+        :param rules: Rule set overriding BUSINESS_RULES, e.g. a backtest candidate
+        """
+        if baselines is None and ADAPTIVE_AMOUNT_RULES['enabled']:
+            baselines = get_shared_store(ADAPTIVE_AMOUNT_RULES)
+        self.baselines = baselines
+        self.rules = {**BUSINESS_RULES, **(rules or {})}
+        self.fraud_threshold = self.rules.get('fraud_confidence_threshold', FRAUD_CONFIDENCE_THRESHOLD)
+    
+    def evaluate_transaction(self, transaction: Dict,
+                             context: Optional[TransactionContext] = None) -> Dict:
         """Evaluate transaction against business rules"""
+        if context is None:
+            context = TransactionContext(transaction)
+        
         fraud_indicators = []
         confidence = 0.0
         
         # Rule 1: High amount threshold
-        if self.check_high_amount(transaction):
+        if self.check_high_amount(context):
             fraud_indicators.append("High transaction amount")
-            confidence += 0.2
+            confidence += RULE_WEIGHTS['high_amount']
         
         # Rule 2: Suspicious time patterns
-        if self.check_suspicious_timing(transaction):
+        if self.check_suspicious_timing(context):
             fraud_indicators.append("Suspicious transaction timing")
-            confidence += 0.25
+            confidence += RULE_WEIGHTS['suspicious_timing']
         
         # Rule 3: Suspicious amount patterns
-        if self.check_suspicious_amounts(transaction):
+        if self.check_suspicious_amounts(context):
             fraud_indicators.append("Suspicious amount pattern")
-            confidence += 0.3
+            confidence += RULE_WEIGHTS['suspicious_amount']
+        
+        # Rule 4: Amount unusual for this category or merchant
+        if self.baselines is not None and self.check_adaptive_amount(context):
+            fraud_indicators.append("Amount unusual for merchant or category")
+            confidence += ADAPTIVE_AMOUNT_RULES['confidence_weight']
         
-        is_fraud = confidence >= 0.5  # Threshold for business rule fraud detection
+        is_fraud = confidence >= self.fraud_threshold  # Threshold for business rule fraud detection
         
         return {
             'is_fraud': is_fraud,
@@ -37,18 +69,63 @@ class BusinessRulesEngine:
             'reasons': fraud_indicators
         }
     
-    def check_high_amount(self, transaction: Dict) -> bool:
+    def evaluate_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate the stateless rules over a DataFrame of transactions at once.
+        The adaptive amount rule depends on arrival order and is not included.
+        
+        :param df: Transactions with at least 'amt' and 'trans_date_trans_time'
+        :return: DataFrame with one boolean column per rule, 'confidence' and 'is_fraud'
+        """
+        amounts = pd.to_numeric(df['amt'], errors='coerce').fillna(0.0)
+        hours = pd.to_datetime(df['trans_date_trans_time'], format='ISO8601', errors='coerce').dt.hour
+        
+        flags = pd.DataFrame({
+            'high_amount': amounts > self.rules['max_amount_threshold'],
+            'suspicious_timing': hours.isin(self.rules['high_risk_hours']),
+            'suspicious_amount': np.trunc(amounts).isin(self.rules['suspicious_amount_patterns'])
+        }, index=df.index)
+        
+        confidence = np.zeros(len(flags))
+        for rule, weight in RULE_WEIGHTS.items():
+            confidence += flags[rule].to_numpy() * weight
+        
+        flags['confidence'] = np.minimum(confidence, 1.0)
+        flags['is_fraud'] = flags['confidence'] >= self.fraud_threshold
+        return flags
+    
+    def check_high_amount(self, context: TransactionContext) -> bool:
         """Check if transaction amount exceeds threshold"""
-        amount = float(transaction.get('amt', 0))
-        return amount > BUSINESS_RULES['max_amount_threshold']
+        return context.amount > self.rules['max_amount_threshold']
     
-    def check_suspicious_timing(self, transaction: Dict) -> bool:
+    def check_suspicious_timing(self, context: TransactionContext) -> bool:
         """Check if transaction occurs during high-risk hours"""
-        trans_time = pd.to_datetime(transaction['trans_date_trans_time'])
-        hour = trans_time.hour
-        return hour in BUSINESS_RULES['high_risk_hours']
+        return context.hour in self.rules['high_risk_hours']
     
-    def check_suspicious_amounts(self, transaction: Dict) -> bool:
+    def check_suspicious_amounts(self, context: TransactionContext) -> bool:
         """Check for suspicious amount patterns"""
-        amount = int(transaction.get('amt', 0))
-        return amount in BUSINESS_RULES['suspicious_amount_patterns']
+        return context.whole_amount in self.rules['suspicious_amount_patterns']
+    
+    def check_adaptive_amount(self, context: TransactionContext) -> bool:
+        """Check amount against running category and merchant baselines"""
+        amount = context.amount
+        keys = (
+            f"category:{context.transaction.get('category')}",
+            f"merchant:{context.transaction.get('merchant')}"
+        )
+        
+        is_outlier = any(
+            self.baselines.is_outlier(
+                key, amount,
+                z_threshold=ADAPTIVE_AMOUNT_RULES['z_score_threshold'],
+                percentile=ADAPTIVE_AMOUNT_RULES['percentile'],
+                min_samples=ADAPTIVE_AMOUNT_RULES['min_samples']
+            )
+            for key in keys
+        )
+        
+        # Score against the baseline before folding this amount into it
+        for key in keys:
+            self.baselines.observe(key, amount)
+        
+        return is_outlier
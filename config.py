@@ -30,7 +30,150 @@ DASHBOARD_CONFIG = {
     'default_results_limit': 100,
     'default_alerts_limit': 100,
     'recent_alerts_display': 4,
-    'max_alerts_display': 8
+    'max_alerts_display': 8,
+    'use_recent_index': os.environ.get('DASHBOARD_RECENT_INDEX', 'true').lower() == 'true',
+    'incremental_refresh': os.environ.get('DASHBOARD_INCREMENTAL_REFRESH', 'true').lower() == 'true',
+    'incremental_overlap_seconds': 10,
+    'full_reload_interval': 300,
+    'table_load_timeout': float(os.environ.get('DASHBOARD_TABLE_TIMEOUT', '10'))
+}
+
+# Adaptive amount rule (per-category / per-merchant baselines)
+ADAPTIVE_AMOUNT_RULES = {
+    'enabled': os.environ.get('ADAPTIVE_AMOUNT_RULES', 'false').lower() == 'true',
+    'z_score_threshold': 4.0,
+    'percentile': 0.995,
+    'min_samples': 30,
+    'confidence_weight': 0.2,
+    'state_path': os.environ.get('AMOUNT_BASELINES_PATH', '/tmp/amount_baselines.bin'),
+    'persist_every': 500,
+    'persist_interval_seconds': 60
+}
+
+# Time-bucketed recent index: index partitions per UTC day (writers and readers must agree)
+TIME_INDEX_CONFIG = {
+    'shards': int(os.environ.get('TIME_INDEX_SHARDS', '4'))
+}
+
+# Buffered DynamoDB writes (BatchWriteItem)
+BATCH_WRITE_CONFIG = {
+    'enabled': os.environ.get('BATCH_WRITES', 'true').lower() == 'true',
+    'flush_size': 25,
+    'max_latency_seconds': 2.0,
+    'max_retries': 6,
+    'base_backoff_seconds': 0.05,
+    'max_backoff_seconds': 2.0
+}
+
+# Buffered SQS alert publishing (SendMessageBatch)
+SQS_BATCH_CONFIG = {
+    'enabled': os.environ.get('SQS_BATCH', 'true').lower() == 'true',
+    'max_latency_seconds': 2.0,
+    'max_retries': 5,
+    'base_backoff_seconds': 0.05,
+    'max_backoff_seconds': 2.0
+}
+
+# Alert lambda batch processing
+ALERT_PROCESSING_CONFIG = {
+    'notification_workers': int(os.environ.get('NOTIFICATION_WORKERS', '8'))
+}
+
+# Asynchronous notification dispatch. Undelivered notifications fail their SQS messages,
+# which are redelivered; dead letters are kept in spill_dir. Set spill_pending only if
+# spill_dir is durable (e.g. EFS): unsent notifications are then parked there instead.
+NOTIFICATION_CONFIG = {
+    'enabled': os.environ.get('NOTIFICATION_DISPATCHER', 'true').lower() == 'true',
+    'workers': ALERT_PROCESSING_CONFIG['notification_workers'],
+    'max_queue': 1000,
+    'max_retries': int(os.environ.get('NOTIFICATION_MAX_RETRIES', '3')),
+    'base_backoff_seconds': 0.5,
+    'max_backoff_seconds': 10.0,
+    'spill_dir': os.environ.get('NOTIFICATION_SPILL_DIR', '/tmp/notifications'),
+    'spill_pending': os.environ.get('NOTIFICATION_SPILL_PENDING', 'false').lower() == 'true',
+    'wait_timeout_seconds': float(os.environ.get('NOTIFICATION_WAIT_TIMEOUT', '30')),
+    'webhook_url': os.environ.get('NOTIFICATION_WEBHOOK_URL', '')
+}
+
+# Severity lanes: optional queue per severity (others fall back to ALERT_QUEUE_URL);
+# immediate severities skip the SendMessageBatch buffer
+ALERT_LANES_CONFIG = {
+    'queue_urls': {
+        severity: os.environ.get(f'ALERT_QUEUE_URL_{severity}', '')
+        for severity in ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+    },
+    'immediate_severities': [
+        severity for severity in os.environ.get('ALERT_IMMEDIATE_SEVERITIES', 'CRITICAL').split(',') if severity
+    ]
+}
+
+# Alert SQS bodies: zlib compression and claim-check ('local' or 's3') for oversized alerts.
+# Consumers decode every form, so enable these only after the alert processor is updated.
+ALERT_CODEC_CONFIG = {
+    'compression': os.environ.get('ALERT_COMPRESSION', 'false').lower() == 'true',
+    'compression_min_bytes': 512,
+    'compression_level': 6,
+    'claim_check': os.environ.get('ALERT_CLAIM_CHECK', ''),
+    'claim_check_threshold_bytes': int(os.environ.get('ALERT_CLAIM_CHECK_THRESHOLD', str(200 * 1024))),
+    'claim_check_path': os.environ.get('CLAIM_CHECK_PATH', '/tmp/claim_checks'),
+    'claim_check_bucket': os.environ.get('CLAIM_CHECK_BUCKET', ''),
+    'claim_check_prefix': os.environ.get('CLAIM_CHECK_PREFIX', 'alerts/')
+}
+
+# Alert email digests: one email per severity and SQS batch instead of one per alert.
+# Digests are sent before the batch is acknowledged (their SQS messages are deleted
+# with it), so a digest groups at most one batch: tune how much it coalesces with the
+# event source's BatchSize and MaximumBatchingWindowInSeconds.
+DIGEST_CONFIG = {
+    'enabled': os.environ.get('ALERT_DIGEST', 'false').lower() == 'true',
+    'max_alerts_per_digest': 100,
+    'bypass_severities': [
+        severity for severity in os.environ.get('ALERT_DIGEST_BYPASS', 'CRITICAL').split(',') if severity
+    ]
+}
+
+# Per card/merchant alert deduplication: at most `burst` alerts per key per window;
+# a more severe alert than the last one sent for the key always goes through
+ALERT_DEDUP_CONFIG = {
+    'enabled': os.environ.get('ALERT_DEDUP', 'false').lower() == 'true',
+    'window_seconds': float(os.environ.get('ALERT_DEDUP_WINDOW', '300')),
+    'burst': int(os.environ.get('ALERT_DEDUP_BURST', '1')),
+    'max_keys': 100000
+}
+
+# Pooled SMTP sessions for alert emails
+SMTP_POOL_CONFIG = {
+    'enabled': os.environ.get('SMTP_POOL', 'true').lower() == 'true',
+    'use_tls': os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true',
+    'max_size': ALERT_PROCESSING_CONFIG['notification_workers'],
+    'max_idle_seconds': 60.0,
+    'max_messages_per_session': 100
+}
+
+# Feature vector storage in detection items ('text' or 'binary')
+FEATURE_STORAGE = {
+    'encoding': os.environ.get('FEATURE_ENCODING', 'text'),
+    'dtype': os.environ.get('FEATURE_DTYPE', 'f')
+}
+
+# Storage backend ('dynamodb' or 'sqlite' for running offline)
+STORAGE_CONFIG = {
+    'backend': os.environ.get('STORAGE_BACKEND', 'dynamodb'),
+    'sqlite_path': os.environ.get('LOCAL_STORE_PATH', 'fraud_detection.db')
+}
+
+# Transaction data in alerts: 'full' (whole transaction) or 'reference' (id + summary).
+# Consumers read both shapes; switch to 'reference' only after they are updated.
+ALERT_PAYLOAD_CONFIG = {
+    'mode': os.environ.get('ALERT_PAYLOAD_MODE', 'full'),
+    'transaction_cache_size': 5000
+}
+
+# Parquet archive read by the analytics tab (disabled when no path is set)
+ARCHIVE_CONFIG = {
+    'path': os.environ.get('ARCHIVE_PATH', ''),
+    'analytics_days': 90,
+    'cache_ttl': 300
 }
 
 # Color Schemes
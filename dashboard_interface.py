@@ -41,22 +41,32 @@ def render_header():
     st.markdown("Real-time monitoring of transaction fraud detection")
 
 
-def render_tabs(dataframes):
+def render_table_error(table_errors, name):
+    """Warn that a tab shows the last data loaded because its table failed to refresh"""
+    if table_errors and name in table_errors:
+        st.warning(f"Showing the last loaded {name}: refresh failed ({table_errors[name]})")
+
+
+def render_tabs(dataframes, analytics_dataframes=None, transaction_lookup=None, table_errors=None):
     """Render main content tabs"""
+    analytics_dataframes = analytics_dataframes or dataframes
     tab_labels = [f"{tab['icon']} {tab['title']}" for tab in TAB_CONFIG]
     tab1, tab2, tab3, tab4 = st.tabs(tab_labels)
     
     with tab1:
+        render_table_error(table_errors, 'transactions')
         render_transactions_tab(dataframes['df_transactions'])
     
     with tab2:
+        render_table_error(table_errors, 'results')
         render_detection_results_tab(dataframes['df_results'])
     
     with tab3:
-        render_alerts_details_tab(dataframes['df_alerts'])
+        render_table_error(table_errors, 'alerts')
+        render_alerts_details_tab(dataframes['df_alerts'], transaction_lookup)
     
     with tab4:
-        render_analytics_tab(dataframes['df_transactions'], dataframes['df_alerts'])
+        render_analytics_tab(analytics_dataframes['df_transactions'], analytics_dataframes['df_alerts'])
 
 
 def main():
@@ -78,6 +88,7 @@ def main():
         data_service = DataService()
         dataframes = data_service.get_dataframes()
         metrics = data_service.get_key_metrics(dataframes)
+        analytics_dataframes = data_service.get_analytics_dataframes(dataframes)
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         st.stop()
@@ -85,8 +96,11 @@ def main():
     # Render main content
     render_key_metrics(metrics)
     render_alerts_section(dataframes['df_alerts'])
-    render_tabs(dataframes)
-    render_footer(dataframes, controls)
+    render_tabs(dataframes, analytics_dataframes, data_service.get_transactions, data_service.hub.table_errors)
+    render_footer(
+        dataframes, controls, data_service.hub.staleness(), data_service.hub.refreshed_at,
+        data_service.hub.table_load_seconds
+    )
 
 
 if __name__ == "__main__":
@@ -3,9 +3,11 @@ Data storage handler for alerting system
 """
 import boto3
 import logging
-from decimal import Decimal
-from typing import Dict
-from .config import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, ALERTS_TABLE
+from typing import Dict, List
+from .config import AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, ALERTS_TABLE, BATCH_WRITE_CONFIG
+from .batch_writer import BatchWriteError, BufferedBatchWriter
+from .dynamo_serializer import to_dynamo, from_wire_item
+from .time_index import with_index_attributes
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,14 @@ dynamodb = boto3.resource(
     aws_secret_access_key=AWS_SECRET_ACCESS_KEY
 )
 
+# Plain client for wire-format batch writes
+dynamodb_client = boto3.client(
+    'dynamodb',
+    region_name=AWS_REGION,
+    aws_access_key_id=AWS_ACCESS_KEY_ID,
+    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+)
+
 # DynamoDB table for storing alerts
 alerts_table = dynamodb.Table(ALERTS_TABLE)
 
@@ -28,24 +38,54 @@ class AlertDataHandler:
         """Store alert in DynamoDB"""
         try:
             # Convert floats to Decimal for DynamoDB compatibility
-            alert_data_for_dynamodb = self.convert_floats(alert_data)
+            alert_data_for_dynamodb = self.convert_floats(with_index_attributes(alert_data))
             alerts_table.put_item(Item=alert_data_for_dynamodb)
             logger.info(f"Alert stored in DynamoDB: {alert_data['alertID']}")
         except Exception as e:
             logger.error(f"Error storing alert in DynamoDB: {str(e)}")
             raise
     
+    def store_alerts(self, alerts: List[Dict]) -> List[str]:
+        """
+        Store several alerts with BatchWriteItem.
+        
+        :return: alertIDs that could not be encoded or written
+        """
+        writer = BufferedBatchWriter(
+            dynamodb_client,
+            key_attributes={ALERTS_TABLE: ('alertID',)},
+            max_latency_seconds=float('inf'),
+            max_retries=BATCH_WRITE_CONFIG['max_retries'],
+            base_backoff_seconds=BATCH_WRITE_CONFIG['base_backoff_seconds'],
+            max_backoff_seconds=BATCH_WRITE_CONFIG['max_backoff_seconds']
+        )
+        failed = []
+        for alert in alerts:
+            try:
+                writer.put(ALERTS_TABLE, with_index_attributes(alert))
+            except (TypeError, ValueError) as e:
+                # Only this alert's message fails; the rest of the batch is still written
+                logger.error(f"Alert {alert['alertID']} can't be stored in DynamoDB: {str(e)}")
+                failed.append(str(alert['alertID']))
+        try:
+            writer.flush()
+        except BatchWriteError as e:
+            failed.extend(
+                str(from_wire_item(request['PutRequest']['Item'])['alertID'])
+                for request in e.unprocessed.get(ALERTS_TABLE, [])
+            )
+        
+        if failed:
+            logger.error(f"Error storing {len(failed)} of {len(alerts)} alerts in DynamoDB")
+        else:
+            logger.info(f"Stored {len(alerts)} alerts in DynamoDB")
+        return failed
+    
     def convert_floats(self, obj):
         """
-        Recursively convert float values to Decimal for DynamoDB compatibility.
+        Convert float values to Decimal for DynamoDB compatibility.
         
         :param obj: Object to convert (can be dict, list, or primitive)
         :return: Object with floats converted to Decimal
         """
-        if isinstance(obj, float):
-            return Decimal(str(obj))
-        elif isinstance(obj, dict):
-            return {k: self.convert_floats(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self.convert_floats(i) for i in obj]
-        return obj
+        return to_dynamo(obj)
@@ -3,15 +3,21 @@ Data processor for DynamoDB operations
 """
 import boto3
 import logging
-from decimal import Decimal
-from datetime import datetime
 from typing import Dict
-from .config import TRANSACTIONS_TABLE, DETECTION_RESULTS_TABLE, DETECTION_TABLE
+from .config import (
+    TRANSACTIONS_TABLE, DETECTION_RESULTS_TABLE, DETECTION_TABLE, BATCH_WRITE_CONFIG, FEATURE_STORAGE
+)
+from .batch_writer import BufferedBatchWriter
+from .dynamo_serializer import to_dynamo
+from .feature_codec import encode_features
+from .time_index import index_attributes, with_index_attributes
 
 logger = logging.getLogger(__name__)
 
-# AWS client
+# AWS clients
 dynamodb = boto3.resource('dynamodb')
+# Plain client for wire-format batch writes; the resource's meta.client would serialize items again
+dynamodb_client = boto3.client('dynamodb')
 
 # DynamoDB tables
 transactions_table = dynamodb.Table(TRANSACTIONS_TABLE)
@@ -22,11 +28,44 @@ detection_table = dynamodb.Table(DETECTION_TABLE)
 class DataProcessor:
     """Handles data storage operations"""
     
+    def __init__(self, buffered: bool = BATCH_WRITE_CONFIG['enabled']):
+        """
+        :param buffered: Collect writes for all tables and send them with
+                         BatchWriteItem; call flush() before the invocation ends
+        """
+        self.writer = None
+        if buffered:
+            self.writer = BufferedBatchWriter(
+                dynamodb_client,
+                key_attributes={
+                    TRANSACTIONS_TABLE: ('transactionID',),
+                    DETECTION_RESULTS_TABLE: ('transactionID',),
+                    DETECTION_TABLE: ('transactionID',)
+                },
+                flush_size=BATCH_WRITE_CONFIG['flush_size'],
+                max_latency_seconds=BATCH_WRITE_CONFIG['max_latency_seconds'],
+                max_retries=BATCH_WRITE_CONFIG['max_retries'],
+                base_backoff_seconds=BATCH_WRITE_CONFIG['base_backoff_seconds'],
+                max_backoff_seconds=BATCH_WRITE_CONFIG['max_backoff_seconds']
+            )
+    
+    def _put_item(self, table, item: Dict) -> None:
+        """Write an item directly or through the batch writer"""
+        if self.writer is not None:
+            # Serialized straight to the wire format by the writer
+            self.writer.put(table.name, item)
+        else:
+            table.put_item(Item=self.convert_floats_to_decimal(item))
+    
+    def flush(self) -> None:
+        """Write any buffered items"""
+        if self.writer is not None:
+            self.writer.flush()
+    
     def store_transaction(self, transaction: Dict) -> None:
         """Store transaction in DynamoDB"""
         try:
-            transaction_to_store = self.convert_floats_to_decimal(transaction)
-            transactions_table.put_item(Item=transaction_to_store)
+            self._put_item(transactions_table, with_index_attributes(transaction))
             logger.info(f"Stored transaction: {transaction['transactionID']}")
         except Exception as e:
             logger.error(f"Error storing transaction: {str(e)}")
@@ -38,11 +77,11 @@ class DataProcessor:
         try:
             item = {
                 'transactionID': transaction_id,
-                'prediction': self.convert_floats_to_decimal(prediction),
-                'csv_data': processed_data,
-                'timestamp': datetime.now().isoformat()
+                'prediction': prediction,
+                'csv_data': self.encode_feature_vector(processed_data),
+                **index_attributes()
             }
-            detection_results_table.put_item(Item=item)
+            self._put_item(detection_results_table, item)
             logger.info(f"Stored detection result for: {transaction_id}")
         except Exception as e:
             logger.error(f"Error storing detection result: {str(e)}")
@@ -63,22 +102,26 @@ class DataProcessor:
             item = {
                 'transactionID': transaction_id,
                 'is_fraud': is_fraud,
-                'confidence': Decimal(str(confidence)),
-                'details': self.convert_floats_to_decimal(details),
-                'timestamp': datetime.now().isoformat()
+                'confidence': confidence,
+                'details': self.encode_feature_vector(details),
+                **index_attributes()
             }
-            detection_table.put_item(Item=item)
+            self._put_item(detection_table, item)
             logger.info(f"Stored detection for: {transaction_id}")
         except Exception as e:
             logger.error(f"Error storing detection: {str(e)}")
             raise
     
+    def encode_feature_vector(self, value):
+        """Pack a comma-joined feature vector when binary storage is enabled"""
+        if FEATURE_STORAGE['encoding'] != 'binary' or not isinstance(value, str):
+            return value
+        try:
+            return encode_features(value, FEATURE_STORAGE['dtype'])
+        except (ValueError, OverflowError):
+            # Not a numeric feature vector; keep the text as-is
+            return value
+    
     def convert_floats_to_decimal(self, obj):
         """Convert floats to Decimal for DynamoDB storage"""
-        if isinstance(obj, float):
-            return Decimal(str(obj))
-        elif isinstance(obj, dict):
-            return {k: self.convert_floats_to_decimal(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self.convert_floats_to_decimal(i) for i in obj]
-        return obj
+        return to_dynamo(obj)
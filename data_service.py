@@ -5,17 +5,165 @@ import streamlit as st
 import pandas as pd
 import sys
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import ClientError
 
 # Add backend path
 sys.path.insert(0, 'C:\\Users\\ADMIN\\Desktop\\AWS_architecture\\src\\')
 
 from backend.dynamo.database_operations import AnomalyTransactions
-from config import AWS_CONFIG, DASHBOARD_CONFIG
+from backend.dynamo.local_store import LocalAnomalyTransactions
+from frame_schema import apply_schema, build_frame, to_float64
+from config import AWS_CONFIG, DASHBOARD_CONFIG, STORAGE_CONFIG, ARCHIVE_CONFIG, ALERT_PAYLOAD_CONFIG
+
+
+# Per-table loaders: key column, limit setting and AnomalyTransactions methods
+TABLE_SOURCES = {
+    'transactions': {
+        'key': 'transactionID',
+        'limit': 'default_transaction_limit',
+        'recent': 'recent_transactions',
+        'list': 'list_transactions'
+    },
+    'results': {
+        'key': 'transactionID',
+        'limit': 'default_results_limit',
+        'recent': 'recent_results',
+        'list': 'list_results'
+    },
+    'alerts': {
+        'key': 'alertID',
+        'limit': 'default_alerts_limit',
+        'recent': 'recent_alerts',
+        'list': 'list_alerts'
+    }
+}
+
+
+class TableCache:
+    """Cached rows of one table and the high-water mark of what has been loaded"""
+    
+    def __init__(self, table):
+        self.table = table
+        self.frame = pd.DataFrame()
+        self.high_water_mark = None
+        self.last_full_reload = None
+        self.incremental = False
+    
+    def replace(self, items, indexed):
+        """Replace the cached rows with a full reload"""
+        self.frame = build_frame(items, self.table)
+        self.incremental = indexed
+        self.last_full_reload = datetime.now()
+        self._update_high_water_mark()
+    
+    def merge(self, items, key, retention):
+        """Append new or changed rows, keeping the newest ``retention`` rows"""
+        if not items:
+            return
+        frame = pd.concat([build_frame(items, self.table), self.frame], ignore_index=True)
+        if key in frame.columns:
+            frame = frame.drop_duplicates(subset=[key], keep='first')
+        if 'timestamp' in frame.columns:
+            frame = frame.sort_values('timestamp', ascending=False, kind='stable')
+        # Categories of the two parts differ, so concat falls back to object columns
+        self.frame = apply_schema(frame.head(retention).reset_index(drop=True), self.table)
+        self._update_high_water_mark()
+    
+    def _update_high_water_mark(self):
+        """Track the newest timestamp seen, as an ISO string"""
+        newest = self.frame['timestamp'].max() if 'timestamp' in self.frame.columns else None
+        if newest is not None and not pd.isna(newest):
+            self.high_water_mark = newest.isoformat()
+        else:
+            self.high_water_mark = None
+            self.incremental = False
+
+
+class DataHub:
+    """Dashboard DataFrames shared by every session
+
+    At most one refresh runs at a time and only once the snapshot is older
+    than ``min_refresh_interval``, so the tables are read once per interval
+    however many sessions are open. While a refresh runs, other sessions
+    keep serving the previous snapshot instead of waiting.
+    """
+    
+    def __init__(self, min_refresh_interval):
+        self.min_refresh_interval = timedelta(seconds=min_refresh_interval)
+        self.table_caches = {}
+        self.dataframes = None
+        self.refreshed_at = None
+        # Table name -> time of its last successful load, its load time and last error
+        self.table_refreshed_at = {}
+        self.table_load_seconds = {}
+        self.table_errors = {}
+        # Table loads still running, e.g. after a timeout; the next refresh waits on them again
+        self.inflight = {}
+        self._lock = threading.Lock()
+    
+    def is_fresh(self):
+        return self.refreshed_at is not None and datetime.now() - self.refreshed_at < self.min_refresh_interval
+    
+    def get_dataframes(self, load):
+        """
+        Current snapshot, calling ``load()`` to rebuild it when it has expired.
+        Only one caller runs ``load``; the rest reuse the snapshot.
+        """
+        if self.is_fresh():
+            return self.dataframes
+        if not self._lock.acquire(blocking=self.dataframes is None):
+            return self.dataframes
+        try:
+            if not self.is_fresh():
+                self.dataframes = load()
+                self.refreshed_at = datetime.now()
+            return self.dataframes
+        finally:
+            self._lock.release()
+    
+    def mark_refreshed(self, name, seconds=None):
+        self.table_refreshed_at[name] = datetime.now()
+        if seconds is not None:
+            self.table_load_seconds[name] = seconds
+        self.table_errors.pop(name, None)
+    
+    def staleness(self):
+        """Seconds since each table was last loaded (None if it never was)"""
+        now = datetime.now()
+        return {
+            name: (now - self.table_refreshed_at[name]).total_seconds() if name in self.table_refreshed_at else None
+            for name in TABLE_SOURCES
+        }
+
+
+@st.cache_resource
+def get_data_hub():
+    """Data hub shared by every session"""
+    return DataHub(DASHBOARD_CONFIG['min_refresh_interval'])
+
+
+@st.cache_resource
+def get_table_executor():
+    """Threads that load the tables concurrently"""
+    return ThreadPoolExecutor(max_workers=2 * len(TABLE_SOURCES), thread_name_prefix='table-load')
+
+
+def _timed(load, name):
+    started = time.perf_counter()
+    result = load(name)
+    return result, time.perf_counter() - started
 
 
 @st.cache_resource
 def init_dynamodb():
-    """Initialize DynamoDB connection"""
+    """Initialize DynamoDB connection (or the local database when configured)"""
+    if STORAGE_CONFIG['backend'] == 'sqlite':
+        return LocalAnomalyTransactions(STORAGE_CONFIG['sqlite_path'])
     return AnomalyTransactions(
         region_name=AWS_CONFIG['region_name'],
         aws_access_key_id=AWS_CONFIG['aws_access_key_id'],
@@ -23,11 +171,76 @@ def init_dynamodb():
     )
 
 
+class TransactionCache:
+    """Bounded LRU cache of transactions; stored transactions never change"""
+    
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_many(self, keys):
+        """Cached transactions for the given keys"""
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._items:
+                    self._items.move_to_end(key)
+                    found[key] = self._items[key]
+            return found
+    
+    def put_many(self, items):
+        """Add transactions, evicting the least recently used"""
+        with self._lock:
+            self._items.update(items)
+            for key in items:
+                self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+@st.cache_resource
+def get_transaction_cache():
+    """Transaction cache shared by every session"""
+    return TransactionCache(ALERT_PAYLOAD_CONFIG['transaction_cache_size'])
+
+
+# Columns the analytics tab reads from the archive
+ANALYTICS_COLUMNS = {
+    'transactions': ['transactionID', 'is_fraud', 'category', 'amt'],
+    'alerts': ['alertID', 'fraud_score', 'severity', 'timestamp']
+}
+
+
+@st.cache_data(ttl=ARCHIVE_CONFIG['cache_ttl'])
+def load_archive_frames(path, days):
+    """Load the analytics columns of the last ``days`` date partitions of the archive"""
+    from backend.dynamo.parquet_archive import read_archive
+    
+    # Archive partitions are UTC dates
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d')
+    return {
+        'df_transactions': apply_schema(
+            read_archive(path, 'transactions', ANALYTICS_COLUMNS['transactions'], since=since), 'transactions'
+        ),
+        'df_alerts': apply_schema(read_archive(path, 'alerts', ANALYTICS_COLUMNS['alerts'], since=since), 'alerts')
+    }
+
+
 class DataService:
     """Service for managing dashboard data"""
     
-    def __init__(self):
+    def __init__(self, table_caches=None, hub=None):
+        """
+        :param table_caches: Dict of TableCache per table kept between refreshes
+                             (defaults to the shared hub's caches)
+        :param hub: DataHub whose snapshot is served (defaults to the process-wide one)
+        """
         self.db = None
+        self.hub = hub if hub is not None else get_data_hub()
+        if table_caches is None:
+            table_caches = self.hub.table_caches
+        self.table_caches = table_caches
         self._initialize_db()
     
     def _initialize_db(self):
@@ -39,40 +252,155 @@ class DataService:
             st.error(f"Error initializing database: {str(e)}")
             raise e
     
-    def load_all_data(self):
-        """Load all data from DynamoDB tables"""
-        try:
-            transactions = self.db.list_transactions(
-                limit=DASHBOARD_CONFIG['default_transaction_limit']
-            )
-            results = self.db.list_results(
-                limit=DASHBOARD_CONFIG['default_results_limit']
-            )
-            alerts = self.db.list_alerts(
-                limit=DASHBOARD_CONFIG['default_alerts_limit']
+    def _load_table(self, name):
+        """
+        Load the newest items of a table through the time index, falling back to a scan.
+        
+        :return: Tuple of (items, whether the time index was used)
+        """
+        source = TABLE_SOURCES[name]
+        limit = DASHBOARD_CONFIG[source['limit']]
+        if DASHBOARD_CONFIG['use_recent_index']:
+            try:
+                return getattr(self.db, source['recent'])(limit), True
+            except ClientError as e:
+                # Index not created yet on this table
+                if e.response['Error']['Code'] != 'ValidationException':
+                    raise
+        return getattr(self.db, source['list'])(limit=limit), False
+    
+    def refresh_table(self, name):
+        """
+        Refresh one table's cached DataFrame.
+        Only items newer than the cached high-water mark are fetched; a full
+        reload happens on first use, when the time index is unavailable, and
+        every ``full_reload_interval`` seconds to pick up any other changes.
+        """
+        cache = self.table_caches.setdefault(name, TableCache(name))
+        source = TABLE_SOURCES[name]
+        limit = DASHBOARD_CONFIG[source['limit']]
+        
+        reload_due = (
+            cache.last_full_reload is None
+            or datetime.now() - cache.last_full_reload
+            >= timedelta(seconds=DASHBOARD_CONFIG['full_reload_interval'])
+        )
+        if reload_due or not cache.incremental:
+            items, indexed = self._load_table(name)
+            cache.replace(items, indexed)
+        else:
+            # Overlap the window slightly so late-visible index entries are not missed
+            since = datetime.fromisoformat(cache.high_water_mark) - timedelta(
+                seconds=DASHBOARD_CONFIG['incremental_overlap_seconds']
             )
-            
-            return {
-                'transactions': transactions,
-                'results': results,
-                'alerts': alerts
-            }
-        except Exception as e:
-            st.error(f"Error loading data: {str(e)}")
-            return {
-                'transactions': [],
-                'results': [],
-                'alerts': []
-            }
+            items = getattr(self.db, source['recent'])(limit, since=since)
+            cache.merge(items, source['key'], limit)
+        
+        return cache.frame
+    
+    def load_tables(self, kind, load):
+        """
+        Run ``load(name)`` for every table concurrently, waiting at most
+        ``table_load_timeout`` seconds. A load that times out keeps running
+        and its result is used by the next refresh instead of starting another.
+        
+        Errors and timings go to the hub, to be shown by the main script
+        thread (Streamlit calls can't be made from the worker threads).
+        
+        :param kind: Name of the kind of load, so different loads of a table don't share a run
+        :return: Dict of table name -> result for the tables that loaded
+        """
+        executor = get_table_executor()
+        futures = {}
+        for name in TABLE_SOURCES:
+            future = self.hub.inflight.get((kind, name))
+            if future is None:
+                future = self.hub.inflight[(kind, name)] = executor.submit(_timed, load, name)
+            futures[name] = future
+        
+        deadline = time.perf_counter() + DASHBOARD_CONFIG['table_load_timeout']
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name], seconds = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                self.hub.mark_refreshed(name, seconds)
+            except FuturesTimeoutError:
+                self.hub.table_errors[name] = f"timed out after {DASHBOARD_CONFIG['table_load_timeout']:g}s"
+                continue
+            except Exception as e:
+                self.hub.table_errors[name] = str(e)
+            del self.hub.inflight[(kind, name)]
+        return results
+    
+    def load_all_data(self):
+        """Load all data from DynamoDB tables (empty for tables that failed to load)"""
+        items = self.load_tables('full', lambda name: self._load_table(name)[0])
+        return {name: items.get(name, []) for name in TABLE_SOURCES}
     
     def get_dataframes(self):
-        """Get data as pandas DataFrames"""
-        data = self.load_all_data()
+        """Get data as pandas DataFrames from the shared snapshot"""
+        return self.hub.get_dataframes(self.load_dataframes)
+    
+    def load_dataframes(self):
+        """
+        Read the tables and build the DataFrames.
+        A table that fails or times out keeps its previous DataFrame.
+        """
+        previous = self.hub.dataframes or {}
+        if DASHBOARD_CONFIG['incremental_refresh']:
+            frames = self.load_tables('incremental', self.refresh_table)
+            for name in TABLE_SOURCES:
+                if name not in frames and ('incremental', name) not in self.hub.inflight:
+                    # Failed rather than still running: start over with a full reload next time
+                    self.table_caches.pop(name, None)
+        else:
+            data = self.load_all_data()
+            frames = {
+                name: build_frame(data[name], name)
+                for name in TABLE_SOURCES
+                if name not in self.hub.table_errors
+            }
+        
+        return {
+            f'df_{name}': frames[name] if name in frames else previous.get(f'df_{name}', pd.DataFrame())
+            for name in TABLE_SOURCES
+        }
+    
+    def get_transactions(self, transaction_ids):
+        """
+        Look up full transactions (e.g. for reference-mode alerts) through a shared cache.
+        Misses are fetched with one batch_get_transactions call.
         
+        :return: Dict of str(transaction ID) -> transaction
+        """
+        cache = get_transaction_cache()
+        ids_by_key = {str(tid): tid for tid in transaction_ids}
+        found = cache.get_many(ids_by_key)
+        missing = [tid for key, tid in ids_by_key.items() if key not in found]
+        if missing:
+            try:
+                fetched = {
+                    str(item['transactionID']): item
+                    for item in self.db.batch_get_transactions(missing)
+                }
+            except Exception as e:
+                st.warning(f"Could not load transaction details: {str(e)}")
+                fetched = {}
+            cache.put_many(fetched)
+            found.update(fetched)
+        return found
+    
+    def get_analytics_dataframes(self, dataframes):
+        """Analytics inputs from the Parquet archive, or the live tables when it is unavailable"""
+        path = ARCHIVE_CONFIG['path']
+        if path and os.path.isdir(path):
+            try:
+                return load_archive_frames(path, ARCHIVE_CONFIG['analytics_days'])
+            except Exception as e:
+                st.warning(f"Archive unavailable, using live data for analytics: {str(e)}")
         return {
-            'df_transactions': pd.DataFrame(data['transactions']) if data['transactions'] else pd.DataFrame(),
-            'df_results': pd.DataFrame(data['results']) if data['results'] else pd.DataFrame(),
-            'df_alerts': pd.DataFrame(data['alerts']) if data['alerts'] else pd.DataFrame()
+            'df_transactions': dataframes['df_transactions'],
+            'df_alerts': dataframes['df_alerts']
         }
     
     def get_key_metrics(self, dataframes):
@@ -93,7 +421,6 @@ class DataService:
             )
         
         if not df_transactions.empty:
-            from utils import safe_float
-            metrics['total_amount'] = df_transactions['amt'].apply(safe_float).sum()
+            metrics['total_amount'] = float(to_float64(df_transactions['amt']).sum())
         
         return metrics
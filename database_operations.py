@@ -1,10 +1,43 @@
-from decimal import Decimal
 import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import boto3
 from botocore.exceptions import ClientError
+from .dynamo_serializer import to_dynamo, to_wire_item, from_wire_item
+from .time_index import (
+    INDEX_NAME, BUCKET_ATTRIBUTE, SORT_ATTRIBUTE, day_buckets, recent_buckets, to_datetime, utc_now,
+    with_index_attributes
+)
 
 logger = logging.getLogger(__name__)
 
+# DynamoDB limit for a single BatchGetItem request
+BATCH_GET_LIMIT = 100
+
+
+class BatchGetError(Exception):
+    """Raised when keys are still unprocessed after all retries"""
+
+    def __init__(self, message, unprocessed_keys):
+        super().__init__(message)
+        self.unprocessed_keys = unprocessed_keys
+
+
+class ScanPage(list):
+    """A page of items that also carries the cursor for the next page.
+    
+    ``cursor`` is the LastEvaluatedKey of the scan, or None when the table
+    has been read to the end. Pass it back to continue where this page ended.
+    """
+
+    def __init__(self, items=(), cursor=None):
+        super().__init__(items)
+        self.cursor = cursor
+
+
 class AnomalyTransactions:
     """Encapsulates DynamoDB operations for anomaly detection on transactions.
     
@@ -42,6 +75,7 @@ class AnomalyTransactions:
         # Initialize table references
         self.transactions_table = None
         self.results_table = None
+        self.alerts_table = None
     
     def list_tables(self, limit=10):
         """
@@ -109,18 +143,12 @@ class AnomalyTransactions:
     
     def convert_floats(self, obj):
         """
-        Recursively convert float values to Decimal for DynamoDB compatibility.
+        Convert float values to Decimal for DynamoDB compatibility.
         
         :param obj: Object to convert (can be dict, list, or primitive)
         :return: Object with floats converted to Decimal
         """
-        if isinstance(obj, float):
-            return Decimal(str(obj))
-        elif isinstance(obj, dict):
-            return {k: self.convert_floats(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self.convert_floats(i) for i in obj]
-        return obj
+        return to_dynamo(obj)
     
     def store_transaction(self, transaction_data):
         """
@@ -133,7 +161,7 @@ class AnomalyTransactions:
         
         try:
             # Convert all float values to Decimal for DynamoDB
-            transaction_data = self.convert_floats(transaction_data)
+            transaction_data = self.convert_floats(with_index_attributes(transaction_data))
             
             # Store the item in DynamoDB
             self.transactions_table.put_item(
@@ -169,11 +197,11 @@ class AnomalyTransactions:
             
             # Store the item in DynamoDB
             self.results_table.put_item(
-                Item={
+                Item=with_index_attributes({
                     'transactionID': transaction_id,  # Primary key
                     'prediction': prediction_response,
                     'csv_data': csv_row
-                }
+                })
             )
             
             logger.info(f"Stored prediction for transaction {transaction_id} successfully!")
@@ -186,26 +214,145 @@ class AnomalyTransactions:
             )
             raise
     
-    def list_transactions(self, limit=10):
+    def _resolve_table(self, table):
         """
-        List all transactions in the transactions table.
+        Resolve a table alias ('transactions', 'results', 'alerts') to its Table resource.
         
-        :param limit: Maximum number of transactions to return per page
-        :return: List of transaction items
+        :param table: Table alias or Table resource
+        :return: Initialized Table resource
+        """
+        if not isinstance(table, str):
+            return table
+        
+        resolved = {
+            'transactions': self.transactions_table,
+            'results': self.results_table,
+            'alerts': self.alerts_table,
+        }.get(table)
+        if resolved is None:
+            raise ValueError(f"{table.capitalize()} table not initialized. Call initialize_tables() first.")
+        return resolved
+    
+    def scan_pages(self, table, page_size=100, cursor=None, segment=None, total_segments=None):
+        """
+        Scan a table page by page, following LastEvaluatedKey.
+        Only one page is held in memory at a time.
+        
+        :param table: Table alias ('transactions', 'results', 'alerts') or Table resource
+        :param page_size: Maximum number of items per page
+        :param cursor: Cursor from a previous page to resume from
+        :param segment: Segment number for a parallel scan
+        :param total_segments: Total number of segments for a parallel scan
+        :return: Generator of ScanPage objects
+        """
+        table_name = self._resolve_table(table).name
+        request = {'TableName': table_name, 'Limit': page_size}
+        if total_segments:
+            request['Segment'] = segment
+            request['TotalSegments'] = total_segments
+        
+        while True:
+            if cursor:
+                request['ExclusiveStartKey'] = to_wire_item(cursor)
+            
+            # The low-level client is thread-safe, unlike Table resources
+            response = self.dynamodb.scan(**request)
+            last_key = response.get('LastEvaluatedKey')
+            cursor = from_wire_item(last_key) if last_key else None
+            
+            yield ScanPage((from_wire_item(item) for item in response.get('Items', [])), cursor)
+            
+            if cursor is None:
+                return
+    
+    def parallel_scan(self, table, total_segments=4, page_size=100, max_buffered_pages=8):
+        """
+        Scan a whole table with Segment/TotalSegments across threads, e.g. for full exports.
+        Pages are handed over through a bounded queue, so at most
+        ``max_buffered_pages`` pages are held in memory at once.
+        
+        :param table: Table alias ('transactions', 'results', 'alerts') or Table resource
+        :param total_segments: Number of segments scanned concurrently
+        :param page_size: Maximum number of items per page
+        :param max_buffered_pages: Pages buffered between the scanners and the consumer
+        :return: Generator of items (order is not defined)
+        """
+        table = self._resolve_table(table)
+        pages = queue.Queue(maxsize=max_buffered_pages)
+        stop = threading.Event()
+        finished = object()
+        
+        def scan_segment(segment):
+            try:
+                for page in self.scan_pages(table, page_size, segment=segment,
+                                            total_segments=total_segments):
+                    while not stop.is_set():
+                        try:
+                            pages.put(page, timeout=0.5)
+                            break
+                        except queue.Full:
+                            continue
+                    if stop.is_set():
+                        return
+            except Exception as e:
+                pages.put(e)
+            finally:
+                pages.put(finished)
+        
+        workers = [
+            threading.Thread(target=scan_segment, args=(segment,), daemon=True)
+            for segment in range(total_segments)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        try:
+            remaining = total_segments
+            while remaining:
+                page = pages.get()
+                if page is finished:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            # Unblock scanners if the consumer stops early
+            stop.set()
+            while any(worker.is_alive() for worker in workers):
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+    
+    def _list_items(self, table, limit, cursor):
+        """
+        Collect up to ``limit`` items, following LastEvaluatedKey across pages.
+        
+        :return: ScanPage with the cursor to continue from
+        """
+        items = ScanPage(cursor=cursor)
+        while len(items) < limit:
+            page = next(self.scan_pages(table, page_size=limit - len(items), cursor=items.cursor))
+            items.extend(page)
+            items.cursor = page.cursor
+            if page.cursor is None:
+                break
+        return items
+    
+    def list_transactions(self, limit=10, cursor=None):
+        """
+        List transactions in the transactions table.
+        
+        :param limit: Maximum number of transactions to return
+        :param cursor: Cursor from a previous call to continue from
+        :return: ScanPage (list) of transaction items with a ``cursor`` for the next page
         """
         if not self.transactions_table:
             raise ValueError("Transactions table not initialized. Call initialize_tables() first.")
         
         try:
-            paginator = self.transactions_table.scan(
-                Limit=limit
-            )
-            transactions = []
-            
-            for page in paginator['Items']:
-                transactions.append(page)
-            
-            return transactions
+            return self._list_items(self.transactions_table, limit, cursor)
             
         except ClientError as err:
             logger.error(
@@ -215,26 +362,19 @@ class AnomalyTransactions:
             )
             raise
     
-    def list_results(self, limit=10):
+    def list_results(self, limit=10, cursor=None):
         """
-        List all results in the results table.
+        List results in the results table.
         
-        :param limit: Maximum number of results to return per page
-        :return: List of result items
+        :param limit: Maximum number of results to return
+        :param cursor: Cursor from a previous call to continue from
+        :return: ScanPage (list) of result items with a ``cursor`` for the next page
         """
         if not self.results_table:
             raise ValueError("Results table not initialized. Call initialize_tables() first.")
         
         try:
-            paginator = self.results_table.scan(
-                Limit=limit
-            )
-            results = []
-            
-            for page in paginator['Items']:
-                results.append(page)
-            
-            return results
+            return self._list_items(self.results_table, limit, cursor)
             
         except ClientError as err:
             logger.error(
@@ -244,30 +384,167 @@ class AnomalyTransactions:
             )
             raise
     
-    def list_alerts(self, limit=10):
+    def list_alerts(self, limit=10, cursor=None):
         """
-        List all alerts in the alerts table.
+        List alerts in the alerts table.
         
-        :param limit: Maximum number of alerts to return per page
-        :return: List of alert items
+        :param limit: Maximum number of alerts to return
+        :param cursor: Cursor from a previous call to continue from
+        :return: ScanPage (list) of alert items with a ``cursor`` for the next page
         """
         if not self.alerts_table:
             raise ValueError("Alerts table not initialized. Call initialize_tables() first.")
         
         try:
-            paginator = self.alerts_table.scan(
-                Limit=limit
+            return self._list_items(self.alerts_table, limit, cursor)
+            
+        except ClientError as err:
+            logger.error(
+                "Couldn't list alerts. Here's why: %s: %s",
+                err.response["Error"]["Code"],
+                err.response["Error"]["Message"],
             )
-            alerts = []
+            raise
+    
+    def _query_bucket(self, table_name, bucket, since_value=None, newest_first=True, limit=None):
+        """Pages of one index partition, optionally only items after ``since_value``"""
+        request = {
+            'TableName': table_name,
+            'IndexName': INDEX_NAME,
+            'KeyConditionExpression': '#bucket = :bucket',
+            'ExpressionAttributeNames': {'#bucket': BUCKET_ATTRIBUTE},
+            'ExpressionAttributeValues': {':bucket': {'S': bucket}},
+            'ScanIndexForward': not newest_first
+        }
+        if since_value is not None:
+            request['KeyConditionExpression'] += ' AND #ts > :since'
+            request['ExpressionAttributeNames']['#ts'] = SORT_ATTRIBUTE
+            request['ExpressionAttributeValues'][':since'] = {'S': since_value}
+        if limit is not None:
+            request['Limit'] = limit
+        
+        while True:
+            response = self.dynamodb.query(**request)
+            yield [from_wire_item(item) for item in response.get('Items', [])]
+            if 'LastEvaluatedKey' not in response:
+                return
+            request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def _query_recent(self, table, n, since=None):
+        """
+        Query the time-bucketed index newest first, walking back one day at a time.
+        Each day's shards are read newest first and merged, so this reads O(n * shards)
+        items instead of scanning the table.
+        
+        :param table: Table alias ('transactions', 'results', 'alerts') or Table resource
+        :param n: Maximum number of items to return
+        :param since: Only return items with a timestamp after this datetime or ISO string
+        :return: List of items, newest first
+        """
+        table_name = self._resolve_table(table).name
+        since_value = to_datetime(since).isoformat() if since is not None else None
+        items = []
+        
+        for day in recent_buckets(since):
+            wanted = n - len(items)
+            day_items = []
+            for bucket in day_buckets(day):
+                shard_items = []
+                for page in self._query_bucket(table_name, bucket, since_value, limit=wanted):
+                    shard_items.extend(page)
+                    if len(shard_items) >= wanted:
+                        break
+                day_items.extend(shard_items[:wanted])
+            day_items.sort(key=lambda item: str(item.get(SORT_ATTRIBUTE, '')), reverse=True)
+            items.extend(day_items[:wanted])
             
-            for page in paginator['Items']:
-                alerts.append(page)
+            if len(items) >= n:
+                break
+        
+        return items
+    
+    def query_pages_since(self, table, since, page_size=1000):
+        """
+        Read every item stored after ``since`` through the time-bucketed index,
+        oldest day first, one page at a time (e.g. for incremental exports).
+        Within a day, pages come shard by shard, so items are not globally ordered.
+        
+        :param table: Table alias ('transactions', 'results', 'alerts') or Table resource
+        :param since: Datetime or ISO string; only items with a later timestamp are returned
+        :param page_size: Maximum number of items per page
+        :return: Generator of ScanPage objects
+        """
+        table_name = self._resolve_table(table).name
+        since = to_datetime(since)
+        days = (utc_now().date() - since.date()).days + 1
+        
+        for day in reversed(list(recent_buckets(since, max_buckets=max(days, 1)))):
+            for bucket in day_buckets(day):
+                for page in self._query_bucket(table_name, bucket, since.isoformat(), newest_first=False,
+                                               limit=page_size):
+                    yield ScanPage(page)
+    
+    def recent_transactions(self, n=10, since=None):
+        """
+        Retrieve the most recently stored transactions, newest first.
+        
+        :param n: Maximum number of transactions to return
+        :param since: Only return transactions stored after this time
+        :return: List of transaction items
+        """
+        if not self.transactions_table:
+            raise ValueError("Transactions table not initialized. Call initialize_tables() first.")
+        
+        try:
+            return self._query_recent(self.transactions_table, n, since)
             
-            return alerts
+        except ClientError as err:
+            logger.error(
+                "Couldn't query recent transactions. Here's why: %s: %s",
+                err.response["Error"]["Code"],
+                err.response["Error"]["Message"],
+            )
+            raise
+    
+    def recent_results(self, n=10, since=None):
+        """
+        Retrieve the most recent detection results, newest first.
+        
+        :param n: Maximum number of results to return
+        :param since: Only return results stored after this time
+        :return: List of result items
+        """
+        if not self.results_table:
+            raise ValueError("Results table not initialized. Call initialize_tables() first.")
+        
+        try:
+            return self._query_recent(self.results_table, n, since)
             
         except ClientError as err:
             logger.error(
-                "Couldn't list alerts. Here's why: %s: %s",
+                "Couldn't query recent results. Here's why: %s: %s",
+                err.response["Error"]["Code"],
+                err.response["Error"]["Message"],
+            )
+            raise
+    
+    def recent_alerts(self, n=10, since=None):
+        """
+        Retrieve the most recent alerts, newest first.
+        
+        :param n: Maximum number of alerts to return
+        :param since: Only return alerts stored after this time
+        :return: List of alert items
+        """
+        if not self.alerts_table:
+            raise ValueError("Alerts table not initialized. Call initialize_tables() first.")
+        
+        try:
+            return self._query_recent(self.alerts_table, n, since)
+            
+        except ClientError as err:
+            logger.error(
+                "Couldn't query recent alerts. Here's why: %s: %s",
                 err.response["Error"]["Code"],
                 err.response["Error"]["Message"],
             )
@@ -342,11 +619,11 @@ class AnomalyTransactions:
                     csv_row = self.convert_floats(result['csv_row'])
                     
                     batch.put_item(
-                        Item={
+                        Item=with_index_attributes({
                             'transactionID': transaction_id,
                             'prediction': prediction_response,
                             'csv_data': csv_row
-                        }
+                        })
                     )
             
             logger.info(f"Batch stored {len(results_data)} prediction results successfully!")
@@ -359,26 +636,58 @@ class AnomalyTransactions:
             )
             raise
 
-    def batch_get_transactions(self, transaction_ids):
+    def batch_get_transactions(self, transaction_ids, projection=None, max_workers=4,
+                               max_retries=6, base_backoff=0.05, max_backoff=2.0):
         """
         Retrieve multiple transactions in batch.
         
+        Keys are de-duplicated and split into chunks of 100 (the BatchGetItem
+        limit), chunks are fetched concurrently, and UnprocessedKeys are
+        retried with exponential backoff.
+        
         :param transaction_ids: List of transaction IDs to retrieve
-        :return: List of transaction items
+        :param projection: Optional list of attribute names to return
+        :param max_workers: Maximum number of chunks fetched at once
+        :param max_retries: Retries for unprocessed keys before giving up
+        :return: List of transaction items in request order (missing IDs are skipped)
         """
         if not self.transactions_table:
             raise ValueError("Transactions table not initialized. Call initialize_tables() first.")
         
-        try:
-            keys = [{'transactionID': tid} for tid in transaction_ids]
-            response = self.transactions_table.batch_get_item(
-                RequestItems={
-                    self.transactions_table.name: {
-                        'Keys': keys
-                    }
-                }
+        unique_ids = list(dict.fromkeys(transaction_ids))
+        if not unique_ids:
+            return []
+        
+        request = {'Keys': None}
+        if projection:
+            attributes = list(dict.fromkeys(['transactionID', *projection]))
+            names = {f"#p{i}": attribute for i, attribute in enumerate(attributes)}
+            request['ProjectionExpression'] = ', '.join(names)
+            request['ExpressionAttributeNames'] = names
+        
+        chunks = [
+            [to_wire_item({'transactionID': tid}) for tid in unique_ids[i:i + BATCH_GET_LIMIT]]
+            for i in range(0, len(unique_ids), BATCH_GET_LIMIT)
+        ]
+        
+        def fetch(keys):
+            return self._batch_get_chunk(
+                {**request, 'Keys': keys}, max_retries, base_backoff, max_backoff
             )
-            return response.get('Responses', {}).get(self.transactions_table.name, [])
+        
+        try:
+            if len(chunks) == 1:
+                pages = [fetch(chunks[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+                    pages = list(pool.map(fetch, chunks))
+            
+            items_by_id = {}
+            for page in pages:
+                for item in page:
+                    items_by_id[item['transactionID']] = item
+            
+            return [items_by_id[tid] for tid in transaction_ids if tid in items_by_id]
             
         except ClientError as err:
             logger.error(
@@ -388,6 +697,36 @@ class AnomalyTransactions:
             )
             raise
     
+    def _batch_get_chunk(self, request, max_retries, base_backoff, max_backoff):
+        """
+        Fetch one chunk of up to 100 keys, retrying unprocessed keys.
+        Uses the low-level client, which is safe to share between threads.
+        """
+        table_name = self.transactions_table.name
+        items = []
+        attempt = 0
+        
+        while True:
+            response = self.dynamodb.batch_get_item(RequestItems={table_name: request})
+            items.extend(
+                from_wire_item(item)
+                for item in response.get('Responses', {}).get(table_name, [])
+            )
+            
+            unprocessed = response.get('UnprocessedKeys', {}).get(table_name)
+            if not unprocessed:
+                return items
+            
+            attempt += 1
+            if attempt > max_retries:
+                raise BatchGetError(
+                    f"{len(unprocessed['Keys'])} keys were not retrieved after retries",
+                    unprocessed['Keys']
+                )
+            
+            request = unprocessed
+            time.sleep(random.uniform(0, min(max_backoff, base_backoff * (2 ** attempt))))
+    
     def batch_store_transactions(self, transactions_data):
         """
         Store multiple transactions in batch for better performance.
@@ -401,7 +740,7 @@ class AnomalyTransactions:
             with self.transactions_table.batch_writer() as batch:
                 for transaction in transactions_data:
                     # Convert floats to Decimal
-                    transaction = self.convert_floats(transaction)
+                    transaction = self.convert_floats(with_index_attributes(transaction))
                     
                     batch.put_item(
                         Item=transaction
@@ -0,0 +1,201 @@
+"""
+Shared conversion of Python values to DynamoDB item formats
+"""
+import math
+import numbers
+from decimal import Context, Decimal
+from typing import Any, Dict
+
+# DynamoDB numbers carry up to 38 significant digits
+DYNAMO_CONTEXT = Context(prec=38)
+_create_decimal = DYNAMO_CONTEXT.create_decimal
+
+
+def _float_to_decimal(value: float):
+    """Convert a float to Decimal, mapping NaN and infinities to None"""
+    if math.isfinite(value):
+        return _create_decimal(repr(value))
+    return None
+
+
+def _convert_scalar(value):
+    """Convert a non-container value for the resource (Decimal) format"""
+    value_type = type(value)
+    if value_type is float:
+        return _float_to_decimal(value)
+    if value_type is str or value_type is int or value_type is bool or value is None:
+        return value
+    if isinstance(value, float):
+        return _float_to_decimal(float(value))
+    if isinstance(value, Decimal):
+        return value if value.is_finite() else None
+    if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        # e.g. numpy.float32, which is not a float subclass
+        return _float_to_decimal(float(value))
+    return value
+
+
+def to_dynamo(obj: Any) -> Any:
+    """
+    Convert floats to Decimal for the boto3 resource API.
+    Walks nested dicts, lists and tuples iteratively; NaN and infinities
+    become None because DynamoDB cannot store them.
+
+    :param obj: Object to convert (can be dict, list, or primitive)
+    :return: Object with floats converted to Decimal
+    """
+    obj_type = type(obj)
+    if obj_type is dict:
+        root = {}
+    elif obj_type is list or obj_type is tuple:
+        root = [None] * len(obj)
+    else:
+        return _convert_scalar(obj)
+
+    stack = [(obj, root)]
+    while stack:
+        source, target = stack.pop()
+        entries = source.items() if type(source) is dict else enumerate(source)
+        for key, value in entries:
+            value_type = type(value)
+            if value_type is str or value_type is int or value_type is bool:
+                target[key] = value
+            elif value_type is float:
+                target[key] = _float_to_decimal(value)
+            elif value_type is dict:
+                child = {}
+                target[key] = child
+                stack.append((value, child))
+            elif value_type is list or value_type is tuple:
+                child = [None] * len(value)
+                target[key] = child
+                stack.append((value, child))
+            else:
+                target[key] = _convert_scalar(value)
+    return root
+
+
+def _wire_scalar(value) -> Dict:
+    """Encode a non-container value as a DynamoDB AttributeValue"""
+    value_type = type(value)
+    if value_type is str:
+        return {'S': value}
+    if value_type is float:
+        return {'N': repr(value)} if math.isfinite(value) else {'NULL': True}
+    if value_type is bool:
+        return {'BOOL': value}
+    if value_type is int:
+        return {'N': str(value)}
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, Decimal):
+        return {'N': str(value)} if value.is_finite() else {'NULL': True}
+    if isinstance(value, float):
+        return _wire_scalar(float(value))
+    if isinstance(value, numbers.Integral):
+        return {'N': str(int(value))}
+    if isinstance(value, numbers.Real):
+        return _wire_scalar(float(value))
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if hasattr(value, 'value') and isinstance(value.value, (bytes, bytearray)):
+        # boto3.dynamodb.types.Binary
+        return {'B': bytes(value.value)}
+    if isinstance(value, (set, frozenset)):
+        return _wire_set(value)
+    raise TypeError(f"Unsupported type for DynamoDB: {value_type.__name__}")
+
+
+def _wire_set(values) -> Dict:
+    """Encode a set as SS, NS or BS; DynamoDB cannot store empty sets"""
+    if not values:
+        raise ValueError("DynamoDB cannot store an empty set")
+    if all(isinstance(v, str) for v in values):
+        return {'SS': list(values)}
+    if all(isinstance(v, (bytes, bytearray)) for v in values):
+        return {'BS': [bytes(v) for v in values]}
+    encoded = [_wire_scalar(v) for v in values]
+    if not all('N' in member for member in encoded):
+        # NaN and infinities encode as NULL, which a number set cannot hold
+        raise ValueError("DynamoDB sets must hold only strings, only bytes or only finite numbers")
+    return {'NS': [member['N'] for member in encoded]}
+
+
+def to_wire_item(item: Dict) -> Dict[str, Dict]:
+    """
+    Encode a Python dict straight to the DynamoDB wire format (AttributeValue map)
+    for the low-level client, without building intermediate Decimal objects.
+    Attributes holding an empty set are left out, as DynamoDB rejects them.
+
+    :param item: Item with native Python values
+    :return: Mapping of attribute name to AttributeValue
+    """
+    root = {}
+    stack = [(item, root)]
+    while stack:
+        source, target = stack.pop()
+        is_map = type(source) is dict
+        entries = source.items() if is_map else enumerate(source)
+        for key, value in entries:
+            value_type = type(value)
+            if (value_type is set or value_type is frozenset) and is_map and not value:
+                continue
+            if value_type is dict:
+                child = {}
+                encoded = {'M': child}
+                stack.append((value, child))
+            elif value_type is list or value_type is tuple:
+                child = [None] * len(value)
+                encoded = {'L': child}
+                stack.append((value, child))
+            else:
+                encoded = _wire_scalar(value)
+            target[key] = encoded
+    return root
+
+
+def _from_wire_value(value: Dict):
+    """Decode a scalar or set AttributeValue"""
+    (type_code, raw), = value.items()
+    if type_code == 'S':
+        return raw
+    if type_code == 'N':
+        return _create_decimal(raw)
+    if type_code == 'BOOL':
+        return raw
+    if type_code == 'NULL':
+        return None
+    if type_code == 'B':
+        return raw
+    if type_code == 'SS':
+        return set(raw)
+    if type_code == 'NS':
+        return {_create_decimal(v) for v in raw}
+    if type_code == 'BS':
+        return set(raw)
+    raise TypeError(f"Unsupported DynamoDB type: {type_code}")
+
+
+def from_wire_item(item: Dict[str, Dict]) -> Dict:
+    """
+    Decode a DynamoDB wire-format item into Python values,
+    matching what the boto3 resource API returns (numbers as Decimal).
+    """
+    root = {}
+    stack = [(item, root)]
+    while stack:
+        source, target = stack.pop()
+        entries = source.items() if type(source) is dict else enumerate(source)
+        for key, value in entries:
+            if 'M' in value:
+                child = {}
+                stack.append((value['M'], child))
+            elif 'L' in value:
+                child = [None] * len(value['L'])
+                stack.append((value['L'], child))
+            else:
+                child = _from_wire_value(value)
+            target[key] = child
+    return root
@@ -0,0 +1,266 @@
+"""
+Precompiled HTML templates and cached MIME envelopes for alert emails
+"""
+import base64
+import json
+from functools import lru_cache
+from html import escape
+from string import Formatter
+from typing import Dict, List, Tuple
+
+from .alert_payload import alert_transaction
+
+SEVERITY_COLORS = {
+    'critical': '#8b0000',
+    'high': '#dc3545',
+    'medium': '#ffc107',
+    'low': '#28a745'
+}
+DEFAULT_COLOR = '#6c757d'
+
+
+class Markup(str):
+    """Text that is already HTML and must not be escaped again"""
+
+
+def _compact(literal: str) -> str:
+    """Drop the source indentation from static HTML, keeping spaces next to placeholders"""
+    lines = literal.split('\n')
+    lines = [lines[0]] + [line.lstrip() for line in lines[1:]]
+    return '\n'.join([line.rstrip() for line in lines[:-1]] + lines[-1:])
+
+
+class EmailTemplate:
+    """HTML template parsed once into static segments and placeholders
+
+    Uses str.format placeholders (``{name}`` or ``{name:.2f}``). Values are
+    HTML-escaped unless they are Markup, e.g. an already rendered fragment.
+    """
+
+    def __init__(self, source: str):
+        segments = list(Formatter().parse(source))
+        self._head = _compact(segments[0][0]) if segments else ''
+        self._fields: List[Tuple[str, str, str]] = []
+        for index, (_, name, spec, _) in enumerate(segments):
+            if name is None:
+                continue
+            following = segments[index + 1][0] if index + 1 < len(segments) else ''
+            self._fields.append((name, spec, _compact(following)))
+        self.field_names = {name for name, _, _ in self._fields}
+
+    def render(self, **values) -> str:
+        out = [self._head]
+        for name, spec, literal in self._fields:
+            value = values[name]
+            if spec:
+                out.append(escape(format(value, spec)))
+            elif isinstance(value, Markup):
+                out.append(value)
+            elif isinstance(value, (int, float)):
+                out.append(str(value))
+            else:
+                out.append(escape(str(value)))
+            out.append(literal)
+        return ''.join(out)
+
+
+ALERT_TEMPLATE = EmailTemplate("""
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background-color: {color}; color: white; padding: 20px; text-align: center;">
+                <h1>🚨 Fraud Alert Detected</h1>
+                <h2>Severity: {severity}</h2>
+            </div>
+
+            <div style="padding: 20px; background-color: #f8f9fa;">
+                <h3>Transaction Details</h3>
+                <table style="width: 100%; border-collapse: collapse;">
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Transaction ID:</strong></td>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;">{transaction_id}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Amount:</strong></td>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;">${amount}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Merchant:</strong></td>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;">{merchant}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Fraud Score:</strong></td>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;">{fraud_score:.2f}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Detection Method:</strong></td>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;">{detection_method}</td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Timestamp:</strong></td>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;">{timestamp}</td>
+                    </tr>{suppressed_row}
+                </table>
+
+                <h3>Detection Details</h3>
+                <div style="background-color: white; padding: 15px; border-radius: 5px; margin: 10px 0;">
+                    <pre style="white-space: pre-wrap; font-family: monospace; font-size: 12px;">{details}</pre>
+                </div>
+
+                <div style="margin-top: 20px; padding: 15px; background-color: #fff3cd; border-radius: 5px;">
+                    <strong>⚠️ Action Required:</strong> Please review this transaction immediately and take appropriate action.
+                </div>
+            </div>
+        </body>
+        </html>
+        """)
+
+SUPPRESSED_ROW_TEMPLATE = EmailTemplate("""
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;"><strong>Similar Alerts Suppressed:</strong></td>
+                        <td style="padding: 8px; border-bottom: 1px solid #ddd;">{count} (same card and merchant)</td>
+                    </tr>""")
+
+DIGEST_TEMPLATE = EmailTemplate("""
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 800px; margin: 0 auto;">
+            <div style="background-color: {color}; color: white; padding: 20px; text-align: center;">
+                <h1>🚨 Fraud Alert Digest</h1>
+                <h2>{count} {severity} alerts · highest score {max_score:.2f}</h2>
+            </div>
+
+            <div style="padding: 20px; background-color: #f8f9fa;">
+                <table style="width: 100%; border-collapse: collapse;">
+                    <tr>
+                        <th style="padding: 6px; text-align: left;">Timestamp</th>
+                        <th style="padding: 6px; text-align: left;">Transaction ID</th>
+                        <th style="padding: 6px; text-align: left;">Score</th>
+                        <th style="padding: 6px; text-align: left;">Amount</th>
+                        <th style="padding: 6px; text-align: left;">Merchant</th>
+                        <th style="padding: 6px; text-align: left;">Method</th>
+                    </tr>{rows}
+                </table>
+
+                <div style="margin-top: 20px; padding: 15px; background-color: #fff3cd; border-radius: 5px;">
+                    <strong>⚠️ Action Required:</strong> Please review these transactions and take appropriate action.
+                </div>
+            </div>
+        </body>
+        </html>
+        """)
+
+DIGEST_ROW_TEMPLATE = EmailTemplate("""
+                    <tr>
+                        <td style="padding: 6px; border-bottom: 1px solid #ddd;">{timestamp}</td>
+                        <td style="padding: 6px; border-bottom: 1px solid #ddd;">{transaction_id}{suppressed}</td>
+                        <td style="padding: 6px; border-bottom: 1px solid #ddd;">{fraud_score:.2f}</td>
+                        <td style="padding: 6px; border-bottom: 1px solid #ddd;">${amount}</td>
+                        <td style="padding: 6px; border-bottom: 1px solid #ddd;">{merchant}</td>
+                        <td style="padding: 6px; border-bottom: 1px solid #ddd;">{detection_method}</td>
+                    </tr>""")
+
+
+def severity_color(severity) -> str:
+    return SEVERITY_COLORS.get(str(severity).lower(), DEFAULT_COLOR)
+
+
+@lru_cache(maxsize=1024)
+def _details_json(details: Tuple) -> str:
+    return json.dumps(list(details), indent=2, default=str)
+
+
+def format_details(details) -> str:
+    """Pretty-printed detection details; the usual list of rule reasons is cached"""
+    if isinstance(details, (list, tuple)) and all(isinstance(item, str) for item in details):
+        return _details_json(tuple(details))
+    return json.dumps(details, indent=2, default=str)
+
+
+def render_alert_html(alert_data: Dict) -> str:
+    """HTML body for a single alert"""
+    transaction = alert_transaction(alert_data)
+    suppressed = alert_data.get('suppressed_count')
+    return ALERT_TEMPLATE.render(
+        color=severity_color(alert_data['severity']),
+        severity=str(alert_data['severity']).upper(),
+        transaction_id=alert_data['transaction_id'],
+        amount=transaction.get('amt', 'N/A'),
+        merchant=transaction.get('merchant', 'N/A'),
+        fraud_score=float(alert_data['fraud_score'] or 0),
+        detection_method=alert_data['detection_method'],
+        timestamp=alert_data['timestamp'],
+        suppressed_row=Markup(SUPPRESSED_ROW_TEMPLATE.render(count=suppressed)) if suppressed else Markup(''),
+        details=format_details(alert_data['detection_details'])
+    )
+
+
+def render_digest_html(group) -> str:
+    """HTML body for a DigestGroup: summary plus one row per alert"""
+    rows = []
+    for alert_data in group.alerts:
+        transaction = alert_transaction(alert_data)
+        suppressed = alert_data.get('suppressed_count')
+        rows.append(DIGEST_ROW_TEMPLATE.render(
+            timestamp=alert_data['timestamp'],
+            transaction_id=alert_data['transaction_id'],
+            suppressed=f" (+{suppressed} suppressed)" if suppressed else '',
+            fraud_score=float(alert_data['fraud_score'] or 0),
+            amount=transaction.get('amt', 'N/A'),
+            merchant=transaction.get('merchant', 'N/A'),
+            detection_method=alert_data['detection_method']
+        ))
+    return DIGEST_TEMPLATE.render(
+        color=severity_color(group.severity),
+        count=len(group),
+        severity=group.severity,
+        max_score=group.max_score,
+        rows=Markup(''.join(rows))
+    )
+
+
+# Longest base64 payload of an encoded word that stays within 75 characters
+_ENCODED_WORD_BYTES = 45
+
+
+def encode_header(value: str) -> str:
+    """RFC 2047 header value: ASCII as-is, otherwise folded UTF-8 base64 encoded words"""
+    if value.isascii():
+        return value
+    words, chunk, size = [], [], 0
+    for char in value:
+        length = len(char.encode('utf-8'))
+        if size + length > _ENCODED_WORD_BYTES:
+            words.append(''.join(chunk))
+            chunk, size = [], 0
+        chunk.append(char)
+        size += length
+    words.append(''.join(chunk))
+    return '\r\n '.join(
+        f"=?utf-8?b?{base64.b64encode(word.encode('utf-8')).decode('ascii')}?=" for word in words
+    )
+
+
+class MessageEnvelope:
+    """Ready-encoded headers for one sender and recipient
+
+    ``build`` only encodes the subject and body per message; the rest of the
+    MIME structure is fixed and prepared once.
+    """
+
+    def __init__(self, sender: str, recipient: str):
+        self.sender = sender
+        self.recipient = recipient
+        self._headers = (
+            f"From: {sender}\r\n"
+            f"To: {recipient}\r\n"
+            "MIME-Version: 1.0\r\n"
+            "Content-Type: text/html; charset=\"utf-8\"\r\n"
+            "Content-Transfer-Encoding: base64\r\n"
+        ).encode('ascii')
+
+    def build(self, subject: str, html_body: str) -> bytes:
+        """Complete RFC 5322 message, ready for SMTP sendmail"""
+        body = base64.encodebytes(html_body.encode('utf-8')).replace(b'\n', b'\r\n')
+        return b''.join((
+            b'Subject: ', encode_header(subject).encode('ascii'), b'\r\n',
+            self._headers, b'\r\n', body
+        ))
@@ -0,0 +1,62 @@
+"""
+Compact binary encoding of stored feature vectors
+"""
+import struct
+from typing import List
+
+FEATURE_SCHEMA_VERSION = 1
+
+# version (uint8), element type ('f' float32 / 'd' float64), element count (uint16)
+HEADER = struct.Struct('<BcH')
+SUPPORTED_DTYPES = (b'f', b'd')
+
+
+def encode_features(csv_data: str, dtype: str = 'f') -> bytes:
+    """
+    Pack a comma-joined feature vector into a versioned little-endian blob.
+    float32 halves the payload again versus float64 but keeps only ~7
+    significant digits, so long identifiers such as cc_num lose precision.
+
+    :param csv_data: Feature vector as sent to SageMaker
+    :param dtype: 'f' for float32 or 'd' for float64
+    :return: Header followed by the packed values
+    """
+    code = dtype.encode('ascii')
+    if code not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported feature dtype: {dtype}")
+    values = [float(value) for value in csv_data.split(',')]
+    return HEADER.pack(FEATURE_SCHEMA_VERSION, code, len(values)) + \
+        struct.pack(f'<{len(values)}{dtype}', *values)
+
+
+def _unpack(blob):
+    """Return the element type and values of an encoded feature blob"""
+    data = bytes(getattr(blob, 'value', blob))  # boto3 returns Binary wrappers
+    version, code, count = HEADER.unpack_from(data)
+    if version != FEATURE_SCHEMA_VERSION:
+        raise ValueError(f"Unsupported feature schema version: {version}")
+    if code not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported feature dtype: {code!r}")
+    return code, struct.unpack_from(f'<{count}{code.decode()}', data, HEADER.size)
+
+
+def decode_features(blob) -> List[float]:
+    """Unpack a blob produced by encode_features"""
+    return list(_unpack(blob)[1])
+
+
+def is_encoded_features(value) -> bool:
+    """Whether a stored attribute holds an encoded feature vector"""
+    data = getattr(value, 'value', value)
+    return isinstance(data, (bytes, bytearray)) and len(data) >= HEADER.size
+
+
+def features_to_text(value):
+    """Render an encoded feature attribute as comma-joined text; other values pass through"""
+    if not is_encoded_features(value):
+        return value
+    code, values = _unpack(value)
+    if code == b'f':
+        # float32 carries ~7 significant digits; don't print float64 noise
+        return ','.join(f"{v:.7g}" for v in values)
+    return ','.join(map(str, values))
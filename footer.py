@@ -5,17 +5,42 @@ import streamlit as st
 from datetime import datetime
 
 
-def render_footer(dataframes, controls):
-    """Render the dashboard footer"""
+def _format_age(seconds):
+    """Short age label for a table's data"""
+    if seconds is None:
+        return "not loaded"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    return f"{seconds / 60:.0f}m"
+
+
+def render_footer(dataframes, controls, staleness=None, refreshed_at=None, load_seconds=None):
+    """
+    Render the dashboard footer
+    
+    :param staleness: Seconds since each table was last loaded (DataHub.staleness())
+    :param refreshed_at: Time of the shared snapshot being shown
+    :param load_seconds: Duration of each table's last load
+    """
     st.markdown("---")
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if 'last_refresh' in st.session_state:
+        if refreshed_at is not None:
+            last_update = refreshed_at.strftime('%Y-%m-%d %H:%M:%S')
+        elif 'last_refresh' in st.session_state:
             last_update = st.session_state.last_refresh.strftime('%Y-%m-%d %H:%M:%S')
         else:
             last_update = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         st.markdown(f"**Last updated:** {last_update}")
+        if staleness:
+            st.markdown(
+                "**Data age:** " + ", ".join(f"{name} {_format_age(age)}" for name, age in staleness.items())
+            )
+        if load_seconds:
+            st.markdown(
+                "**Load time:** " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in load_seconds.items())
+            )
     
     with col2:
         total_transactions = len(dataframes['df_transactions'])
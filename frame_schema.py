@@ -0,0 +1,84 @@
+"""
+Column types for the dashboard DataFrames, applied once when data is loaded
+"""
+import pandas as pd
+
+
+# Per table: columns converted to float64, nullable Int8 flags / Int32 counts, categoricals and datetimes.
+# Columns that are missing are skipped; other columns keep the types they were loaded with.
+FRAME_SCHEMAS = {
+    'transactions': {
+        'float': ['amt', 'lat', 'long', 'merch_lat', 'merch_long', 'city_pop'],
+        'flag': ['is_fraud'],
+        'category': ['category', 'state', 'gender'],
+        'datetime': ['timestamp']
+    },
+    'results': {
+        'float': ['confidence'],
+        'datetime': ['timestamp']
+    },
+    'alerts': {
+        'float': ['fraud_score'],
+        'count': ['suppressed_count'],
+        'category': ['severity', 'detection_method'],
+        'datetime': ['timestamp']
+    }
+}
+
+
+def to_float64(series):
+    """Decimal/str/None values to float64; unparseable values become NaN"""
+    if series.dtype == 'float64':
+        return series
+    try:
+        # One C-level pass over the objects (Decimal supports __float__)
+        return series.astype('float64')
+    except (TypeError, ValueError):
+        return pd.to_numeric(series, errors='coerce').astype('float64')
+
+
+def to_flag(series):
+    """0/1 flags as nullable Int8 (missing values stay <NA>)"""
+    return to_float64(series).round().astype('Int8')
+
+
+def to_count(series):
+    return to_float64(series).round().astype('Int32')
+
+
+def to_category(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.remove_unused_categories()
+    return series.astype('category')
+
+
+def to_datetime(series):
+    """ISO timestamps to datetime64; unparseable values become NaT"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, format='ISO8601', errors='coerce')
+
+
+CONVERTERS = {
+    'float': to_float64,
+    'flag': to_flag,
+    'count': to_count,
+    'category': to_category,
+    'datetime': to_datetime
+}
+
+
+def apply_schema(frame, table):
+    """Convert a table's DataFrame columns to their schema types (returns the same frame)"""
+    for kind, columns in FRAME_SCHEMAS[table].items():
+        for column in columns:
+            if column in frame.columns:
+                frame[column] = CONVERTERS[kind](frame[column])
+    return frame
+
+
+def build_frame(items, table):
+    """Typed DataFrame from loaded items"""
+    if not items:
+        return pd.DataFrame()
+    return apply_schema(pd.DataFrame(items), table)
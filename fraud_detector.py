@@ -4,13 +4,20 @@ Main fraud detection processor
 import json
 import base64
 import logging
-from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Set
 
 from .business_rules import BusinessRulesEngine
 from .sagemaker_client import SageMakerClient
 from .data_processor import DataProcessor
 from .alert_manager import AlertManager
+from .batch_writer import BatchWriteError
+from .transaction_context import TransactionContext
+from .time_index import utc_now
+from .alert_payload import alert_transaction_fields
+from .alert_dedup import dedup_key
+from .local_store import LocalDataProcessor
+from .sqs_publisher import BatchPublishError
+from .config import STORAGE_CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -21,32 +28,89 @@ class FraudDetectionProcessor:
     def __init__(self):
         self.business_rules = BusinessRulesEngine()
         self.sagemaker_client = SageMakerClient()
-        self.data_processor = DataProcessor()
+        if STORAGE_CONFIG['backend'] == 'sqlite':
+            self.data_processor = LocalDataProcessor(STORAGE_CONFIG['sqlite_path'])
+        else:
+            self.data_processor = DataProcessor()
         self.alert_manager = AlertManager()
     
     def process_kinesis_records(self, records: List[Dict]) -> Dict:
-        """Process Kinesis records and detect fraud"""
+        """
+        Process Kinesis records and detect fraud.
+        
+        Records that could not be processed, or whose buffered writes or alerts
+        could not be sent, are returned in batchItemFailures (enable ReportBatchItemFailures on the event
+        source), so Kinesis retries from them instead of the whole batch.
+        """
         processed_count = 0
+        # Transaction id -> sequence number of the record that carried it
+        sequence_numbers = {}
+        failed = set()
         
         for record in records:
             try:
                 # Decode Kinesis data
                 payload = base64.b64decode(record['kinesis']['data'])
                 transaction = json.loads(payload)
-                
+            except Exception as e:
+                # Retrying can't make an undecodable record readable
+                logger.error(f"Error decoding record {record['kinesis'].get('sequenceNumber')}: {str(e)}")
+                continue
+            
+            transaction_id = str(transaction.get('transactionID'))
+            sequence_numbers[transaction_id] = record['kinesis'].get('sequenceNumber')
+            try:
                 # Process single transaction
                 self.process_transaction(transaction)
                 processed_count += 1
-                
             except Exception as e:
                 logger.error(f"Error processing record: {str(e)}")
-                continue
+                failed.add(transaction_id)
+        
+        # Write and send anything still buffered before the invocation returns
+        failed |= self.flush(set(sequence_numbers))
+        batch_item_failures = [
+            {'itemIdentifier': sequence_number}
+            for transaction_id, sequence_number in sequence_numbers.items()
+            if transaction_id in failed and sequence_number is not None
+        ]
         
         return {
             "statusCode": 200,
-            "body": f"Processed {processed_count} transactions"
+            "body": f"Processed {processed_count} transactions",
+            "batchItemFailures": batch_item_failures
         }
     
+    def flush(self, transaction_ids: Set[str]) -> Set[str]:
+        """
+        Write and send everything buffered for a batch.
+        
+        :param transaction_ids: Every transaction id in the batch, all reported
+                                as failed when a failure can't be traced to items
+        :return: Ids of the transactions whose writes or alerts failed
+        """
+        failed = set()
+        try:
+            self.data_processor.flush()
+        except BatchWriteError as e:
+            logger.error(f"Buffered writes failed: {str(e)}")
+            failed.update(e.key_values('transactionID') & transaction_ids)
+        except Exception as e:
+            logger.error(f"Buffered writes failed: {str(e)}")
+            failed.update(transaction_ids)
+        
+        try:
+            self.alert_manager.flush()
+        except BatchPublishError as e:
+            logger.error(f"Buffered alerts failed: {str(e)}")
+            failed.update(str(tag) for tag in e.tags if tag is not None)
+            if None in e.tags:
+                failed.update(transaction_ids)
+        except Exception as e:
+            logger.error(f"Buffered alerts failed: {str(e)}")
+            failed.update(transaction_ids)
+        return failed
+    
     def process_transaction(self, transaction: Dict) -> None:
         """
         Process a single transaction through the fraud detection pipeline
@@ -61,12 +125,15 @@ class FraudDetectionProcessor:
         transaction_id = transaction['transactionID']
         logger.info(f"Processing transaction: {transaction_id}")
         
+        # Derived fields are parsed once and shared by every stage
+        context = TransactionContext(transaction)
+        
         try:
             # 1. Store transaction in DynamoDB
             self.data_processor.store_transaction(transaction)
             
             # 2. Apply business rules (fast pre-filtering)
-            business_rule_result = self.business_rules.evaluate_transaction(transaction)
+            business_rule_result = self.business_rules.evaluate_transaction(transaction, context)
             
             # 3. If business rules detect fraud, skip SageMaker and send alert
             if business_rule_result['is_fraud']:
@@ -91,7 +158,7 @@ class FraudDetectionProcessor:
             
             # 4. If business rules pass, proceed with SageMaker inference
             logger.info(f"Business rules passed, proceeding with SageMaker for: {transaction_id}")
-            sagemaker_result = self.sagemaker_client.get_fraud_prediction(transaction)
+            sagemaker_result = self.sagemaker_client.get_fraud_prediction(transaction, context)
             
             # 5. Store SageMaker result
             self.data_processor.store_detection_result(
@@ -130,8 +197,11 @@ class FraudDetectionProcessor:
             'fraud_score': fraud_score,
             'detection_method': detection_method,
             'detection_details': details,
-            'transaction_data': transaction_data,
-            'timestamp': datetime.now().isoformat(),
+            # The full transaction is already in the transactions table
+            **alert_transaction_fields(transaction_data),
+            # Card/merchant key for rate limiting, without the card number itself
+            'dedup_key': dedup_key(transaction_data),
+            'timestamp': utc_now().isoformat(),
             'severity': self.determine_severity(fraud_score)
         }
         
@@ -1,7 +1,6 @@
 """
 Main Lambda handler for Kinesis fraud detection
 """
-import json
 import logging
 from fraud_detector import FraudDetectionProcessor
 
@@ -17,8 +16,7 @@ def lambda_handler(event, context):
     try:
         return processor.process_kinesis_records(event['Records'])
     except Exception as e:
+        # With ReportBatchItemFailures a response without batchItemFailures
+        # counts as success; raise so Lambda retries the whole batch
         logger.error(f"Error in lambda_handler: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": str(e)})
-        }
+        raise
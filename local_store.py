@@ -0,0 +1,533 @@
+"""
+Embedded SQLite storage backend for running the pipeline and dashboard offline
+
+Drop-in replacements for the DynamoDB-backed classes:
+    LocalAnomalyTransactions  - AnomalyTransactions (dashboard / analytics)
+    LocalDataProcessor        - DataProcessor (fraud detection lambda)
+    LocalAlertDataHandler     - AlertDataHandler (alert lambda)
+
+Each table keeps the item as a JSON document next to indexed key,
+timestamp and time_bucket columns. SQL analytics can reach into the
+document with json_extract, e.g.:
+
+    store.query(
+        "SELECT json_extract(item, '$.category') AS category, COUNT(*) AS n "
+        "FROM transactions GROUP BY category ORDER BY n DESC"
+    )
+"""
+import base64
+import json
+import logging
+import sqlite3
+import threading
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .database_operations import ScanPage
+from .time_index import index_attributes, to_datetime, with_index_attributes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATABASE_PATH = 'fraud_detection.db'
+
+# Table name -> primary key attribute
+DEFAULT_TABLES = {
+    'transactions': 'transactionID',
+    'detection_results': 'transactionID',
+    'detections': 'transactionID',
+    'alerts': 'alertID'
+}
+
+# Rows written per executemany() call by the buffered writers
+LOCAL_BATCH_SIZE = 500
+
+
+def _json_default(value):
+    """Encode the non-JSON types items may carry"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return {'__bytes__': base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(obj):
+    """Restore values encoded by _json_default"""
+    if len(obj) == 1 and '__bytes__' in obj:
+        return base64.b64decode(obj['__bytes__'])
+    return obj
+
+
+def encode_item(item: Dict) -> str:
+    """Serialize an item to its stored JSON document"""
+    return json.dumps(item, default=_json_default, separators=(',', ':'))
+
+
+def decode_item(document: str) -> Dict:
+    """Deserialize a stored JSON document"""
+    return json.loads(document, object_hook=_json_object_hook)
+
+
+class LocalStore:
+    """Thread-safe SQLite database holding one document table per DynamoDB table"""
+
+    def __init__(self, path: str = DEFAULT_DATABASE_PATH, tables: Optional[Dict[str, str]] = None):
+        """
+        :param path: SQLite database file (':memory:' for a throwaway store)
+        :param tables: Table name -> primary key attribute
+        """
+        self.path = path
+        self.tables = dict(tables or DEFAULT_TABLES)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.row_factory = sqlite3.Row
+        if path != ':memory:':
+            # Readers (dashboard) do not block the writer (pipeline)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+        self.create_tables(self.tables)
+
+    def create_tables(self, tables: Dict[str, str]) -> None:
+        """Create document tables and their indexes if they do not exist"""
+        with self._lock:
+            for name in tables:
+                self.tables.setdefault(name, tables[name])
+                self._connection.executescript(f"""
+                    CREATE TABLE IF NOT EXISTS "{name}" (
+                        key TEXT PRIMARY KEY,
+                        timestamp TEXT,
+                        time_bucket TEXT,
+                        item TEXT NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS "{name}_timestamp_idx" ON "{name}" (timestamp);
+                    CREATE INDEX IF NOT EXISTS "{name}_bucket_idx" ON "{name}" (time_bucket, timestamp);
+                """)
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+    def _row(self, table: str, item: Dict):
+        """Column values for one item"""
+        key_attribute = self.tables[table]
+        if key_attribute not in item:
+            raise ValueError(f"Item for {table} is missing its key attribute {key_attribute}")
+        return (str(item[key_attribute]), item.get('timestamp'), item.get('time_bucket'), encode_item(item))
+
+    def put_items(self, table: str, items: Iterable[Dict]) -> int:
+        """
+        Insert or replace items in one transaction.
+
+        :return: Number of items written
+        """
+        rows = [self._row(table, item) for item in items]
+        if not rows:
+            return 0
+        with self._lock:
+            self._connection.execute('BEGIN')
+            try:
+                self._connection.executemany(
+                    f'INSERT OR REPLACE INTO "{table}" (key, timestamp, time_bucket, item) VALUES (?, ?, ?, ?)',
+                    rows
+                )
+                self._connection.execute('COMMIT')
+            except Exception:
+                self._connection.execute('ROLLBACK')
+                raise
+        return len(rows)
+
+    def get_item(self, table: str, key) -> Optional[Dict]:
+        """Item with the given key, or None"""
+        with self._lock:
+            row = self._connection.execute(
+                f'SELECT item FROM "{table}" WHERE key = ?', (str(key),)
+            ).fetchone()
+        return decode_item(row['item']) if row else None
+
+    def get_items(self, table: str, keys: List) -> Dict[str, Dict]:
+        """Items for several keys, keyed by the stringified key"""
+        found = {}
+        # Stay below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = [str(key) for key in keys[i:i + 500]]
+            placeholders = ', '.join('?' * len(chunk))
+            with self._lock:
+                rows = self._connection.execute(
+                    f'SELECT key, item FROM "{table}" WHERE key IN ({placeholders})', chunk
+                ).fetchall()
+            found.update((row['key'], decode_item(row['item'])) for row in rows)
+        return found
+
+    def page(self, table: str, limit: int, after_rowid: int = 0) -> ScanPage:
+        """Up to ``limit`` items in insertion order, with the rowid to continue from"""
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT rowid, item FROM "{table}" WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                (after_rowid, limit)
+            ).fetchall()
+        cursor = rows[-1]['rowid'] if len(rows) == limit else None
+        return ScanPage((decode_item(row['item']) for row in rows), cursor)
+
+    def recent(self, table: str, n: int, since=None) -> List[Dict]:
+        """Newest ``n`` items by timestamp, optionally only those after ``since``"""
+        sql = f'SELECT item FROM "{table}"'
+        params = []
+        if since is not None:
+            sql += ' WHERE timestamp > ?'
+            params.append(to_datetime(since).isoformat())
+        sql += ' ORDER BY timestamp DESC LIMIT ?'
+        params.append(n)
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        return [decode_item(row['item']) for row in rows]
+
+    def pages_since(self, table: str, since, page_size: int = 1000) -> Iterator[ScanPage]:
+        """Items with a timestamp after ``since``, oldest first, one page at a time"""
+        # Rows at exactly ``since`` sort below the maximum rowid and are skipped
+        position = (to_datetime(since).isoformat(), 2 ** 63 - 1)
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    f'SELECT rowid, timestamp, item FROM "{table}" '
+                    f'WHERE (timestamp, rowid) > (?, ?) ORDER BY timestamp, rowid LIMIT ?',
+                    (*position, page_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield ScanPage(decode_item(row['item']) for row in rows)
+            position = (rows[-1]['timestamp'], rows[-1]['rowid'])
+
+    def query(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        """Run a read-only SQL query and return rows as dicts"""
+        with self._lock:
+            rows = self._connection.execute(sql, tuple(params)).fetchall()
+        return [dict(row) for row in rows]
+
+
+class LocalAnomalyTransactions:
+    """AnomalyTransactions implemented on a LocalStore.
+
+    Exposes the same methods and return types, so the dashboard and
+    analytics code run unchanged against a local database.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATABASE_PATH, store: Optional[LocalStore] = None):
+        """
+        :param path: SQLite database file
+        :param store: Existing store to share (e.g. with a LocalDataProcessor)
+        """
+        self.store = store or LocalStore(path)
+        self.transactions_table = None
+        self.results_table = None
+        self.alerts_table = None
+
+    def list_tables(self, limit=10):
+        """
+        List the tables in the local database.
+
+        :return: List of table names
+        """
+        rows = self.store.query("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        return [row['name'] for row in rows][:limit]
+
+    def initialize_tables(self, transactions_table_name='transactions', results_table_name='detections', alerts_table_name='alerts'):
+        """
+        Create (if needed) and select the transactions, results and alerts tables.
+
+        :param transactions_table_name: Name of the transactions table
+        :param results_table_name: Name of the results table
+        """
+        self.store.create_tables({
+            transactions_table_name: 'transactionID',
+            results_table_name: 'transactionID',
+            alerts_table_name: 'alertID'
+        })
+        self.transactions_table = transactions_table_name
+        self.results_table = results_table_name
+        self.alerts_table = alerts_table_name
+
+    def convert_floats(self, obj):
+        """Floats are stored as-is locally"""
+        return obj
+
+    def _resolve_table(self, table):
+        """
+        Resolve a table alias ('transactions', 'results', 'alerts') to its table name.
+        """
+        resolved = {
+            'transactions': self.transactions_table,
+            'results': self.results_table,
+            'alerts': self.alerts_table,
+        }.get(table, table)
+        if resolved is None:
+            raise ValueError(f"{table.capitalize()} table not initialized. Call initialize_tables() first.")
+        return resolved
+
+    def store_transaction(self, transaction_data):
+        """
+        Store a transaction in the transactions table.
+
+        :param transaction_data: Dictionary containing transaction details
+        """
+        self.store.put_items(self._resolve_table('transactions'), [with_index_attributes(transaction_data)])
+        logger.info(f"Stored transaction {transaction_data['transactionID']} successfully!")
+
+    def store_result(self, prediction_response, transaction_id, csv_row):
+        """
+        Store prediction results in the results table.
+
+        :param prediction_response: The ML model prediction response
+        :param transaction_id: Unique identifier for the transaction
+        :param csv_row: Original CSV data row for the transaction
+        """
+        self.batch_store_results([{
+            'prediction_response': prediction_response,
+            'transaction_id': transaction_id,
+            'csv_row': csv_row
+        }])
+
+    def scan_pages(self, table, page_size=100, cursor=None, segment=None, total_segments=None):
+        """
+        Read a table page by page in insertion order.
+        Segments are accepted for compatibility; a local scan is never split.
+
+        :return: Generator of ScanPage objects
+        """
+        table_name = self._resolve_table(table)
+        while True:
+            page = self.store.page(table_name, page_size, cursor or 0)
+            yield page
+            if page.cursor is None:
+                return
+            cursor = page.cursor
+
+    def parallel_scan(self, table, total_segments=4, page_size=100, max_buffered_pages=8):
+        """
+        Read a whole table. SQLite is fastest read sequentially, so this is a plain scan.
+
+        :return: Generator of items
+        """
+        for page in self.scan_pages(table, page_size):
+            yield from page
+
+    def query_pages_since(self, table, since, page_size=1000):
+        """
+        Read every item stored after ``since``, oldest first, one page at a time.
+
+        :return: Generator of ScanPage objects
+        """
+        return self.store.pages_since(self._resolve_table(table), since, page_size)
+
+    def list_transactions(self, limit=10, cursor=None):
+        """
+        List transactions in the transactions table.
+
+        :return: ScanPage (list) of transaction items with a ``cursor`` for the next page
+        """
+        return self.store.page(self._resolve_table('transactions'), limit, cursor or 0)
+
+    def list_results(self, limit=10, cursor=None):
+        """
+        List results in the results table.
+
+        :return: ScanPage (list) of result items with a ``cursor`` for the next page
+        """
+        return self.store.page(self._resolve_table('results'), limit, cursor or 0)
+
+    def list_alerts(self, limit=10, cursor=None):
+        """
+        List alerts in the alerts table.
+
+        :return: ScanPage (list) of alert items with a ``cursor`` for the next page
+        """
+        return self.store.page(self._resolve_table('alerts'), limit, cursor or 0)
+
+    def recent_transactions(self, n=10, since=None):
+        """Retrieve the most recently stored transactions, newest first"""
+        return self.store.recent(self._resolve_table('transactions'), n, since)
+
+    def recent_results(self, n=10, since=None):
+        """Retrieve the most recent detection results, newest first"""
+        return self.store.recent(self._resolve_table('results'), n, since)
+
+    def recent_alerts(self, n=10, since=None):
+        """Retrieve the most recent alerts, newest first"""
+        return self.store.recent(self._resolve_table('alerts'), n, since)
+
+    def get_transaction(self, transaction_id):
+        """
+        Retrieve a specific transaction from the transactions table.
+
+        :param transaction_id: The ID of the transaction to retrieve
+        :return: Transaction data
+        """
+        return self.store.get_item(self._resolve_table('transactions'), transaction_id)
+
+    def get_result(self, transaction_id: int):
+        """
+        Retrieve prediction results for a specific transaction.
+
+        :param transaction_id: The ID of the transaction
+        :return: Prediction results data
+        """
+        return self.store.get_item(self._resolve_table('results'), transaction_id)
+
+    def batch_store_results(self, results_data):
+        """
+        Store multiple prediction results in one transaction.
+
+        :param results_data: List of dictionaries containing prediction data
+                           Each dict should have: prediction_response, transaction_id, csv_row
+        """
+        self.store.put_items(self._resolve_table('results'), (
+            with_index_attributes({
+                'transactionID': result['transaction_id'],
+                'prediction': result['prediction_response'],
+                'csv_data': result['csv_row']
+            })
+            for result in results_data
+        ))
+        logger.info(f"Batch stored {len(results_data)} prediction results successfully!")
+
+    def batch_get_transactions(self, transaction_ids, projection=None, **_):
+        """
+        Retrieve multiple transactions.
+
+        :param transaction_ids: List of transaction IDs to retrieve
+        :param projection: Optional list of attribute names to return
+        :return: List of transaction items in request order (missing IDs are skipped)
+        """
+        unique_ids = list(dict.fromkeys(transaction_ids))
+        found = self.store.get_items(self._resolve_table('transactions'), unique_ids)
+        items = [found[str(tid)] for tid in transaction_ids if str(tid) in found]
+        if projection:
+            attributes = ['transactionID', *projection]
+            items = [{k: item[k] for k in attributes if k in item} for item in items]
+        return items
+
+    def batch_store_transactions(self, transactions_data):
+        """
+        Store multiple transactions in one transaction.
+
+        :param transactions_data: List of dictionaries containing transaction data
+        """
+        self.store.put_items(
+            self._resolve_table('transactions'),
+            (with_index_attributes(transaction) for transaction in transactions_data)
+        )
+        logger.info(f"Batch stored {len(transactions_data)} transactions successfully!")
+
+
+class LocalDataProcessor:
+    """DataProcessor implemented on a LocalStore.
+
+    Writes are buffered per table and inserted with executemany(); call
+    flush() before the invocation ends, as with the DynamoDB writer.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATABASE_PATH, store: Optional[LocalStore] = None,
+                 transactions_table: str = 'transactions',
+                 detection_results_table: str = 'detection_results',
+                 detection_table: str = 'detections', batch_size: int = LOCAL_BATCH_SIZE):
+        self.store = store or LocalStore(path)
+        self.store.create_tables({
+            transactions_table: 'transactionID',
+            detection_results_table: 'transactionID',
+            detection_table: 'transactionID'
+        })
+        self.transactions_table = transactions_table
+        self.detection_results_table = detection_results_table
+        self.detection_table = detection_table
+        self.batch_size = batch_size
+        self._buffer: Dict[str, List[Dict]] = {}
+        self._buffered = 0
+
+    def _put_item(self, table: str, item: Dict) -> None:
+        """Buffer an item, writing all buffers once the batch is full"""
+        self._buffer.setdefault(table, []).append(item)
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered items table by table; a table whose write fails stays buffered"""
+        error = None
+        for table in list(self._buffer):
+            items = self._buffer[table]
+            try:
+                self.store.put_items(table, items)
+            except Exception as e:
+                logger.error(f"Error writing {len(items)} buffered items to {table}: {str(e)}")
+                error = error or e
+                continue
+            del self._buffer[table]
+            self._buffered -= len(items)
+        if error is not None:
+            raise error
+
+    def store_transaction(self, transaction: Dict) -> None:
+        """Store transaction locally"""
+        self._put_item(self.transactions_table, with_index_attributes(transaction))
+        logger.info(f"Stored transaction: {transaction['transactionID']}")
+
+    def store_detection_result(self, transaction_id: str, prediction: Dict,
+                               processed_data: str) -> None:
+        """Store detection result locally"""
+        self._put_item(self.detection_results_table, {
+            'transactionID': transaction_id,
+            'prediction': prediction,
+            'csv_data': processed_data,
+            **index_attributes()
+        })
+        logger.info(f"Stored detection result for: {transaction_id}")
+
+    def store_detection(self, transaction_id: str, method: str, is_fraud: bool,
+                        confidence: float, details: Dict) -> None:
+        """Store detection locally"""
+        self._put_item(self.detection_table, {
+            'transactionID': transaction_id,
+            'is_fraud': is_fraud,
+            'confidence': confidence,
+            'details': details,
+            **index_attributes()
+        })
+        logger.info(f"Stored detection for: {transaction_id}")
+
+    def convert_floats_to_decimal(self, obj):
+        """Floats are stored as-is locally"""
+        return obj
+
+
+class LocalAlertDataHandler:
+    """AlertDataHandler implemented on a LocalStore"""
+
+    def __init__(self, path: str = DEFAULT_DATABASE_PATH, store: Optional[LocalStore] = None,
+                 alerts_table: str = 'alerts'):
+        self.store = store or LocalStore(path)
+        self.store.create_tables({alerts_table: 'alertID'})
+        self.alerts_table = alerts_table
+
+    def store_alert(self, alert_data: Dict) -> None:
+        """Store alert locally"""
+        self.store.put_items(self.alerts_table, [with_index_attributes(alert_data)])
+        logger.info(f"Alert stored locally: {alert_data['alertID']}")
+
+    def store_alerts(self, alerts: List[Dict]) -> List[str]:
+        """
+        Store several alerts in one transaction.
+
+        :return: alertIDs that could not be written
+        """
+        try:
+            self.store.put_items(self.alerts_table, (with_index_attributes(alert) for alert in alerts))
+        except Exception as e:
+            logger.error(f"Error storing alerts locally: {str(e)}")
+            return [str(alert['alertID']) for alert in alerts]
+        return []
+
+    def convert_floats(self, obj):
+        """Floats are stored as-is locally"""
+        return obj
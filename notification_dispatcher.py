@@ -0,0 +1,305 @@
+"""
+Asynchronous notification dispatch with retries and on-disk spill
+"""
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.request
+from collections import deque
+from queue import Empty, Full, PriorityQueue
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING_FILE = 'pending.jsonl'
+DEAD_LETTER_FILE = 'dead_letters.jsonl'
+
+
+class NotificationError(Exception):
+    """Raised by a channel when a notification could not be delivered"""
+
+
+class Notification:
+    """What to notify about: kind is 'alert' (payload: alert) or 'digest' (payload: severity and alerts)
+
+    Lower priority values are delivered first. ``delivered`` is True once
+    every channel has sent it.
+    """
+
+    def __init__(self, kind: str, payload: Dict, priority: int = 0):
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.created = time.time()
+        # Channel jobs not finished yet, and whether any of them gave up
+        self.outstanding = 0
+        self.failed = False
+
+    @property
+    def delivered(self) -> bool:
+        return self.outstanding == 0 and not self.failed
+
+    def to_dict(self) -> Dict:
+        return {'kind': self.kind, 'payload': self.payload, 'priority': self.priority, 'created': self.created}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Notification':
+        notification = cls(data['kind'], data['payload'], data.get('priority', 0))
+        notification.created = data.get('created', notification.created)
+        return notification
+
+
+class NotificationChannel:
+    """A destination for notifications; send() raises on failure so the dispatcher can retry"""
+    name = 'channel'
+
+    def send(self, notification: Notification) -> None:
+        raise NotImplementedError
+
+
+class EmailChannel(NotificationChannel):
+    """Alert and digest emails through EmailNotificationService"""
+    name = 'email'
+
+    def __init__(self, email_service):
+        self.email_service = email_service
+
+    def send(self, notification: Notification) -> None:
+        if notification.kind == 'digest':
+            from .alert_digest import DigestGroup
+            group = DigestGroup(notification.payload['severity'], notification.created)
+            group.alerts = notification.payload['alerts']
+            sent = self.email_service.send_digest_notification(group)
+        else:
+            sent = self.email_service.send_email_notification(notification.payload)
+        if not sent:
+            raise NotificationError("email was not sent")
+
+
+class WebhookChannel(NotificationChannel):
+    """POSTs the notification as JSON, e.g. to a chat or incident webhook"""
+    name = 'webhook'
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, notification: Notification) -> None:
+        body = json.dumps(notification.to_dict(), default=str).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if response.status >= 300:
+                raise NotificationError(f"webhook returned HTTP {response.status}")
+
+
+class _Job:
+    __slots__ = ('channel', 'notification', 'enqueued')
+
+    def __init__(self, channel: NotificationChannel, notification: Notification):
+        self.channel = channel
+        self.notification = notification
+        self.enqueued = time.monotonic()
+
+
+def _percentile(samples, fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class NotificationDispatcher:
+    """Delivers notifications to every channel on a pool of worker threads
+
+    ``submit`` only enqueues, so slow or failing channels don't hold up the
+    caller. Workers always take the highest-priority job waiting, so urgent
+    notifications overtake a backlog of routine ones. A failed send is retried with capped exponential backoff and
+    full jitter; after ``max_retries`` the notification is appended to
+    ``dead_letters.jsonl`` in ``spill_dir``. When the queue is full, or
+    ``wait`` times out, unsent jobs go to ``pending.jsonl`` if
+    ``spill_pending`` is set and ``replay_pending`` queues them again later;
+    otherwise they are given up. Dead-lettered and given-up notifications
+    are not ``delivered``, so callers can have them redelivered. Lambda
+    freezes background threads between invocations, so callers should
+    ``wait`` before returning.
+    """
+
+    def __init__(self, channels: Iterable[NotificationChannel], workers: int = 4, max_queue: int = 1000,
+                 max_retries: int = 3, base_backoff_seconds: float = 0.5, max_backoff_seconds: float = 10.0,
+                 spill_dir: Optional[str] = None, spill_pending: bool = True):
+        """
+        :param spill_pending: Keep unsent notifications in pending.jsonl for
+                              replay_pending; only safe if spill_dir outlives the
+                              process (e.g. EFS, not Lambda's /tmp)
+        """
+        self.channels = {channel.name: channel for channel in channels}
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.spill_dir = spill_dir
+        self.spill_pending = spill_pending
+
+        self._queue: 'PriorityQueue' = PriorityQueue(maxsize=max_queue)
+        self._sequence = itertools.count()
+        self._idle = threading.Condition()
+        self._unfinished = 0
+        self._spill_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self._send_latency = deque(maxlen=1000)
+        self._queue_wait = deque(maxlen=1000)
+        self.counters = {'submitted': 0, 'sent': 0, 'retried': 0, 'dead_lettered': 0, 'spilled': 0, 'given_up': 0}
+
+        for index in range(workers):
+            threading.Thread(target=self._work, name=f"notification-worker-{index}", daemon=True).start()
+
+    def submit(self, kind: str, payload: Dict, priority: int = 0) -> Notification:
+        """Queue a notification for every channel; check ``delivered`` on the result after ``wait``"""
+        notification = Notification(kind, payload, priority)
+        for channel in self.channels.values():
+            self._enqueue(_Job(channel, notification))
+        return notification
+
+    def _enqueue(self, job: _Job) -> None:
+        with self._idle:
+            self._unfinished += 1
+            job.notification.outstanding += 1
+        self._count('submitted')
+        try:
+            # The sequence number keeps FIFO order within a priority
+            self._queue.put_nowait((job.notification.priority, next(self._sequence), job))
+        except Full:
+            logger.warning("Notification queue full")
+            self._set_aside([job])
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._counters_lock:
+            self.counters[name] += amount
+
+    def _done(self, job: _Job) -> None:
+        with self._idle:
+            self._unfinished -= 1
+            job.notification.outstanding -= 1
+            if self._unfinished == 0:
+                self._idle.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            _, _, job = self._queue.get()
+            try:
+                self._queue_wait.append(time.monotonic() - job.enqueued)
+                self._deliver(job)
+            except Exception as e:
+                logger.error(f"Unexpected error dispatching notification: {str(e)}")
+            finally:
+                self._done(job)
+
+    def _deliver(self, job: _Job) -> None:
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                job.channel.send(job.notification)
+                self._send_latency.append(time.monotonic() - started)
+                self._count('sent')
+                return
+            except Exception as e:
+                error = e
+            attempt += 1
+            if attempt > self.max_retries:
+                break
+            self._count('retried')
+            backoff = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** (attempt - 1)))
+            time.sleep(random.uniform(0, backoff))
+
+        logger.error(f"Giving up on {job.channel.name} notification after {attempt} attempts: {str(error)}")
+        job.notification.failed = True
+        self._count('dead_lettered')
+        self._spill(DEAD_LETTER_FILE, [job], error=str(error))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued notification is sent or dead-lettered.
+
+        :return: True if the queue drained; on timeout the jobs not yet
+                 started are spilled to pending.jsonl (or given up) and
+                 False is returned
+        """
+        with self._idle:
+            if self._idle.wait_for(lambda: self._unfinished == 0, timeout):
+                return True
+
+        unsent = []
+        while True:
+            try:
+                unsent.append(self._queue.get_nowait()[2])
+            except Empty:
+                break
+        if unsent:
+            logger.warning(f"{len(unsent)} notifications still queued after waiting {timeout}s")
+            self._set_aside(unsent)
+        return False
+
+    def _set_aside(self, jobs: List[_Job]) -> None:
+        """Spill jobs that can't be sent now to pending.jsonl, or give them up"""
+        if self.spill_pending:
+            self._spill(PENDING_FILE, jobs)
+        else:
+            for job in jobs:
+                job.notification.failed = True
+            self._count('given_up', len(jobs))
+        for job in jobs:
+            self._done(job)
+
+    def _spill(self, file_name: str, jobs: List[_Job], error: Optional[str] = None) -> None:
+        """Append jobs to a JSON-lines file in spill_dir (or log them if there is none)"""
+        lines = [
+            json.dumps({'channel': job.channel.name, **job.notification.to_dict(), 'error': error}, default=str)
+            for job in jobs
+        ]
+        if file_name == PENDING_FILE:
+            self._count('spilled', len(jobs))
+        if not self.spill_dir:
+            for line in lines:
+                logger.error(f"Undelivered notification: {line}")
+            return
+        with self._spill_lock:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(os.path.join(self.spill_dir, file_name), 'a', encoding='utf-8') as f:
+                f.write(''.join(line + '\n' for line in lines))
+
+    def replay_pending(self) -> int:
+        """Queue again the notifications spilled to pending.jsonl; returns how many"""
+        if not self.spill_dir:
+            return 0
+        path = os.path.join(self.spill_dir, PENDING_FILE)
+        with self._spill_lock:
+            if not os.path.exists(path):
+                return 0
+            claimed = f"{path}.{os.getpid()}.replay"
+            os.replace(path, claimed)
+        with open(claimed, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        os.remove(claimed)
+
+        replayed = 0
+        for record in records:
+            channel = self.channels.get(record['channel'])
+            if channel is None:
+                logger.warning(f"Dropping spilled notification for unknown channel {record['channel']}")
+                continue
+            self._enqueue(_Job(channel, Notification.from_dict(record)))
+            replayed += 1
+        return replayed
+
+    def metrics(self) -> Dict:
+        """Queue depth, counters and send/queue-wait latency percentiles in milliseconds"""
+        metrics = {'queue_depth': self._queue.qsize(), 'unfinished': self._unfinished, **self.counters}
+        for name, samples in (('send_latency', list(self._send_latency)), ('queue_wait', list(self._queue_wait))):
+            for label, fraction in (('p50', 0.5), ('p95', 0.95)):
+                value = _percentile(samples, fraction)
+                metrics[f"{name}_{label}_ms"] = None if value is None else round(value * 1000, 1)
+        return metrics
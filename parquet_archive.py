@@ -0,0 +1,495 @@
+"""
+Columnar Parquet archive of the transactions, detections and alerts tables
+
+Usage:
+    python -m backend.parquet_archive ARCHIVE_DIR [--tables transactions alerts] [--compact]
+
+Layout (hive partitioned by the date an item was stored):
+    ARCHIVE_DIR/<table>/date=YYYY-MM-DD/part-<run>-<n>.parquet
+    ARCHIVE_DIR/_archive_state.json
+
+The first run streams a full scan of each table; later runs append only
+items newer than the table's high-water mark, read through the
+time-bucketed index. The index is eventually consistent, so each run
+re-reads an overlap window before the mark and skips items the previous
+run already archived. Part files are written under hidden names and only
+renamed once the new state is saved, so a failed run never leaves
+visible files that the next run would archive again. Rows are buffered per date partition and written as
+row groups, so memory is bounded by row_group_size times the number of
+open partitions. --compact merges partitions that have accumulated many
+small incremental files.
+
+Readers use read_archive(), which prunes columns and pushes date filters
+down to the partition level.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .feature_codec import features_to_text, is_encoded_features
+from .time_index import bucket_day, to_datetime
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '_archive_state.json'
+PARTITION_FIELD = 'date'
+UNDATED_PARTITION = 'undated'
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_ROW_GROUP_SIZE = 50_000
+DEFAULT_OVERLAP_SECONDS = 300
+MAX_OPEN_PARTITIONS = 16
+COMPACT_MIN_FILES = 8
+
+PARTITIONING = ds.partitioning(pa.schema([(PARTITION_FIELD, pa.string())]), flavor='hive')
+
+TRANSACTION_SCHEMA = pa.schema([
+    ('transactionID', pa.string()),
+    ('trans_date_trans_time', pa.string()),
+    ('cc_num', pa.string()),
+    ('merchant', pa.string()),
+    ('category', pa.string()),
+    ('amt', pa.float64()),
+    ('first', pa.string()),
+    ('last', pa.string()),
+    ('gender', pa.string()),
+    ('street', pa.string()),
+    ('city', pa.string()),
+    ('state', pa.string()),
+    ('zip', pa.int64()),
+    ('lat', pa.float64()),
+    ('long', pa.float64()),
+    ('city_pop', pa.int64()),
+    ('job', pa.string()),
+    ('dob', pa.string()),
+    ('trans_num', pa.string()),
+    ('unix_time', pa.int64()),
+    ('merch_lat', pa.float64()),
+    ('merch_long', pa.float64()),
+    ('is_fraud', pa.int64()),
+    ('timestamp', pa.string())
+])
+
+DETECTION_SCHEMA = pa.schema([
+    ('transactionID', pa.string()),
+    ('is_fraud', pa.bool_()),
+    ('confidence', pa.float64()),
+    ('details', pa.string()),
+    ('timestamp', pa.string())
+])
+
+ALERT_SCHEMA = pa.schema([
+    ('alertID', pa.string()),
+    ('transaction_id', pa.string()),
+    ('fraud_score', pa.float64()),
+    ('detection_method', pa.string()),
+    ('severity', pa.string()),
+    ('detection_details', pa.string()),
+    ('transaction_summary', pa.string()),
+    ('transaction_data', pa.string()),
+    ('timestamp', pa.string())
+])
+
+# Archive table -> (AnomalyTransactions table alias, schema, key attribute)
+ARCHIVE_TABLES = {
+    'transactions': ('transactions', TRANSACTION_SCHEMA, 'transactionID'),
+    'detections': ('results', DETECTION_SCHEMA, 'transactionID'),
+    'alerts': ('alerts', ALERT_SCHEMA, 'alertID')
+}
+
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    if is_encoded_features(value):
+        return features_to_text(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if isinstance(value, Decimal) and value == value.to_integral_value():
+        return str(int(value))
+    return str(value)
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.lower() in ('true', '1')
+    return bool(value) if value is not None else None
+
+
+CONVERTERS = {
+    pa.string(): _to_string,
+    pa.float64(): _to_float,
+    pa.int64(): _to_int,
+    pa.bool_(): _to_bool
+}
+
+
+def schema_converters(schema: pa.Schema) -> List[tuple]:
+    """(column, converter) pairs for a schema; resolve once, DataType lookups are slow"""
+    return [(field.name, CONVERTERS[field.type]) for field in schema]
+
+
+def to_row(item: Dict, converters: List[tuple]) -> Dict:
+    """Coerce a stored item to the archive schema; unknown attributes are dropped"""
+    return {name: convert(item.get(name)) for name, convert in converters}
+
+
+def partition_date(item: Dict) -> str:
+    """Date partition for an item: the day of its time bucket, else the date of its timestamp"""
+    bucket = item.get('time_bucket')
+    if bucket:
+        return bucket_day(bucket)
+    timestamp = item.get('timestamp')
+    return str(timestamp)[:10] if timestamp else UNDATED_PARTITION
+
+
+class PartitionedWriter:
+    """Streams rows into per-date Parquet files, one row group at a time
+
+    Closed part files stay under hidden temporary names in ``staged``
+    until ``publish`` (or publish_files) renames them.
+    """
+
+    def __init__(self, table_dir: str, schema: pa.Schema, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 max_open_partitions: int = MAX_OPEN_PARTITIONS):
+        self.table_dir = table_dir
+        self.schema = schema
+        self.converters = schema_converters(schema)
+        self.row_group_size = row_group_size
+        self.max_open_partitions = max_open_partitions
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.rows_written = 0
+        # (temporary path, final path) of closed, unpublished part files
+        self.staged: List[Tuple[str, str]] = []
+
+        self._buffers: Dict[str, List[Dict]] = {}
+        # date -> (ParquetWriter, temporary path, final path), least recently used first
+        self._writers: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._sequence = 0
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, item: Dict) -> None:
+        """Buffer one item, writing a row group when its partition buffer is full"""
+        date = partition_date(item)
+        buffer = self._buffers.setdefault(date, [])
+        buffer.append(to_row(item, self.converters))
+        self._buffered += 1
+        if len(buffer) >= self.row_group_size:
+            self._write_row_group(date)
+        elif self._buffered >= self.row_group_size * self.max_open_partitions:
+            # Many partially filled partitions: write out the largest one early
+            self._write_row_group(max(self._buffers, key=lambda key: len(self._buffers[key])))
+
+    def _open(self, date: str):
+        """Open a new part file for a partition, closing the least recently used if needed"""
+        if len(self._writers) >= self.max_open_partitions:
+            oldest = next(iter(self._writers))
+            self._write_row_group(oldest)
+            self._close_partition(oldest)
+
+        partition_dir = os.path.join(self.table_dir, f"{PARTITION_FIELD}={date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        self._sequence += 1
+        name = f"part-{self.run_id}-{self._sequence:05d}.parquet"
+        # Dot-prefixed files are ignored by dataset readers until renamed
+        temporary_path = os.path.join(partition_dir, f".{name}.tmp")
+        writer = pq.ParquetWriter(temporary_path, self.schema, compression='zstd')
+        self._writers[date] = (writer, temporary_path, os.path.join(partition_dir, name))
+        return writer
+
+    def _write_row_group(self, date: str) -> None:
+        rows = self._buffers.pop(date, None)
+        if not rows:
+            return
+        self._buffered -= len(rows)
+        if date in self._writers:
+            self._writers.move_to_end(date)
+            writer = self._writers[date][0]
+        else:
+            writer = self._open(date)
+        writer.write_table(pa.Table.from_pylist(rows, schema=self.schema), row_group_size=len(rows))
+        self.rows_written += len(rows)
+
+    def _close_partition(self, date: str) -> None:
+        writer, temporary_path, final_path = self._writers.pop(date)
+        writer.close()
+        self.staged.append((temporary_path, final_path))
+
+    def close(self) -> int:
+        """Write remaining rows and close every part file (still unpublished); returns rows written"""
+        for date in list(self._buffers):
+            self._write_row_group(date)
+        for date in list(self._writers):
+            self._close_partition(date)
+        return self.rows_written
+
+    def publish(self) -> List[str]:
+        """Rename the staged part files into place; returns their paths"""
+        publish_files('', self.staged)
+        files = [final_path for _, final_path in self.staged]
+        self.staged = []
+        return files
+
+    def abort(self) -> None:
+        """Discard unpublished part files"""
+        self._buffers.clear()
+        self._buffered = 0
+        for writer, temporary_path, _ in self._writers.values():
+            writer.close()
+            os.remove(temporary_path)
+        self._writers.clear()
+        for temporary_path, _ in self.staged:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        self.staged = []
+
+
+def publish_files(root: str, files: Iterable) -> None:
+    """Rename (temporary, final) part files under root; files already renamed are skipped"""
+    for temporary_path, final_path in files:
+        temporary_path = os.path.join(root, temporary_path)
+        if os.path.exists(temporary_path):
+            os.replace(temporary_path, os.path.join(root, final_path))
+
+
+def load_state(root: str) -> Dict:
+    """Per-table archive state (high-water mark and row counts)"""
+    path = os.path.join(root, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def save_state(root: str, state: Dict) -> None:
+    """Atomically replace the archive state file"""
+    path = os.path.join(root, STATE_FILE)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(temporary_path, path)
+
+
+def _overlap_start(timestamp: str, overlap_seconds: float) -> str:
+    return (to_datetime(timestamp) - timedelta(seconds=overlap_seconds)).isoformat()
+
+
+def archive_table(db, root: str, table: str, state: Dict, page_size: int = DEFAULT_PAGE_SIZE,
+                  row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                  overlap_seconds: float = DEFAULT_OVERLAP_SECONDS) -> int:
+    """
+    Append one table's new items to the archive and advance its high-water mark.
+
+    :param db: AnomalyTransactions (or LocalAnomalyTransactions) with tables initialized
+    :param root: Archive directory
+    :param table: 'transactions', 'detections' or 'alerts'
+    :param state: Archive state, updated in place and saved before files are published
+    :param overlap_seconds: How far before the high-water mark to re-read, for index
+                            entries that appeared after the previous run
+    :return: Number of rows appended
+    """
+    alias, schema, key = ARCHIVE_TABLES[table]
+    table_state = state.setdefault(table, {'high_water_mark': None, 'rows': 0})
+    # A previous run saved its state but stopped before publishing every file
+    publish_files(root, table_state.pop('pending_files', []))
+    high_water_mark = table_state['high_water_mark']
+    # Key -> timestamp of items already archived inside the overlap window
+    archived = dict(table_state.get('recent_keys', {}))
+
+    if high_water_mark:
+        pages = db.query_pages_since(alias, _overlap_start(high_water_mark, overlap_seconds), page_size)
+    else:
+        pages = db.scan_pages(alias, page_size)
+
+    newest = high_water_mark
+    cutoff = _overlap_start(newest, overlap_seconds) if newest else None
+    with PartitionedWriter(os.path.join(root, table), schema, row_group_size) as writer:
+        for page in pages:
+            for item in page:
+                item_key = str(item.get(key))
+                timestamp = item.get('timestamp')
+                timestamp = str(timestamp) if timestamp else None
+                if timestamp is not None and archived.get(item_key) == timestamp:
+                    continue
+                writer.write(item)
+                if timestamp is None:
+                    continue
+                if newest is None or timestamp > newest:
+                    newest = timestamp
+                    cutoff = _overlap_start(newest, overlap_seconds)
+                if timestamp > cutoff:
+                    archived[item_key] = timestamp
+
+    table_state['high_water_mark'] = newest
+    table_state['recent_keys'] = {
+        item_key: timestamp for item_key, timestamp in archived.items() if cutoff and timestamp > cutoff
+    }
+    table_state['rows'] += writer.rows_written
+    table_state['last_run'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    table_state['pending_files'] = [
+        [os.path.relpath(temporary_path, root), os.path.relpath(final_path, root)]
+        for temporary_path, final_path in writer.staged
+    ]
+    try:
+        save_state(root, state)
+    except Exception:
+        writer.abort()
+        raise
+    files = writer.publish()
+    del table_state['pending_files']
+    logger.info(f"Archived {writer.rows_written} {table} rows into {len(files)} files")
+    return writer.rows_written
+
+
+def compact_table(root: str, table: str, min_files: int = COMPACT_MIN_FILES,
+                  row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> int:
+    """
+    Merge partitions holding at least ``min_files`` part files into a single file.
+    Partitions are streamed batch by batch, so memory stays bounded.
+
+    :return: Number of partitions compacted
+    """
+    schema = ARCHIVE_TABLES[table][1]
+    table_dir = os.path.join(root, table)
+    if not os.path.isdir(table_dir):
+        return 0
+
+    compacted = 0
+    for partition in sorted(os.listdir(table_dir)):
+        partition_dir = os.path.join(table_dir, partition)
+        files = sorted(
+            os.path.join(partition_dir, name) for name in os.listdir(partition_dir)
+            if name.endswith('.parquet') and not name.startswith(('.', '_'))
+        )
+        if len(files) < min_files:
+            continue
+
+        name = f"part-compacted-{uuid.uuid4().hex[:8]}.parquet"
+        temporary_path = os.path.join(partition_dir, f".{name}.tmp")
+        with pq.ParquetWriter(temporary_path, schema, compression='zstd') as writer:
+            for batch in ds.dataset(files, schema=schema, format='parquet').to_batches(batch_size=row_group_size):
+                writer.write_table(pa.Table.from_batches([batch], schema=schema), row_group_size=row_group_size)
+        os.replace(temporary_path, os.path.join(partition_dir, name))
+        for path in files:
+            os.remove(path)
+        compacted += 1
+
+    return compacted
+
+
+def run_archive(db, root: str, tables: Iterable[str] = tuple(ARCHIVE_TABLES),
+                page_size: int = DEFAULT_PAGE_SIZE, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                overlap_seconds: float = DEFAULT_OVERLAP_SECONDS) -> Dict[str, int]:
+    """Archive several tables, saving state after each so a failure does not repeat finished work"""
+    os.makedirs(root, exist_ok=True)
+    state = load_state(root)
+    appended = {}
+    for table in tables:
+        appended[table] = archive_table(db, root, table, state, page_size, row_group_size, overlap_seconds)
+        save_state(root, state)
+    return appended
+
+
+def date_filter(since: Optional[str] = None, until: Optional[str] = None):
+    """Partition filter for an inclusive YYYY-MM-DD date range (None if unbounded)"""
+    expression = None
+    if since:
+        expression = ds.field(PARTITION_FIELD) >= since
+    if until:
+        upper = ds.field(PARTITION_FIELD) <= until
+        expression = upper if expression is None else expression & upper
+    return expression
+
+
+def open_dataset(root: str, table: str) -> ds.Dataset:
+    """Dataset over one archived table"""
+    return ds.dataset(
+        os.path.join(root, table),
+        schema=ARCHIVE_TABLES[table][1].append(pa.field(PARTITION_FIELD, pa.string())),
+        format='parquet',
+        partitioning=PARTITIONING
+    )
+
+
+def read_archive(root: str, table: str, columns: Optional[List[str]] = None,
+                 since: Optional[str] = None, until: Optional[str] = None, filter=None):
+    """
+    Read an archived table into a DataFrame.
+
+    :param columns: Columns to read (others are never decoded)
+    :param since: First date partition to read (YYYY-MM-DD)
+    :param until: Last date partition to read (YYYY-MM-DD)
+    :param filter: Extra pyarrow.dataset expression pushed down to the scan
+    """
+    expression = date_filter(since, until)
+    if filter is not None:
+        expression = filter if expression is None else expression & filter
+    return open_dataset(root, table).to_table(columns=columns, filter=expression).to_pandas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export DynamoDB tables to a Parquet archive")
+    parser.add_argument('root', help="Archive directory")
+    parser.add_argument('--tables', nargs='+', choices=list(ARCHIVE_TABLES), default=list(ARCHIVE_TABLES))
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument('--overlap-seconds', type=float, default=DEFAULT_OVERLAP_SECONDS,
+                        help="Window before the high-water mark to re-read on incremental runs")
+    parser.add_argument('--compact', action='store_true', help="Merge small files after archiving")
+    parser.add_argument('--local', metavar='DB', help="Archive a local SQLite store instead of DynamoDB")
+    args = parser.parse_args(argv)
+
+    if args.local:
+        from .local_store import LocalAnomalyTransactions
+        db = LocalAnomalyTransactions(args.local)
+    else:
+        from .database_operations import AnomalyTransactions
+        db = AnomalyTransactions()
+    db.initialize_tables()
+
+    started = time.perf_counter()
+    for table, rows in run_archive(db, args.root, args.tables, args.page_size, args.row_group_size,
+                                   args.overlap_seconds).items():
+        print(f"{table:<14}{rows:>12,} rows appended")
+    if args.compact:
+        for table in args.tables:
+            print(f"{table:<14}{compact_table(args.root, table):>12,} partitions compacted")
+    print(f"\nCompleted in {time.perf_counter() - started:.3f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
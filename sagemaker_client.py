@@ -6,23 +6,32 @@ import boto3
 import pandas as pd
 import numpy as np
 import logging
-from typing import Dict
+from typing import Dict, List, Optional
 from .config import SAGEMAKER_ENDPOINT
+from .transaction_context import TransactionContext
 
 logger = logging.getLogger(__name__)
 
 # AWS client
 sagemaker_runtime = boto3.client('sagemaker-runtime')
 
+# Raw columns that never reach the model
+IDENTIFIER_COLUMNS = [
+    'transactionID', 'first', 'last', 'street', 'trans_num', 'merchant', 'job'
+]
+SOURCE_COLUMNS = ['category', 'state', 'city', 'trans_date_trans_time', 'dob', 'is_fraud']
+GENDER_ENCODING = {'F': 0, 'M': 1}
+
 
 class SageMakerClient:
     """Client for SageMaker inference"""
     
-    def get_fraud_prediction(self, transaction: Dict) -> Dict:
+    def get_fraud_prediction(self, transaction: Dict,
+                             context: Optional[TransactionContext] = None) -> Dict:
         """Get fraud prediction from SageMaker endpoint"""
         try:
             # Preprocess data
-            processed_data = self.preprocess_transaction(transaction)
+            processed_data = self.preprocess_transaction(transaction, context)
             
             # Invoke SageMaker endpoint
             response = sagemaker_runtime.invoke_endpoint(
@@ -50,11 +59,44 @@ class SageMakerClient:
             logger.error(f"Error in SageMaker inference: {str(e)}")
             raise
     
-    def preprocess_transaction(self, transaction: Dict) -> str:
+    def preprocess_transaction(self, transaction: Dict,
+                               context: Optional[TransactionContext] = None) -> str:
         """Preprocess transaction data for SageMaker"""
-        df = pd.DataFrame([transaction])
-        processed_df = self.preprocess_dataframe(df)
-        return ','.join(map(str, processed_df.iloc[0].values))
+        if context is None:
+            context = TransactionContext(transaction)
+        return ','.join(map(str, self.build_feature_row(context)))
+    
+    def build_feature_row(self, context: TransactionContext) -> List:
+        """
+        Build a single feature row from a transaction context.
+        Mirrors preprocess_dataframe column for column, but reuses the
+        fields already derived by the business rules instead of parsing them again.
+        """
+        transaction = context.transaction
+        row = []
+        for column, value in transaction.items():
+            if column in IDENTIFIER_COLUMNS or column in SOURCE_COLUMNS:
+                continue
+            if column == 'gender':
+                value = GENDER_ENCODING.get(value, np.nan)
+            row.append(value)
+        
+        # Target encoding placeholders (see add_engineered_features)
+        if 'category' in transaction:
+            row.append(0.1)
+        if 'state' in transaction:
+            row.append(0.1)
+        
+        hour = context.hour
+        row.append(hour)
+        row.append(int(hour >= 22 or hour < 6))
+        row.append(context.day_of_week)
+        row.append(context.age)
+        
+        if context.has_coordinates:
+            row.append(context.distance_to_merchant)
+        
+        return row
     
     def preprocess_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """Preprocess DataFrame for SageMaker inference"""
@@ -65,10 +107,7 @@ class SageMakerClient:
         df['dob'] = pd.to_datetime(df['dob'])
         
         # Drop unnecessary columns
-        columns_to_drop = [
-            'transactionID', 'first', 'last', 'street', 'trans_num', 'merchant', 'job'
-        ]
-        df.drop(columns=[col for col in columns_to_drop if col in df.columns], inplace=True)
+        df.drop(columns=[col for col in IDENTIFIER_COLUMNS if col in df.columns], inplace=True)
         
         # Feature engineering
         df = self.add_engineered_features(df)
@@ -86,7 +125,7 @@ class SageMakerClient:
         
         # Gender encoding
         if 'gender' in df.columns:
-            df['gender'] = df['gender'].map({'F': 0, 'M': 1})
+            df['gender'] = df['gender'].map(GENDER_ENCODING)
         
         # Time-based features
         df['transaction_hour'] = df['trans_date_trans_time'].dt.hour
@@ -104,11 +143,7 @@ class SageMakerClient:
             )
         
         # Drop original columns
-        columns_to_drop = ['category', 'state', 'city', 'trans_date_trans_time', 'dob']
-        if 'is_fraud' in df.columns:
-            columns_to_drop.append('is_fraud')
-            
-        df.drop(columns=[col for col in columns_to_drop if col in df.columns], inplace=True)
+        df.drop(columns=[col for col in SOURCE_COLUMNS if col in df.columns], inplace=True)
         
         return df
     
@@ -0,0 +1,175 @@
+"""
+Pool of authenticated SMTP sessions shared across messages and warm invocations
+"""
+import logging
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 421: the server is closing the connection (e.g. idle or per-session limits)
+SERVICE_CLOSING = 421
+
+
+class RawMessage(NamedTuple):
+    """A message already serialized to bytes, sent as-is with sendmail"""
+    sender: str
+    recipients: List[str]
+    data: bytes
+
+
+def deliver(server: smtplib.SMTP, msg) -> None:
+    """Send an email.message.Message or a RawMessage on an open connection"""
+    if isinstance(msg, RawMessage):
+        server.sendmail(msg.sender, msg.recipients, msg.data)
+    else:
+        server.send_message(msg)
+
+
+class PooledSession:
+    """An open SMTP connection and its usage counters"""
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.messages_sent = 0
+
+    def close(self) -> None:
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+
+
+class SMTPConnectionPool:
+    """Keeps up to ``max_size`` logged-in SMTP sessions open between messages
+
+    Sessions are reused LIFO so the warmest connection is picked first.
+    A session is replaced after ``max_messages_per_session`` messages or
+    when it has been idle longer than ``max_idle_seconds`` (servers drop
+    idle clients). A message that fails on a broken session is retried
+    once on a fresh connection, and the other idle sessions, likely
+    dropped as well, are closed.
+    """
+
+    def __init__(self, host: str, port: int, user: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = True, max_size: int = 4, max_idle_seconds: float = 60.0,
+                 max_messages_per_session: int = 100, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.max_messages_per_session = max_messages_per_session
+        self.timeout = timeout
+
+        self._idle: 'queue.LifoQueue[PooledSession]' = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.connections_opened = 0
+
+    def _connect(self) -> PooledSession:
+        """Open, secure and authenticate a new session"""
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user and self.password:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections_opened += 1
+        return PooledSession(server)
+
+    def _reusable(self, session: PooledSession) -> bool:
+        return (time.monotonic() - session.last_used < self.max_idle_seconds
+                and session.messages_sent < self.max_messages_per_session)
+
+    @contextmanager
+    def session(self, fresh: bool = False):
+        """Borrow a session; it goes back to the pool unless the caller raised
+
+        :param fresh: Open a new connection instead of reusing an idle one
+        """
+        self._slots.acquire()
+        session = None
+        try:
+            if fresh:
+                session = self._connect()
+            while session is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except queue.Empty:
+                    session = self._connect()
+                    break
+                if self._reusable(candidate):
+                    session = candidate
+                else:
+                    candidate.close()
+
+            yield session
+
+            session.last_used = time.monotonic()
+            self._idle.put(session)
+            session = None
+        finally:
+            if session is not None:
+                # Broken or in an unknown state: don't hand it out again
+                session.close()
+            self._slots.release()
+
+    def send_message(self, msg) -> None:
+        """Send one message on a pooled session, reconnecting once if it was dropped"""
+        self.send_messages([msg])
+
+    def send_messages(self, messages: Iterable) -> int:
+        """Send several messages back to back over one session; returns the number sent"""
+        pending = list(messages)
+        total = len(pending)
+        retried = False
+        while pending:
+            try:
+                with self.session(fresh=retried) as session:
+                    while pending:
+                        deliver(session.server, pending[0])
+                        session.messages_sent += 1
+                        pending.pop(0)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError) as e:
+                dropped = not isinstance(e, smtplib.SMTPResponseException) or e.smtp_code == SERVICE_CLOSING
+                if retried or not dropped:
+                    raise
+                retried = True
+                logger.warning(f"SMTP session dropped, reconnecting: {str(e)}")
+                # Sessions idle as long as this one were probably dropped too
+                self.close()
+        return total
+
+    def close(self) -> None:
+        """Close every idle session"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_shared_pools: Dict[Tuple, SMTPConnectionPool] = {}
+_shared_pools_lock = threading.Lock()
+
+
+def get_shared_pool(host: str, port: int, user: Optional[str] = None, password: Optional[str] = None,
+                    **options) -> SMTPConnectionPool:
+    """Process-wide pool per server and account, so warm Lambda invocations reuse sessions"""
+    key = (host, port, user)
+    with _shared_pools_lock:
+        pool = _shared_pools.get(key)
+        if pool is None:
+            pool = _shared_pools[key] = SMTPConnectionPool(host, port, user, password, **options)
+        return pool
@@ -0,0 +1,203 @@
+"""
+Buffered SendMessageBatch publisher for SQS
+"""
+import random
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# SQS limits for a single SendMessageBatch request
+MAX_BATCH_ENTRIES = 10
+MAX_BATCH_BYTES = 256 * 1024
+
+RETRYABLE_ERROR_CODES = {
+    'ThrottlingException',
+    'RequestThrottled',
+    'ServiceUnavailable',
+    'InternalError',
+    'InternalFailure'
+}
+
+
+class BatchPublishError(Exception):
+    """Raised when messages are still unsent after all retries
+
+    ``tags`` holds the tag given to ``publish`` for each failed entry.
+    """
+
+    def __init__(self, message: str, failed: List[Dict], tags: Optional[List[Any]] = None):
+        super().__init__(message)
+        self.failed = failed
+        self.tags = tags or []
+
+
+def message_size(body: str, attributes: Optional[Dict] = None) -> int:
+    """Bytes a message counts against the SQS payload limit (body plus attributes)"""
+    size = len(body.encode('utf-8'))
+    for name, attribute in (attributes or {}).items():
+        size += len(name.encode('utf-8')) + len(attribute['DataType'].encode('utf-8'))
+        value = attribute.get('StringValue', attribute.get('BinaryValue', ''))
+        size += len(value.encode('utf-8')) if isinstance(value, str) else len(value)
+    return size
+
+
+class BufferedSqsPublisher:
+    """Collects messages for one queue and sends them with SendMessageBatch
+
+    A batch is sent once it holds 10 messages or adding the next message
+    would exceed 256KB, or when the oldest buffered message is older than
+    ``max_latency_seconds``. Entries reported in ``Failed`` are retried
+    with capped exponential backoff and full jitter unless SQS marks them
+    as sender faults. Call ``flush()`` (or use the publisher as a context
+    manager) before the invocation returns so nothing is left in the buffer.
+    """
+
+    def __init__(self, sqs, queue_url: str, max_entries: int = MAX_BATCH_ENTRIES,
+                 max_batch_bytes: int = MAX_BATCH_BYTES, max_latency_seconds: float = 2.0,
+                 max_retries: int = 5, base_backoff_seconds: float = 0.05,
+                 max_backoff_seconds: float = 2.0):
+        """
+        :param sqs: boto3 SQS client
+        :param queue_url: Queue the messages are sent to
+        """
+        self.sqs = sqs
+        self.queue_url = queue_url
+        self.max_entries = min(max_entries, MAX_BATCH_ENTRIES)
+        self.max_batch_bytes = min(max_batch_bytes, MAX_BATCH_BYTES)
+        self.max_latency_seconds = max_latency_seconds
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._entries: List[Dict] = []
+        self._bytes = 0
+        self._oldest: Optional[float] = None
+        self._sequence = 0
+        self._failed: List[Dict] = []
+        # Entry Id -> caller's tag, until the next flush
+        self._tags: Dict[str, Any] = {}
+        self.requests_sent = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def publish(self, body: str, attributes: Optional[Dict] = None, tag: Any = None) -> None:
+        """
+        Buffer a message, sending the batch if it is full or overdue.
+
+        :param tag: Caller's reference for the message (e.g. a transaction id),
+                    reported in BatchPublishError.tags if it cannot be sent
+        """
+        size = self._check_size(body, attributes)
+        if self._entries and self._bytes + size > self.max_batch_bytes:
+            self._send_buffered()
+
+        self._entries.append(self._entry(body, attributes, tag))
+        self._bytes += size
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+        if len(self._entries) >= self.max_entries:
+            self._send_buffered()
+        else:
+            self.flush_if_due()
+
+    def send_now(self, body: str, attributes: Optional[Dict] = None, tag: Any = None) -> bool:
+        """
+        Send one message right away, bypassing the buffer.
+
+        A message that cannot be sent is kept with the other failures and
+        reported by the next ``flush()``; buffered messages are left alone.
+
+        :return: True if the message was sent
+        """
+        self._check_size(body, attributes)
+        failed = self._send_batch([self._entry(body, attributes, tag)])
+        self._failed.extend(failed)
+        return not failed
+
+    def _check_size(self, body: str, attributes: Optional[Dict]) -> int:
+        size = message_size(body, attributes)
+        if size > self.max_batch_bytes:
+            raise ValueError(f"Message of {size} bytes exceeds the SQS limit of {self.max_batch_bytes}")
+        return size
+
+    def _entry(self, body: str, attributes: Optional[Dict], tag: Any) -> Dict:
+        self._sequence += 1
+        entry = {'Id': str(self._sequence), 'MessageBody': body}
+        if attributes:
+            entry['MessageAttributes'] = attributes
+        if tag is not None:
+            self._tags[entry['Id']] = tag
+        return entry
+
+    def flush_if_due(self) -> None:
+        """Send the buffered batch if its oldest message has exceeded the deadline"""
+        if self._oldest is not None and time.monotonic() - self._oldest >= self.max_latency_seconds:
+            self._send_buffered()
+
+    def flush(self) -> None:
+        """Send every buffered message, raising if any could not be sent"""
+        self._send_buffered()
+        failed, self._failed = self._failed, []
+        tags, self._tags = self._tags, {}
+        if failed:
+            raise BatchPublishError(
+                f"{len(failed)} messages were not sent after retries", failed,
+                [tags.get(entry['Id']) for entry in failed]
+            )
+
+    def _send_buffered(self) -> None:
+        entries, self._entries, self._bytes, self._oldest = self._entries, [], 0, None
+        if entries:
+            self._failed.extend(self._send_batch(entries))
+
+    def _send_batch(self, entries: List[Dict]) -> List[Dict]:
+        """Send one SendMessageBatch request, retrying failed entries"""
+        rejected: List[Dict] = []
+        attempt = 0
+        while entries:
+            try:
+                response = self.sqs.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
+                self.requests_sent += 1
+            except ClientError as err:
+                if err.response['Error']['Code'] not in RETRYABLE_ERROR_CODES:
+                    logger.error(f"Error sending message batch to SQS: {str(err)}")
+                    return rejected + entries
+                response = {'Failed': [{'Id': entry['Id'], 'SenderFault': False} for entry in entries]}
+
+            failures = {failure['Id']: failure for failure in response.get('Failed', [])}
+            retry = []
+            for entry in entries:
+                failure = failures.get(entry['Id'])
+                if failure is None:
+                    continue
+                if failure.get('SenderFault'):
+                    # Malformed messages fail the same way on every retry
+                    logger.error(f"SQS rejected message: {failure.get('Code')}: {failure.get('Message')}")
+                    rejected.append(entry)
+                else:
+                    retry.append(entry)
+            entries = retry
+            if not entries:
+                break
+
+            attempt += 1
+            if attempt > self.max_retries:
+                logger.error("Giving up on %d messages after %d retries", len(entries), self.max_retries)
+                return rejected + entries
+
+            backoff = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** attempt))
+            time.sleep(random.uniform(0, backoff))
+
+        return rejected
@@ -0,0 +1,141 @@
+"""
+Test setup: the repository root is imported as the ``backend`` (and ``backend.dynamo``) package
+
+The deployed backend config adds table names, SMTP and AWS settings to the
+shared config.py; the values below stand in for them.
+"""
+import contextlib
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Before any boto3 client or resource is created
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+
+BACKEND_SETTINGS = {
+    'AWS_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'TRANSACTIONS_TABLE': 'transactions',
+    'DETECTION_RESULTS_TABLE': 'detection_results',
+    'DETECTION_TABLE': 'detections',
+    'ALERTS_TABLE': 'alerts',
+    'ALERT_QUEUE_URL': None,
+    'SAGEMAKER_ENDPOINT': 'fraud-endpoint',
+    'BUSINESS_RULES': {
+        'max_amount_threshold': 1000,
+        'high_risk_hours': [0, 1, 2, 3, 22, 23],
+        'suspicious_amount_patterns': [999, 1000, 9999]
+    },
+    'SMTP_HOST': '127.0.0.1',
+    'SMTP_PORT': 25,
+    'SMTP_USER': 'alerts@example.com',
+    'SMTP_PASSWORD': 'password',
+    'ALERT_RECIPIENT': 'ops@example.com',
+}
+
+
+def _install_backend_package():
+    if 'backend' in sys.modules:
+        return
+    spec = importlib.util.spec_from_file_location('backend.config', os.path.join(ROOT, 'config.py'))
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    for name, value in BACKEND_SETTINGS.items():
+        if not hasattr(config, name):
+            setattr(config, name, value)
+
+    backend = types.ModuleType('backend')
+    dynamo = types.ModuleType('backend.dynamo')
+    for package in (backend, dynamo):
+        package.__path__ = [ROOT]
+        package.config = config
+        sys.modules[package.__name__] = package
+        sys.modules[f"{package.__name__}.config"] = config
+    backend.dynamo = dynamo
+
+    # Dashboard modules import their siblings as top-level modules
+    sys.path.insert(0, ROOT)
+
+
+_install_backend_package()
+
+try:
+    from moto import mock_aws
+except ImportError:
+    # moto < 5 mocks one service per decorator
+    from moto import mock_dynamodb, mock_s3, mock_sqs
+
+    @contextlib.contextmanager
+    def mock_aws():
+        with mock_dynamodb(), mock_sqs(), mock_s3():
+            yield
+
+
+@pytest.fixture
+def aws():
+    """Mocked AWS services for the duration of a test"""
+    with mock_aws():
+        yield
+
+
+@pytest.fixture
+def dynamodb_client(aws):
+    import boto3
+    return boto3.client('dynamodb')
+
+
+@pytest.fixture
+def sqs_client(aws):
+    import boto3
+    return boto3.client('sqs')
+
+
+@pytest.fixture
+def make_table(dynamodb_client):
+    """Create an on-demand table with a single hash key"""
+    def make(name: str, key: str, key_type: str = 'S') -> None:
+        dynamodb_client.create_table(
+            TableName=name,
+            KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': key, 'AttributeType': key_type}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+    return make
+
+
+@pytest.fixture
+def smtp_server():
+    """The SMTP stand-in from benchmarks, on a free localhost port"""
+    from backend.benchmarks import LocalSMTPServer
+    server = LocalSMTPServer(latency=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_processor(make_table, monkeypatch, dynamodb_client):
+    """AlertProcessor storing to a mocked alerts table, with the given notification parts"""
+    from backend import data_handler
+    from backend.alert_processor import AlertProcessor
+    make_table('alerts', 'alertID')
+    # The module's client is created at import; write through the test's client instead
+    monkeypatch.setattr(data_handler, 'dynamodb_client', dynamodb_client)
+
+    def make(email_service, digest=None, rate_limiter=None, dispatcher=None):
+        processor = AlertProcessor.__new__(AlertProcessor)
+        processor.data_handler = data_handler.AlertDataHandler()
+        processor.email_service = email_service
+        processor.digest = digest
+        processor.rate_limiter = rate_limiter
+        processor.dispatcher = dispatcher
+        return processor
+    return make
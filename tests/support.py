@@ -0,0 +1,69 @@
+"""
+Stand-ins and builders shared by the alert tests
+"""
+import json
+
+
+class Clock:
+    """Settable clock for the window-based alert helpers"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DroppingDynamoDB:
+    """Writes through to DynamoDB but leaves the items whose ``key`` is in ``drop_ids`` unprocessed"""
+
+    def __init__(self, client, drop_ids, key='alertID'):
+        self.client = client
+        self.drop_ids = {str(item_id) for item_id in drop_ids}
+        self.key = key
+
+    def batch_write_item(self, RequestItems):
+        written, unprocessed = {}, {}
+        for table, requests in RequestItems.items():
+            for request in requests:
+                item_id = next(iter(request['PutRequest']['Item'][self.key].values()))
+                target = unprocessed if item_id in self.drop_ids else written
+                target.setdefault(table, []).append(request)
+        if written:
+            self.client.batch_write_item(RequestItems=written)
+        return {'UnprocessedItems': unprocessed}
+
+
+class RecordingEmail:
+    """Email service stand-in; alerts of ``failing`` transactions are not sent"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def send_email_notification(self, alert):
+        if alert['transaction_id'] in self.failing:
+            return False
+        self.sent.append(alert['alertID'])
+        return True
+
+    def send_digest_notification(self, group):
+        if any(alert['transaction_id'] in self.failing for alert in group.alerts):
+            return False
+        self.sent.append([alert['alertID'] for alert in group.alerts])
+        return True
+
+
+def sqs_record(message_id, transaction_id, severity='HIGH', **body):
+    return {
+        'messageId': message_id,
+        'body': json.dumps({'transaction_id': transaction_id, 'fraud_score': 0.6, **body}),
+        'messageAttributes': {
+            'severity': {'stringValue': severity},
+            'detection_method': {'stringValue': 'business_rules'}
+        }
+    }
+
+
+def failed_ids(result):
+    return [item['itemIdentifier'] for item in result['batchItemFailures']]
@@ -0,0 +1,72 @@
+"""
+Alert body encoding round trips: plain, compressed and claim-checked
+"""
+import json
+import os
+
+import pytest
+
+from backend import alert_codec
+from backend.alert_codec import (
+    CLAIM_CHECK_ATTRIBUTE, CONTENT_ENCODING_ATTRIBUTE, ZLIB_BASE64, LocalClaimCheckStore, decode_alert_body,
+    encode_alert_body
+)
+
+ALERT = {
+    'transaction_id': 42, 'fraud_score': 0.87, 'severity': 'CRITICAL',
+    'detection_details': {'rules': ['amount', 'hour'] * 100}
+}
+
+
+def lambda_attributes(attributes):
+    """Message attributes as a Lambda SQS event spells them"""
+    return {name: {'stringValue': value['StringValue'], 'dataType': value['DataType']}
+            for name, value in attributes.items()}
+
+
+@pytest.fixture
+def claim_checks(tmp_path, monkeypatch):
+    monkeypatch.setattr(alert_codec, '_stores', {'local': LocalClaimCheckStore(str(tmp_path))})
+    monkeypatch.setitem(alert_codec.ALERT_CODEC_CONFIG, 'claim_check_threshold_bytes', 100)
+    return tmp_path
+
+
+def test_plain_body_round_trips():
+    body, attributes = encode_alert_body(ALERT, compress=False, claim_check='')
+
+    assert attributes == {}
+    assert json.loads(body) == ALERT
+    assert decode_alert_body(body) == ALERT
+
+
+@pytest.mark.parametrize('spelling', ['StringValue', 'stringValue'])
+def test_compressed_body_round_trips(spelling):
+    body, attributes = encode_alert_body(ALERT, compress=True, claim_check='')
+
+    assert attributes[CONTENT_ENCODING_ATTRIBUTE]['StringValue'] == ZLIB_BASE64
+    assert len(body) < len(json.dumps(ALERT))
+    received = attributes if spelling == 'StringValue' else lambda_attributes(attributes)
+    assert decode_alert_body(body, received) == ALERT
+
+
+@pytest.mark.parametrize('spelling', ['StringValue', 'stringValue'])
+def test_claim_checked_body_round_trips(claim_checks, spelling):
+    body, attributes = encode_alert_body(ALERT, compress=False, claim_check='local')
+
+    assert attributes[CLAIM_CHECK_ATTRIBUTE]['StringValue'] == 'local'
+    key = json.loads(body)['claim_check']
+    assert os.listdir(claim_checks) == [key]
+    received = attributes if spelling == 'StringValue' else lambda_attributes(attributes)
+    assert decode_alert_body(body, received) == ALERT
+
+
+def test_compressed_and_claim_checked_body_round_trips(claim_checks):
+    body, attributes = encode_alert_body(ALERT, compress=True, claim_check='local')
+
+    assert set(attributes) == {CONTENT_ENCODING_ATTRIBUTE, CLAIM_CHECK_ATTRIBUTE}
+    assert decode_alert_body(body, lambda_attributes(attributes)) == ALERT
+
+
+def test_unsupported_encoding_is_rejected():
+    with pytest.raises(ValueError, match='gzip'):
+        decode_alert_body('H4sI', {CONTENT_ENCODING_ATTRIBUTE: {'stringValue': 'gzip'}})
@@ -0,0 +1,106 @@
+"""
+AlertRateLimiter token buckets and deduplication in AlertProcessor
+"""
+from backend import data_handler
+from backend.alert_dedup import SUPPRESSED_COUNT_FIELD, AlertRateLimiter, dedup_key
+from support import Clock, DroppingDynamoDB, RecordingEmail, failed_ids, sqs_record
+
+
+def alert(alert_id, severity='LOW', key='card-merchant'):
+    return {'alertID': alert_id, 'severity': severity, 'dedup_key': key}
+
+
+def limiter(clock, **options):
+    return AlertRateLimiter(window_seconds=300, clock=clock, **options)
+
+
+def test_dedup_key_hides_the_card_number():
+    key = dedup_key({'cc_num': '4000123412341234', 'merchant': 'shop'})
+    assert key == dedup_key({'cc_num': '4000123412341234', 'merchant': 'shop'})
+    assert key != dedup_key({'cc_num': '4000123412341234', 'merchant': 'other'})
+    assert '4000' not in key
+    assert dedup_key({'merchant': 'shop'}) is None
+
+
+def test_repeats_are_suppressed_and_counted_on_the_next_alert():
+    clock = Clock()
+    rate_limiter = limiter(clock)
+    assert rate_limiter.apply(alert('a1')) == alert('a1')
+    assert rate_limiter.apply(alert('a2')) is None
+    assert rate_limiter.apply(alert('b1', key='other')) == alert('b1', key='other')
+    clock.now = 200
+    assert rate_limiter.apply(alert('a3')) is None
+
+    # One token refilled over the window
+    clock.now = 350
+    assert rate_limiter.apply(alert('a4')) == {**alert('a4'), SUPPRESSED_COUNT_FIELD: 2}
+    assert rate_limiter.suppressed_total == 2
+
+
+def test_alerts_without_a_key_are_never_suppressed():
+    rate_limiter = limiter(Clock())
+    assert all(rate_limiter.apply(alert(f"a{i}", key=None)) for i in range(3))
+
+
+def test_more_severe_alert_is_let_through():
+    rate_limiter = limiter(Clock())
+    assert rate_limiter.apply(alert('a1', 'LOW'))
+    assert rate_limiter.apply(alert('a2', 'LOW')) is None
+    assert rate_limiter.apply(alert('a3', 'CRITICAL')) == {**alert('a3', 'CRITICAL'), SUPPRESSED_COUNT_FIELD: 1}
+    assert rate_limiter.apply(alert('a4', 'CRITICAL')) is None
+    assert rate_limiter.apply(alert('a5', 'HIGH')) is None
+
+
+def test_redelivered_alert_is_let_through_again():
+    clock = Clock()
+    rate_limiter = limiter(clock)
+    rate_limiter.apply(alert('a1'))
+    rate_limiter.apply(alert('a2'))
+    clock.now = 300
+    first = rate_limiter.apply(alert('a3'))
+
+    clock.now = 310
+    assert rate_limiter.apply(alert('a3')) == first
+    assert rate_limiter.apply(alert('a4')) is None
+
+
+def test_buckets_are_bounded():
+    clock = Clock()
+    rate_limiter = limiter(clock, max_keys=10)
+    for index in range(50):
+        rate_limiter.apply(alert(f"a{index}", key=f"key-{index}"))
+    assert len(rate_limiter) == 10
+    assert len(rate_limiter._allowed) == 10
+
+    clock.now = 301
+    rate_limiter.apply(alert('b', key='fresh'))
+    assert len(rate_limiter) == 1
+
+
+def test_alert_redelivered_after_a_failed_store_is_not_suppressed(make_processor, monkeypatch, dynamodb_client):
+    email = RecordingEmail()
+    processor = make_processor(email, rate_limiter=AlertRateLimiter(window_seconds=300))
+    batch = [sqs_record('m1', 1, dedup_key='k'), sqs_record('m2', 2, dedup_key='k')]
+
+    monkeypatch.setattr(data_handler, 'dynamodb_client', DroppingDynamoDB(dynamodb_client, ['m1']))
+    monkeypatch.setitem(data_handler.BATCH_WRITE_CONFIG, 'max_retries', 0)
+    assert failed_ids(processor.process_sqs_batch(batch)) == ['m1']
+    assert email.sent == []
+
+    monkeypatch.setattr(data_handler, 'dynamodb_client', dynamodb_client)
+    assert failed_ids(processor.process_sqs_batch([batch[0]])) == []
+    assert email.sent == ['m1']
+
+
+def test_critical_alert_in_a_batch_is_kept_over_earlier_routine_ones(make_processor):
+    email = RecordingEmail()
+    processor = make_processor(email, rate_limiter=AlertRateLimiter(window_seconds=300))
+
+    result = processor.process_sqs_batch([
+        sqs_record('m1', 1, severity='LOW', dedup_key='k'),
+        sqs_record('m2', 2, severity='LOW', dedup_key='k'),
+        sqs_record('m3', 3, severity='CRITICAL', dedup_key='k'),
+    ])
+
+    assert failed_ids(result) == []
+    assert email.sent == ['m3']
@@ -0,0 +1,88 @@
+"""
+AlertDigest windows and digest delivery from AlertProcessor
+"""
+import pytest
+
+from backend.alert_digest import AlertDigest
+from support import Clock, RecordingEmail, failed_ids, sqs_record
+
+
+def alert(alert_id, severity='HIGH'):
+    return {'alertID': alert_id, 'transaction_id': alert_id, 'severity': severity, 'fraud_score': 0.6}
+
+
+def ids(groups):
+    return [[item['alertID'] for item in group.alerts] for group in groups]
+
+
+def test_groups_are_released_when_their_window_elapses():
+    clock = Clock()
+    digest = AlertDigest(window_seconds=60, clock=clock)
+    assert digest.add(alert('a')) == []
+    clock.now = 30
+    assert digest.add(alert('b')) == []
+    assert digest.add(alert('c', 'LOW')) == []
+
+    clock.now = 61
+    assert ids(digest.due()) == [['a', 'b']]
+    assert len(digest) == 1
+
+
+def test_bypass_severities_and_full_groups_are_released_at_once():
+    digest = AlertDigest(max_alerts_per_digest=2, clock=Clock())
+    assert ids(digest.add(alert('a', 'CRITICAL'))) == [['a']]
+    assert digest.add(alert('b')) == []
+    assert ids(digest.add(alert('c'))) == [['b', 'c']]
+
+
+def test_oldest_group_is_released_past_max_groups():
+    digest = AlertDigest(max_groups=2, clock=Clock())
+    digest.add(alert('a', 'HIGH'))
+    digest.add(alert('b', 'MEDIUM'))
+    assert ids(digest.add(alert('c', 'LOW'))) == [['a']]
+    assert sorted(ids(digest.drain())) == [['b'], ['c']]
+    assert len(digest) == 0
+
+
+@pytest.fixture
+def digest_processor(make_processor):
+    def make(email):
+        return make_processor(email, digest=AlertDigest(window_seconds=3600, clock=Clock()))
+    return make
+
+
+def test_every_digest_is_sent_before_the_batch_is_acknowledged(digest_processor):
+    email = RecordingEmail()
+    processor = digest_processor(email)
+
+    result = processor.process_sqs_batch(
+        [sqs_record('m1', 1), sqs_record('m2', 2), sqs_record('m3', 3, severity='LOW')]
+    )
+
+    assert failed_ids(result) == []
+    assert sorted(email.sent) == [['m1', 'm2'], ['m3']]
+    assert len(processor.digest) == 0
+
+
+def test_failed_digest_fails_its_alerts(digest_processor):
+    email = RecordingEmail(failing=[2])
+    processor = digest_processor(email)
+
+    result = processor.process_sqs_batch(
+        [sqs_record('m1', 1), sqs_record('m2', 2), sqs_record('m3', 3, severity='LOW')]
+    )
+
+    assert sorted(failed_ids(result)) == ['m1', 'm2']
+    assert email.sent == [['m3']]
+
+
+def test_alerts_left_by_a_failed_invocation_are_not_sent_again(digest_processor):
+    email = RecordingEmail()
+    processor = digest_processor(email)
+    # Never drained: the invocation failed and SQS redelivers m0
+    processor.digest.add(alert('m0'))
+
+    result = processor.process_sqs_batch([sqs_record('m1', 1)])
+
+    assert failed_ids(result) == []
+    assert email.sent == [['m1']]
@@ -0,0 +1,48 @@
+"""
+Severity lanes: per-severity queues and urgent alerts sent ahead of the batch
+"""
+import json
+
+import pytest
+
+from backend import alert_lanes, alert_manager
+from backend.alert_manager import AlertManager
+
+
+@pytest.fixture
+def lanes(sqs_client, monkeypatch):
+    urls = {name: sqs_client.create_queue(QueueName=f"alerts-{name}")['QueueUrl'] for name in ('critical', 'default')}
+    monkeypatch.setattr(alert_lanes, 'ALERT_QUEUE_URL', urls['default'])
+    monkeypatch.setitem(alert_lanes.ALERT_LANES_CONFIG['queue_urls'], 'CRITICAL', urls['critical'])
+    monkeypatch.setattr(alert_manager, 'sqs', sqs_client)
+    return urls
+
+
+def alert(transaction_id, severity):
+    return {
+        'transaction_id': transaction_id, 'fraud_score': 0.5, 'detection_method': 'business_rules',
+        'detection_details': [], 'severity': severity
+    }
+
+
+def queued(sqs_client, queue_url):
+    messages = sqs_client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+    return sorted(json.loads(message['Body'])['transaction_id'] for message in messages)
+
+
+def test_lane_queues_fall_back_to_the_default_queue(lanes):
+    assert alert_lanes.lane_queue_url('critical') == lanes['critical']
+    assert alert_lanes.lane_queue_url('LOW') == lanes['default']
+    assert alert_lanes.lane_queue_urls() == [lanes['critical'], lanes['default']]
+
+
+def test_critical_alert_is_sent_before_buffered_ones(lanes, sqs_client):
+    manager = AlertManager(buffered=True)
+    manager.send_alert(alert(1, 'LOW'))
+    manager.send_alert(alert(2, 'CRITICAL'))
+
+    assert queued(sqs_client, lanes['critical']) == [2]
+    assert queued(sqs_client, lanes['default']) == []
+
+    manager.flush()
+    assert queued(sqs_client, lanes['default']) == [1]
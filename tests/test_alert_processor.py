@@ -0,0 +1,61 @@
+"""
+AlertProcessor.process_sqs_batch: bulk storage, notifications and partial batch failures
+"""
+from backend import data_handler
+from backend.email_service import EmailNotificationService
+from backend.smtp_pool import SMTPConnectionPool
+from support import DroppingDynamoDB, RecordingEmail, failed_ids, sqs_record
+
+
+def test_batch_is_stored_and_emailed(make_processor, smtp_server, dynamodb_client):
+    pool = SMTPConnectionPool('127.0.0.1', smtp_server.port, use_tls=False, max_size=2)
+    processor = make_processor(EmailNotificationService(pool=pool))
+
+    result = processor.process_sqs_batch([sqs_record(f"m{i}", i) for i in range(5)])
+    pool.close()
+
+    assert failed_ids(result) == []
+    assert dynamodb_client.scan(TableName='alerts')['Count'] == 5
+    assert smtp_server.messages == 5
+    assert smtp_server.connections <= 2
+
+
+def test_unparseable_message_is_reported(make_processor):
+    email = RecordingEmail()
+    processor = make_processor(email)
+
+    result = processor.process_sqs_batch([sqs_record('m1', 1), {'messageId': 'm2', 'body': '{not json'}])
+
+    assert failed_ids(result) == ['m2']
+    assert email.sent == ['m1']
+
+
+def test_unstored_alert_is_reported_and_not_notified(make_processor, monkeypatch, dynamodb_client):
+    monkeypatch.setattr(data_handler, 'dynamodb_client', DroppingDynamoDB(dynamodb_client, ['m2']))
+    monkeypatch.setitem(data_handler.BATCH_WRITE_CONFIG, 'max_retries', 0)
+    email = RecordingEmail()
+    processor = make_processor(email)
+
+    result = processor.process_sqs_batch([sqs_record(f"m{i}", i) for i in range(1, 4)])
+
+    assert failed_ids(result) == ['m2']
+    assert sorted(email.sent) == ['m1', 'm3']
+
+
+def test_failed_email_is_reported(make_processor, dynamodb_client):
+    email = RecordingEmail(failing=[2])
+    processor = make_processor(email)
+
+    result = processor.process_sqs_batch([sqs_record(f"m{i}", i) for i in range(1, 4)])
+
+    assert failed_ids(result) == ['m2']
+    assert dynamodb_client.scan(TableName='alerts')['Count'] == 3
+
+
+def test_alert_that_cannot_be_encoded_fails_alone(make_processor, dynamodb_client):
+    processor = make_processor(RecordingEmail())
+    alerts = [{'alertID': f"m{i}", 'severity': 'HIGH', 'timestamp': '2024-03-02T07:30:00'} for i in range(1, 4)]
+    alerts[1]['detection_details'] = [set()]
+
+    assert processor.data_handler.store_alerts(alerts) == ['m2']
+    assert dynamodb_client.scan(TableName='alerts')['Count'] == 2
@@ -0,0 +1,40 @@
+"""
+AmountBaselineStore persistence
+"""
+import os
+
+import pytest
+
+from backend.amount_baselines import BUCKET_COUNT, AmountBaselineStore
+
+
+@pytest.fixture
+def saved(tmp_path):
+    path = str(tmp_path / 'baselines.bin')
+    store = AmountBaselineStore(path=path)
+    for index, amount in enumerate((12.5, 40.0, 980.0, 7.25)):
+        store.observe(f"category:{index % 2}", amount)
+    store.save()
+    return path, store
+
+
+def test_state_round_trips(saved):
+    path, store = saved
+    loaded = AmountBaselineStore.load(path)
+
+    assert len(loaded) == 2
+    assert loaded.stats('category:0') == store.stats('category:0')
+    assert loaded.quantile('category:1', 0.5) == store.quantile('category:1', 0.5)
+
+
+@pytest.mark.parametrize('cut', [4 * BUCKET_COUNT, 4, 3])
+def test_truncated_state_starts_fresh(saved, cut):
+    path, _ = saved
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - cut)
+
+    loaded = AmountBaselineStore.load(path)
+
+    assert len(loaded) == 0
+    loaded.observe('category:1', 10.0)
+    assert loaded.stats('category:1') == (1, 10.0, 0.0)
@@ -0,0 +1,81 @@
+"""
+BufferedBatchWriter against mocked DynamoDB and a client that leaves items unprocessed
+"""
+import pytest
+
+from backend.batch_writer import BatchWriteError, BufferedBatchWriter
+
+
+class FlakyClient:
+    """Leaves the items of ``failing`` tables unprocessed ``unprocessed_rounds`` times"""
+
+    def __init__(self, failing, unprocessed_rounds=float('inf')):
+        self.failing = set(failing)
+        self.unprocessed_rounds = unprocessed_rounds
+        self.requests = []
+
+    def batch_write_item(self, RequestItems):
+        self.requests.append(RequestItems)
+        unprocessed = {table: requests for table, requests in RequestItems.items() if table in self.failing}
+        if unprocessed and self.unprocessed_rounds > 0:
+            self.unprocessed_rounds -= 1
+            return {'UnprocessedItems': unprocessed}
+        return {'UnprocessedItems': {}}
+
+
+def fast_writer(client, **options):
+    return BufferedBatchWriter(client, base_backoff_seconds=0, max_backoff_seconds=0, **options)
+
+
+def test_writes_every_table_in_batches(dynamodb_client, make_table):
+    make_table('transactions', 'transactionID', 'N')
+    make_table('alerts', 'alertID')
+    writer = fast_writer(dynamodb_client, max_latency_seconds=float('inf'))
+
+    for index in range(30):
+        writer.put('transactions', {'transactionID': index, 'amt': 10.5 + index})
+    writer.put('alerts', {'alertID': 'a1', 'fraud_score': 0.9, 'tags': {'x', 'y'}})
+    assert writer.requests_sent == 1
+    writer.flush()
+
+    assert writer.requests_sent == 2
+    assert dynamodb_client.scan(TableName='transactions')['Count'] == 30
+    alert = dynamodb_client.get_item(TableName='alerts', Key={'alertID': {'S': 'a1'}})['Item']
+    assert alert['fraud_score'] == {'N': '0.9'}
+    assert sorted(alert['tags']['SS']) == ['x', 'y']
+
+
+def test_last_write_of_a_key_wins(dynamodb_client, make_table):
+    make_table('transactions', 'transactionID', 'N')
+    with fast_writer(dynamodb_client, key_attributes={'transactions': ('transactionID',)}) as writer:
+        writer.put('transactions', {'transactionID': 1, 'status': 'first'})
+        writer.put('transactions', {'transactionID': 1, 'status': 'second'})
+        assert len(writer) == 1
+
+    item = dynamodb_client.get_item(TableName='transactions', Key={'transactionID': {'N': '1'}})['Item']
+    assert item['status'] == {'S': 'second'}
+
+
+def test_unprocessed_items_are_retried():
+    client = FlakyClient(['alerts'], unprocessed_rounds=2)
+    writer = fast_writer(client)
+    writer.put('alerts', {'alertID': 'a1'})
+    writer.flush()
+    assert len(client.requests) == 3
+
+
+def test_flush_reports_only_the_items_left_unprocessed():
+    client = FlakyClient(['detections'])
+    writer = fast_writer(client, flush_size=2, max_retries=2)
+    writer.put('transactions', {'transactionID': 1})
+    writer.put('detections', {'transactionID': 1})
+    # A full batch was written on put(); its failure waits for flush()
+    writer.put('detections', {'transactionID': 2})
+
+    with pytest.raises(BatchWriteError) as raised:
+        writer.flush()
+    assert list(raised.value.unprocessed) == ['detections']
+    assert raised.value.key_values('transactionID') == {'1', '2'}
+
+    # Reported once
+    writer.flush()
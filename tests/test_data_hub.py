@@ -0,0 +1,81 @@
+"""
+DataHub: one refresh at a time, shared by every dashboard session
+"""
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+try:
+    import streamlit  # noqa: F401
+except ImportError:
+    # Only the caching decorators run at import time
+    streamlit = types.ModuleType('streamlit')
+    streamlit.cache_resource = lambda func: func
+    streamlit.cache_data = lambda **options: (lambda func: func)
+    streamlit.error = streamlit.warning = lambda *args, **kwargs: None
+    sys.modules['streamlit'] = streamlit
+
+from data_service import DataHub
+
+
+class CountingLoad:
+    """load() stand-in that blocks until released and counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return {'snapshot': self.calls}
+
+
+def test_concurrent_first_load_runs_once():
+    hub = DataHub(min_refresh_interval=60)
+    load = CountingLoad()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(hub.get_dataframes, load) for _ in range(8)]
+        load.started.wait(5)
+        time.sleep(0.05)
+        load.release.set()
+        results = [future.result(5) for future in futures]
+
+    assert load.calls == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_fresh_snapshot_is_not_reloaded():
+    hub = DataHub(min_refresh_interval=60)
+    load = CountingLoad()
+    load.release.set()
+
+    first = hub.get_dataframes(load)
+    assert hub.get_dataframes(load) is first
+    assert load.calls == 1
+
+
+def test_sessions_keep_the_old_snapshot_while_one_refreshes():
+    hub = DataHub(min_refresh_interval=60)
+    hub.dataframes = {'snapshot': 0}
+    hub.refreshed_at = datetime.now() - timedelta(seconds=61)
+    load = CountingLoad()
+
+    refresher = threading.Thread(target=hub.get_dataframes, args=(load,))
+    refresher.start()
+    load.started.wait(5)
+
+    started = time.perf_counter()
+    assert hub.get_dataframes(load) == {'snapshot': 0}
+    assert time.perf_counter() - started < 1
+
+    load.release.set()
+    refresher.join(5)
+    assert load.calls == 1
+    assert hub.get_dataframes(load) == {'snapshot': 1}
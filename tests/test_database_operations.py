@@ -0,0 +1,153 @@
+"""
+AnomalyTransactions reads against mocked DynamoDB: batched gets, paged and parallel scans
+"""
+import pytest
+
+from backend.database_operations import BATCH_GET_LIMIT, AnomalyTransactions, BatchGetError
+from backend.dynamo_serializer import to_wire_item
+
+
+class DeferringDynamoDB:
+    """Passes BatchGetItem through, but returns the first ``defer`` keys as unprocessed ``times`` times"""
+
+    def __init__(self, client, defer, times=1):
+        self.client = client
+        self.defer = defer
+        self.times = times
+        self.requested = []
+
+    def batch_get_item(self, RequestItems):
+        (table, request), = RequestItems.items()
+        self.requested.append(len(request['Keys']))
+        if self.times <= 0:
+            return self.client.batch_get_item(RequestItems=RequestItems)
+        self.times -= 1
+        deferred, keys = request['Keys'][:self.defer], request['Keys'][self.defer:]
+        response = self.client.batch_get_item(RequestItems={table: {**request, 'Keys': keys}}) if keys else {}
+        response['UnprocessedKeys'] = {table: {**request, 'Keys': deferred}}
+        return response
+
+
+class SegmentedDynamoDB:
+    """Splits scans into segments by key, which moto < 5 ignores"""
+
+    def __init__(self, client):
+        self.client = client
+        self.scanned = []
+
+    def scan(self, Segment=None, TotalSegments=None, **request):
+        response = self.client.scan(**request)
+        if TotalSegments:
+            self.scanned.append(Segment)
+            response['Items'] = [
+                item for item in response['Items'] if int(item['transactionID']['N']) % TotalSegments == Segment
+            ]
+        return response
+
+
+@pytest.fixture
+def database(dynamodb_client, make_table):
+    for table in ('transactions', 'detections'):
+        make_table(table, 'transactionID', 'N')
+    make_table('alerts', 'alertID')
+    database = AnomalyTransactions(region_name='us-east-1')
+    database.initialize_tables()
+    return database
+
+
+def store_transactions(dynamodb_client, count):
+    for transaction_id in range(count):
+        item = {'transactionID': transaction_id, 'amt': transaction_id + 0.5, 'merchant': f"shop-{transaction_id}",
+                'timestamp': '2024-03-02T07:30:00', 'name': 'Jane'}
+        dynamodb_client.put_item(TableName='transactions', Item=to_wire_item(item))
+
+
+def ids(items):
+    return [int(item['transactionID']) for item in items]
+
+
+def test_more_keys_than_one_request_are_chunked(database, dynamodb_client):
+    store_transactions(dynamodb_client, 250)
+    database.dynamodb = DeferringDynamoDB(dynamodb_client, defer=0, times=0)
+    wanted = list(range(249, -1, -1))
+
+    items = database.batch_get_transactions(wanted)
+
+    assert ids(items) == wanted
+    assert sorted(database.dynamodb.requested) == [50, BATCH_GET_LIMIT, BATCH_GET_LIMIT]
+
+
+def test_results_follow_request_order_and_duplicates_are_fetched_once(database, dynamodb_client):
+    store_transactions(dynamodb_client, 10)
+    database.dynamodb = DeferringDynamoDB(dynamodb_client, defer=0, times=0)
+
+    items = database.batch_get_transactions([7, 3, 7, 42, 0, 3])
+
+    assert ids(items) == [7, 3, 7, 0, 3]
+    assert database.dynamodb.requested == [4]
+
+
+def test_unprocessed_keys_are_retried(database, dynamodb_client):
+    store_transactions(dynamodb_client, 10)
+    database.dynamodb = DeferringDynamoDB(dynamodb_client, defer=4, times=2)
+
+    items = database.batch_get_transactions(list(range(10)), base_backoff=0)
+
+    assert ids(items) == list(range(10))
+    assert database.dynamodb.requested == [10, 4, 4]
+
+
+def test_keys_still_unprocessed_after_retries_raise(database, dynamodb_client):
+    store_transactions(dynamodb_client, 10)
+    database.dynamodb = DeferringDynamoDB(dynamodb_client, defer=4, times=10)
+
+    with pytest.raises(BatchGetError) as raised:
+        database.batch_get_transactions(list(range(10)), max_retries=2, base_backoff=0)
+    assert len(raised.value.unprocessed_keys) == 4
+
+
+def test_projection_with_reserved_names(database, dynamodb_client):
+    store_transactions(dynamodb_client, 3)
+
+    items = database.batch_get_transactions([2, 1], projection=['timestamp', 'name', 'amt'])
+
+    assert items == [
+        {'transactionID': 2, 'timestamp': '2024-03-02T07:30:00', 'name': 'Jane', 'amt': pytest.approx(2.5)},
+        {'transactionID': 1, 'timestamp': '2024-03-02T07:30:00', 'name': 'Jane', 'amt': pytest.approx(1.5)},
+    ]
+
+
+def test_list_cursor_pages_through_the_table(database, dynamodb_client):
+    store_transactions(dynamodb_client, 25)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = database.list_transactions(limit=10, cursor=cursor)
+        seen.extend(ids(page))
+        pages += 1
+        cursor = page.cursor
+        if cursor is None:
+            break
+
+    assert pages >= 3
+    assert sorted(seen) == list(range(25))
+
+
+def test_scan_pages_resume_from_a_cursor(database, dynamodb_client):
+    store_transactions(dynamodb_client, 25)
+
+    first = next(database.scan_pages('transactions', page_size=10))
+    rest = [item for page in database.scan_pages('transactions', page_size=10, cursor=first.cursor) for item in page]
+
+    assert len(first) == 10 and first.cursor is not None
+    assert sorted(ids(first) + ids(rest)) == list(range(25))
+
+
+def test_parallel_scan_returns_every_item_once(database, dynamodb_client):
+    store_transactions(dynamodb_client, 120)
+    database.dynamodb = SegmentedDynamoDB(dynamodb_client)
+
+    items = list(database.parallel_scan('transactions', total_segments=4, page_size=7, max_buffered_pages=2))
+
+    assert sorted(ids(items)) == list(range(120))
+    assert set(database.dynamodb.scanned) == {0, 1, 2, 3}
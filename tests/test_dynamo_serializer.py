@@ -0,0 +1,56 @@
+"""
+Wire-format encoding round trips through mocked DynamoDB
+"""
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from backend.dynamo_serializer import from_wire_item, to_dynamo, to_wire_item
+
+
+def test_floats_keep_their_shortest_repr():
+    assert to_wire_item({'amt': 0.1, 'count': 3, 'ok': True}) == {
+        'amt': {'N': '0.1'}, 'count': {'N': '3'}, 'ok': {'BOOL': True}
+    }
+    assert to_dynamo({'amt': [0.1, 2.5]}) == {'amt': [Decimal('0.1'), Decimal('2.5')]}
+
+
+def test_empty_set_attributes_are_left_out(dynamodb_client, make_table):
+    make_table('alerts', 'alertID')
+    item = {'alertID': 'a1', 'reasons': set(), 'details': {'rules': set(), 'score': 0.5}}
+
+    encoded = to_wire_item(item)
+    assert 'reasons' not in encoded
+    assert encoded['details'] == {'M': {'score': {'N': '0.5'}}}
+
+    dynamodb_client.put_item(TableName='alerts', Item=encoded)
+    stored = dynamodb_client.get_item(TableName='alerts', Key={'alertID': {'S': 'a1'}})['Item']
+    assert from_wire_item(stored) == {'alertID': 'a1', 'details': {'score': Decimal('0.5')}}
+
+
+def test_empty_set_in_a_list_is_rejected():
+    with pytest.raises(ValueError):
+        to_wire_item({'alertID': 'a1', 'history': [set()]})
+
+
+def test_non_finite_numbers_are_stored_as_null():
+    item = {'score': float('nan'), 'limits': [float('inf'), Decimal('-Infinity')]}
+    assert to_wire_item(item) == {'score': {'NULL': True}, 'limits': {'L': [{'NULL': True}, {'NULL': True}]}}
+    assert to_dynamo(item) == {'score': None, 'limits': [None, None]}
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), np.float32('nan')])
+def test_number_set_with_a_non_finite_member_is_rejected(value):
+    with pytest.raises(ValueError):
+        to_wire_item({'scores': {1.0, value}})
+
+
+def test_numpy_scalars_are_encoded_as_numbers():
+    item = {'score': np.float32(2.5), 'half': np.float16(0.5), 'count': np.int64(3), 'scores': {np.float32(1.5)}}
+    assert to_wire_item(item) == {
+        'score': {'N': '2.5'}, 'half': {'N': '0.5'}, 'count': {'N': '3'}, 'scores': {'NS': ['1.5']}
+    }
+    del item['scores']
+    assert to_dynamo(item) == {'score': Decimal('2.5'), 'half': Decimal('0.5'), 'count': 3}
+    assert to_dynamo({'score': np.float32('nan')}) == {'score': None}
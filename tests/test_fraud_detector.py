@@ -0,0 +1,143 @@
+"""
+Kinesis partial batch failures: only records whose buffered writes or alerts failed are reported
+"""
+import base64
+import json
+
+import pytest
+
+from backend import alert_lanes, alert_manager
+from backend.alert_dedup import AlertRateLimiter
+from backend.alert_manager import AlertManager
+from backend.data_processor import DataProcessor
+from backend.fraud_detector import FraudDetectionProcessor
+from support import DroppingDynamoDB
+
+
+class RejectingSqs:
+    """Sends through to SQS but fails the alerts of ``reject_ids``"""
+
+    def __init__(self, client, reject_ids):
+        self.client = client
+        self.reject_ids = set(reject_ids)
+
+    def send_message_batch(self, QueueUrl, Entries):
+        rejected = [entry for entry in Entries if json.loads(entry['MessageBody'])['transaction_id'] in self.reject_ids]
+        sent = [entry for entry in Entries if entry not in rejected]
+        if sent:
+            self.client.send_message_batch(QueueUrl=QueueUrl, Entries=sent)
+        return {'Failed': [{'Id': entry['Id'], 'SenderFault': True, 'Code': 'Rejected'} for entry in rejected]}
+
+
+class FlagEverything:
+    """Business rules stand-in that flags every transaction, so SageMaker is never called"""
+
+    def evaluate_transaction(self, transaction, context=None):
+        return {'is_fraud': True, 'confidence': transaction['score'], 'reasons': ['test']}
+
+
+def kinesis_record(transaction_id, score):
+    transaction = {'transactionID': transaction_id, 'amt': 12.5, 'cc_num': '4000', 'merchant': 'm', 'score': score}
+    return {'kinesis': {
+        'data': base64.b64encode(json.dumps(transaction).encode('utf-8')).decode('ascii'),
+        'sequenceNumber': f"seq-{transaction_id}"
+    }}
+
+
+@pytest.fixture
+def queue_url(sqs_client, monkeypatch):
+    url = sqs_client.create_queue(QueueName='alerts')['QueueUrl']
+    monkeypatch.setattr(alert_lanes, 'ALERT_QUEUE_URL', url)
+    return url
+
+
+@pytest.fixture
+def processor(dynamodb_client, make_table, sqs_client, queue_url, monkeypatch):
+    for table in ('transactions', 'detections'):
+        make_table(table, 'transactionID', 'N')
+    monkeypatch.setattr(alert_manager, 'sqs', sqs_client)
+    processor = FraudDetectionProcessor.__new__(FraudDetectionProcessor)
+    processor.business_rules = FlagEverything()
+    processor.data_processor = DataProcessor(buffered=True)
+    processor.data_processor.writer.dynamodb = dynamodb_client
+    processor.data_processor.writer.base_backoff_seconds = 0
+    processor.alert_manager = AlertManager(buffered=True)
+    return processor
+
+
+def queued_transaction_ids(sqs_client, queue_url):
+    ids = set()
+    while True:
+        messages = sqs_client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+        if not messages:
+            return ids
+        ids.update(json.loads(message['Body'])['transaction_id'] for message in messages)
+
+
+def test_whole_batch_succeeds(processor, dynamodb_client, sqs_client, queue_url):
+    result = processor.process_kinesis_records([kinesis_record(i, 0.3) for i in range(1, 4)])
+
+    assert result['batchItemFailures'] == []
+    assert dynamodb_client.scan(TableName='transactions')['Count'] == 3
+    assert queued_transaction_ids(sqs_client, queue_url) == {1, 2, 3}
+
+
+def test_unwritten_items_fail_only_their_records(processor, dynamodb_client):
+    processor.data_processor.writer.dynamodb = DroppingDynamoDB(dynamodb_client, [2], key='transactionID')
+    processor.data_processor.writer.max_retries = 1
+
+    result = processor.process_kinesis_records([kinesis_record(i, 0.3) for i in range(1, 4)])
+
+    assert result['batchItemFailures'] == [{'itemIdentifier': 'seq-2'}]
+    assert dynamodb_client.scan(TableName='transactions')['Count'] == 2
+
+
+def test_unsent_alerts_fail_only_their_records(processor, sqs_client, queue_url):
+    # 3 is CRITICAL and sent on its own, the others are batched
+    processor.alert_manager._publisher(queue_url, 'LOW').sqs = RejectingSqs(sqs_client, [1, 3])
+
+    result = processor.process_kinesis_records(
+        [kinesis_record(1, 0.3), kinesis_record(2, 0.3), kinesis_record(3, 0.9), kinesis_record(4, 0.3)]
+    )
+
+    assert result['batchItemFailures'] == [{'itemIdentifier': 'seq-1'}, {'itemIdentifier': 'seq-3'}]
+    assert queued_transaction_ids(sqs_client, queue_url) == {2, 4}
+
+
+def test_untraceable_flush_error_fails_every_record(processor):
+    def broken_flush():
+        raise RuntimeError("connection reset")
+    processor.data_processor.flush = broken_flush
+
+    result = processor.process_kinesis_records([kinesis_record(i, 0.3) for i in range(1, 3)])
+
+    assert result['batchItemFailures'] == [{'itemIdentifier': 'seq-1'}, {'itemIdentifier': 'seq-2'}]
+
+
+def test_alert_retried_after_a_failed_publish_is_not_suppressed(processor, sqs_client, queue_url):
+    processor.alert_manager.rate_limiter = AlertRateLimiter(window_seconds=300, id_field='transaction_id')
+    publisher = processor.alert_manager._publisher(queue_url, 'LOW')
+    publisher.sqs = RejectingSqs(sqs_client, [1])
+
+    assert processor.process_kinesis_records([kinesis_record(1, 0.3)])['batchItemFailures'] == [
+        {'itemIdentifier': 'seq-1'}
+    ]
+
+    # Kinesis retries the record; its card/merchant token was already taken
+    publisher.sqs = sqs_client
+    assert processor.process_kinesis_records([kinesis_record(1, 0.3)])['batchItemFailures'] == []
+    assert queued_transaction_ids(sqs_client, queue_url) == {1}
+
+
+def test_record_that_fails_to_process_is_reported(processor, dynamodb_client):
+    class FailingRules(FlagEverything):
+        def evaluate_transaction(self, transaction, context=None):
+            if transaction['transactionID'] == 2:
+                raise RuntimeError("endpoint timed out")
+            return super().evaluate_transaction(transaction, context)
+    processor.business_rules = FailingRules()
+
+    result = processor.process_kinesis_records([kinesis_record(i, 0.3) for i in range(1, 4)])
+
+    assert result['batchItemFailures'] == [{'itemIdentifier': 'seq-2'}]
+    assert dynamodb_client.scan(TableName='detections')['Count'] == 2
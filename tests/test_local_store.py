@@ -0,0 +1,58 @@
+"""
+SQLite storage backend behind the AnomalyTransactions and DataProcessor interfaces
+"""
+import pytest
+
+from backend.local_store import LocalAnomalyTransactions, LocalDataProcessor, LocalStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalStore(str(tmp_path / 'fraud.db'))
+    yield store
+    store.close()
+
+
+def transaction(transaction_id):
+    return {'transactionID': transaction_id, 'amt': 12.5, 'merchant': 'shop', 'timestamp': '2024-03-02T07:30:00'}
+
+
+def test_buffered_writes_are_readable_after_flush(store):
+    processor = LocalDataProcessor(store=store, batch_size=100)
+    for transaction_id in range(5):
+        processor.store_transaction(transaction(transaction_id))
+        processor.store_detection(transaction_id, 'business_rules', True, 0.9, {'rules': ['amount']})
+    processor.flush()
+
+    database = LocalAnomalyTransactions(store=store)
+    database.initialize_tables()
+    page = database.list_transactions(limit=3)
+    assert len(page) == 3
+    assert len(database.list_transactions(3, page.cursor)) == 2
+    assert [item['transactionID'] for item in database.batch_get_transactions([3, 1, 99])] == [3, 1]
+    assert database.get_result(2)['confidence'] == pytest.approx(0.9)
+
+
+def test_failed_table_stays_buffered_and_the_others_are_written(store, monkeypatch):
+    processor = LocalDataProcessor(store=store, batch_size=100)
+    processor.store_transaction(transaction(1))
+    processor.store_detection(1, 'business_rules', True, 0.9, {})
+
+    put_items = store.put_items
+
+    def failing_put_items(table, items):
+        if table == 'detections':
+            raise RuntimeError('disk I/O error')
+        put_items(table, items)
+
+    monkeypatch.setattr(store, 'put_items', failing_put_items)
+    with pytest.raises(RuntimeError):
+        processor.flush()
+
+    monkeypatch.setattr(store, 'put_items', put_items)
+    processor.flush()
+
+    database = LocalAnomalyTransactions(store=store)
+    database.initialize_tables()
+    assert [item['transactionID'] for item in database.batch_get_transactions([1])] == [1]
+    assert database.get_result(1)['is_fraud'] is True
@@ -0,0 +1,179 @@
+"""
+NotificationDispatcher retries, dead letters, spill and delivery reporting
+"""
+import json
+import os
+import threading
+
+import pytest
+
+from backend.alert_digest import AlertDigest
+from backend.notification_dispatcher import (
+    DEAD_LETTER_FILE, PENDING_FILE, EmailChannel, NotificationChannel, NotificationDispatcher, NotificationError
+)
+from support import RecordingEmail, failed_ids, sqs_record
+
+
+class RecordingChannel(NotificationChannel):
+    """Records payloads; each payload in ``failures`` fails that many times before it is sent"""
+    name = 'recording'
+
+    def __init__(self, failures=None, gate=None):
+        self.failures = dict(failures or {})
+        self.gate = gate
+        self.busy = threading.Event()
+        self.sent = []
+
+    def send(self, notification):
+        self.busy.set()
+        if self.gate is not None:
+            self.gate.wait()
+        key = notification.payload['id']
+        if self.failures.get(key, 0) > 0:
+            self.failures[key] -= 1
+            raise NotificationError(f"{key} failed")
+        self.sent.append(key)
+
+
+def dispatcher(channel, tmp_path, **options):
+    options.setdefault('workers', 1)
+    return NotificationDispatcher(
+        [channel], max_retries=2, base_backoff_seconds=0, max_backoff_seconds=0,
+        spill_dir=str(tmp_path), **options
+    )
+
+
+def read_lines(tmp_path, name):
+    path = os.path.join(tmp_path, name)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_failed_sends_are_retried(tmp_path):
+    channel = RecordingChannel(failures={'a': 2})
+    notifications = dispatcher(channel, tmp_path)
+
+    notification = notifications.submit('alert', {'id': 'a'})
+    assert notifications.wait(5)
+
+    assert notification.delivered
+    assert channel.sent == ['a']
+    assert notifications.counters['retried'] == 2
+
+
+def test_notification_is_dead_lettered_after_max_retries(tmp_path):
+    channel = RecordingChannel(failures={'a': 3})
+    notifications = dispatcher(channel, tmp_path)
+
+    failed = notifications.submit('alert', {'id': 'a'})
+    sent = notifications.submit('alert', {'id': 'b'})
+    assert notifications.wait(5)
+
+    assert not failed.delivered
+    assert sent.delivered
+    assert [line['payload']['id'] for line in read_lines(tmp_path, DEAD_LETTER_FILE)] == ['a']
+
+
+def test_higher_priority_is_sent_first(tmp_path):
+    gate = threading.Event()
+    channel = RecordingChannel(gate=gate)
+    notifications = dispatcher(channel, tmp_path)
+
+    # The worker holds the first job until the gate opens
+    notifications.submit('alert', {'id': 'first'}, 3)
+    channel.busy.wait(5)
+    for key, priority in (('low', 3), ('critical', 0), ('high', 1)):
+        notifications.submit('alert', {'id': key}, priority)
+    gate.set()
+    assert notifications.wait(5)
+
+    assert channel.sent == ['first', 'critical', 'high', 'low']
+
+
+def test_unsent_notifications_are_given_up_by_default(tmp_path):
+    gate = threading.Event()
+    channel = RecordingChannel(gate=gate)
+    notifications = dispatcher(channel, tmp_path, spill_pending=False)
+
+    submitted = [notifications.submit('alert', {'id': 'a'})]
+    channel.busy.wait(5)
+    submitted += [notifications.submit('alert', {'id': key}) for key in 'bc']
+    assert not notifications.wait(0.05)
+    gate.set()
+    assert notifications.wait(5)
+
+    assert [notification.delivered for notification in submitted] == [True, False, False]
+    assert notifications.counters['given_up'] == 2
+    assert read_lines(tmp_path, PENDING_FILE) == []
+
+
+def test_unsent_notifications_can_be_spilled_and_replayed(tmp_path):
+    gate = threading.Event()
+    held = RecordingChannel(gate=gate)
+    notifications = dispatcher(held, tmp_path, spill_pending=True)
+    notifications.submit('alert', {'id': 'a'})
+    held.busy.wait(5)
+    for key in 'bc':
+        notifications.submit('alert', {'id': key})
+    assert not notifications.wait(0.05)
+    gate.set()
+    assert notifications.wait(5)
+    assert [line['payload']['id'] for line in read_lines(tmp_path, PENDING_FILE)] == ['b', 'c']
+
+    channel = RecordingChannel()
+    replaying = dispatcher(channel, tmp_path)
+    assert replaying.replay_pending() == 2
+    assert replaying.wait(5)
+    assert channel.sent == ['b', 'c']
+    assert read_lines(tmp_path, PENDING_FILE) == []
+
+
+def test_full_queue_gives_up_instead_of_blocking(tmp_path):
+    gate = threading.Event()
+    channel = RecordingChannel(gate=gate)
+    notifications = dispatcher(channel, tmp_path, max_queue=1, spill_pending=False)
+
+    # One job being sent, one queued, the rest don't fit
+    submitted = [notifications.submit('alert', {'id': 'a'})]
+    channel.busy.wait(5)
+    submitted += [notifications.submit('alert', {'id': key}) for key in 'bcd']
+    gate.set()
+    assert notifications.wait(5)
+
+    assert sum(notification.delivered for notification in submitted) == 2
+    assert notifications.counters['given_up'] == 2
+
+
+@pytest.fixture
+def dispatching_processor(make_processor, tmp_path):
+    def make(email, digest=None):
+        notifications = NotificationDispatcher(
+            [EmailChannel(email)], workers=2, max_retries=1, base_backoff_seconds=0,
+            spill_dir=str(tmp_path), spill_pending=False
+        )
+        return make_processor(email, digest=digest, dispatcher=notifications)
+    return make
+
+
+def test_undelivered_alerts_are_reported_as_batch_item_failures(dispatching_processor):
+    email = RecordingEmail(failing=[2])
+    processor = dispatching_processor(email)
+
+    result = processor.process_sqs_batch([sqs_record(f"m{i}", i) for i in range(1, 4)])
+
+    assert failed_ids(result) == ['m2']
+    assert sorted(email.sent) == ['m1', 'm3']
+
+
+def test_undelivered_digests_fail_their_alerts(dispatching_processor):
+    email = RecordingEmail(failing=[2])
+    processor = dispatching_processor(email, digest=AlertDigest(window_seconds=3600))
+
+    result = processor.process_sqs_batch(
+        [sqs_record('m1', 1), sqs_record('m2', 2), sqs_record('m3', 3, severity='LOW')]
+    )
+
+    assert sorted(failed_ids(result)) == ['m1', 'm2']
+    assert email.sent == [['m3']]
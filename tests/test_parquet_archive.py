@@ -0,0 +1,69 @@
+"""
+Incremental Parquet archive: overlap window, dedup by key and publishing after the state is saved
+"""
+import glob
+import os
+from datetime import timedelta
+
+import pytest
+
+from backend import parquet_archive
+from backend.local_store import LocalAlertDataHandler, LocalAnomalyTransactions, LocalStore
+from backend.parquet_archive import load_state, read_archive, run_archive
+from backend.time_index import utc_now
+
+
+@pytest.fixture
+def alerts():
+    store = LocalStore(':memory:')
+    handler = LocalAlertDataHandler(store=store)
+    database = LocalAnomalyTransactions(store=store)
+    database.initialize_tables()
+    start = utc_now() - timedelta(hours=1)
+
+    def add(index, seconds):
+        handler.store_alert({
+            'alertID': f"a{index}", 'transaction_id': index, 'fraud_score': 0.5, 'severity': 'LOW',
+            'detection_details': [], 'timestamp': (start + timedelta(seconds=seconds)).isoformat()
+        })
+    add.database = database
+    yield add
+    store.close()
+
+
+def archived_ids(root):
+    return sorted(read_archive(str(root), 'alerts', ['alertID'])['alertID'])
+
+
+def test_late_items_inside_the_overlap_are_archived_once(alerts, tmp_path):
+    for index in range(10):
+        alerts(index, index * 10)
+    assert run_archive(alerts.database, str(tmp_path), ['alerts']) == {'alerts': 10}
+
+    # Indexed after the first run, but older than its high-water mark
+    alerts(100, 60)
+    alerts(11, 120)
+    assert run_archive(alerts.database, str(tmp_path), ['alerts']) == {'alerts': 2}
+    assert run_archive(alerts.database, str(tmp_path), ['alerts']) == {'alerts': 0}
+
+    assert archived_ids(tmp_path) == sorted([f"a{index}" for index in range(10)] + ['a100', 'a11'])
+
+
+def test_files_saved_in_state_are_published_by_the_next_run(alerts, tmp_path, monkeypatch):
+    alerts(1, 10)
+    run_archive(alerts.database, str(tmp_path), ['alerts'])
+    alerts(2, 20)
+
+    def crash(writer):
+        raise RuntimeError('killed before publishing')
+    monkeypatch.setattr(parquet_archive.PartitionedWriter, 'publish', crash)
+    with pytest.raises(RuntimeError):
+        run_archive(alerts.database, str(tmp_path), ['alerts'])
+    assert load_state(str(tmp_path))['alerts']['pending_files']
+    assert archived_ids(tmp_path) == ['a1']
+
+    monkeypatch.undo()
+    assert run_archive(alerts.database, str(tmp_path), ['alerts']) == {'alerts': 0}
+    assert 'pending_files' not in load_state(str(tmp_path))['alerts']
+    assert archived_ids(tmp_path) == ['a1', 'a2']
+    assert glob.glob(os.path.join(str(tmp_path), 'alerts', '*', '.*')) == []
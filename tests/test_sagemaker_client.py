@@ -0,0 +1,32 @@
+"""
+The per-transaction feature row matches the DataFrame preprocessing it replaces
+"""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from backend.sagemaker_client import SageMakerClient
+from backend.transaction_context import TransactionContext
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_transactions():
+    """Sample rows as the JSON payloads Kinesis delivers"""
+    frames = [pd.read_csv(os.path.join(ROOT, name)) for name in ('fraud_transactions_10.csv',
+                                                                 'not_fraud_transactions_20.csv')]
+    return [json.loads(row.to_json()) for frame in frames for _, row in frame.head(3).iterrows()]
+
+
+@pytest.mark.parametrize('transaction', sample_transactions(), ids=lambda t: str(t['transactionID']))
+def test_feature_row_matches_preprocess_dataframe(transaction):
+    client = SageMakerClient()
+
+    expected = client.preprocess_dataframe(pd.DataFrame([transaction])).iloc[0]
+    row = client.build_feature_row(TransactionContext(transaction))
+
+    assert len(row) == len(expected)
+    for column, value in zip(expected.index, row):
+        assert value == pytest.approx(expected[column]), column
@@ -0,0 +1,64 @@
+"""
+SMTPConnectionPool against the local SMTP stand-in from benchmarks
+"""
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.smtp_pool import RawMessage, SMTPConnectionPool
+
+MESSAGE = RawMessage('alerts@example.com', ['ops@example.com'], b"Subject: Fraud Alert\r\n\r\nReview it.\r\n")
+
+
+@pytest.fixture
+def pool(smtp_server):
+    pool = SMTPConnectionPool('127.0.0.1', smtp_server.port, use_tls=False, max_size=3)
+    yield pool
+    pool.close()
+
+
+def drop_idle_sessions(pool):
+    """Cut every idle session, as a server does with idle clients"""
+    sessions = []
+    while not pool._idle.empty():
+        sessions.append(pool._idle.get_nowait())
+    for session in sessions:
+        session.server.sock.shutdown(socket.SHUT_RDWR)
+        pool._idle.put(session)
+    return len(sessions)
+
+
+def test_sessions_are_reused(pool, smtp_server):
+    for _ in range(10):
+        pool.send_message(MESSAGE)
+    assert smtp_server.messages == 10
+    assert smtp_server.connections == 1
+
+
+def test_concurrent_senders_share_at_most_max_size_sessions(pool, smtp_server):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(pool.send_message, [MESSAGE] * 40))
+    assert smtp_server.messages == 40
+    assert smtp_server.connections <= 3
+
+
+def test_session_is_replaced_after_max_messages(smtp_server):
+    pool = SMTPConnectionPool('127.0.0.1', smtp_server.port, use_tls=False, max_messages_per_session=2)
+    for _ in range(5):
+        pool.send_message(MESSAGE)
+    pool.close()
+    assert smtp_server.connections == 3
+
+
+def test_dropped_sessions_are_retried_on_a_fresh_connection(pool, smtp_server):
+    # Park three sessions, then let the server drop them all
+    with pool.session(), pool.session(), pool.session():
+        pass
+    assert drop_idle_sessions(pool) == 3
+
+    assert pool.send_messages([MESSAGE, MESSAGE]) == 2
+    assert smtp_server.messages == 2
+    # One reconnect; the other stale sessions were closed rather than tried in turn
+    assert pool.connections_opened == 4
+    assert pool._idle.qsize() == 1
@@ -0,0 +1,114 @@
+"""
+BufferedSqsPublisher against mocked SQS
+"""
+import pytest
+
+from backend.sqs_publisher import BatchPublishError, BufferedSqsPublisher
+
+
+class FlakySqs:
+    """Fails every entry whose body is in ``failing``; ``SenderFault`` entries are not retried"""
+
+    def __init__(self, failing, sender_fault=False):
+        self.failing = set(failing)
+        self.sender_fault = sender_fault
+        self.requests = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.requests.append([entry['MessageBody'] for entry in Entries])
+        return {'Failed': [
+            {'Id': entry['Id'], 'SenderFault': self.sender_fault, 'Code': 'Failed'}
+            for entry in Entries if entry['MessageBody'] in self.failing
+        ]}
+
+
+@pytest.fixture
+def queue_url(sqs_client):
+    return sqs_client.create_queue(QueueName='alerts')['QueueUrl']
+
+
+def fast_publisher(sqs, queue_url, **options):
+    return BufferedSqsPublisher(sqs, queue_url, base_backoff_seconds=0, max_backoff_seconds=0, **options)
+
+
+def receive_all(sqs_client, queue_url):
+    bodies = []
+    while True:
+        messages = sqs_client.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+        if not messages:
+            return sorted(bodies)
+        bodies.extend(message['Body'] for message in messages)
+
+
+def test_sends_full_batches_and_the_rest_on_flush(sqs_client, queue_url):
+    publisher = fast_publisher(sqs_client, queue_url, max_latency_seconds=float('inf'))
+    for index in range(25):
+        publisher.publish(f"alert-{index:02d}", {'severity': {'StringValue': 'LOW', 'DataType': 'String'}})
+    assert publisher.requests_sent == 2
+    assert len(publisher) == 5
+
+    publisher.flush()
+    assert publisher.requests_sent == 3
+    assert receive_all(sqs_client, queue_url) == [f"alert-{index:02d}" for index in range(25)]
+
+
+def test_batches_stay_under_the_byte_limit():
+    sqs = FlakySqs([])
+    publisher = fast_publisher(sqs, 'queue', max_batch_bytes=1000)
+    for index in range(4):
+        publisher.publish(str(index) * 400)
+    publisher.flush()
+    assert [len(batch) for batch in sqs.requests] == [2, 2]
+
+
+def test_oversized_message_is_rejected():
+    with pytest.raises(ValueError):
+        fast_publisher(FlakySqs([]), 'queue').publish('x' * (256 * 1024 + 1))
+
+
+def test_failed_entries_are_retried_then_reported_with_their_tags():
+    sqs = FlakySqs(['b'])
+    publisher = fast_publisher(sqs, 'queue', max_retries=2)
+    publisher.publish('a', tag=1)
+    publisher.publish('b', tag=2)
+
+    with pytest.raises(BatchPublishError) as raised:
+        publisher.flush()
+    assert raised.value.tags == [2]
+    assert sqs.requests == [['a', 'b'], ['b'], ['b']]
+
+
+def test_sender_faults_are_not_retried():
+    sqs = FlakySqs(['b'], sender_fault=True)
+    publisher = fast_publisher(sqs, 'queue')
+    publisher.publish('a', tag=1)
+    publisher.publish('b', tag=2)
+
+    with pytest.raises(BatchPublishError) as raised:
+        publisher.flush()
+    assert raised.value.tags == [2]
+    assert len(sqs.requests) == 1
+
+
+def test_send_now_sends_only_its_message():
+    sqs = FlakySqs([])
+    publisher = fast_publisher(sqs, 'queue')
+    publisher.publish('routine')
+
+    assert publisher.send_now('urgent')
+    assert sqs.requests == [['urgent']]
+    assert len(publisher) == 1
+
+
+def test_send_now_failures_are_kept_for_flush():
+    sqs = FlakySqs(['routine', 'urgent'], sender_fault=True)
+    publisher = fast_publisher(sqs, 'queue', max_entries=1)
+    # Full batch of one: sent, and its failure held for flush()
+    publisher.publish('routine', tag=1)
+
+    assert not publisher.send_now('urgent', tag=2)
+    assert publisher.send_now('other', tag=3)
+
+    with pytest.raises(BatchPublishError) as raised:
+        publisher.flush()
+    assert raised.value.tags == [1, 2]
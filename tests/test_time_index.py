@@ -0,0 +1,92 @@
+"""
+UTC time buckets, day shards and newest-first queries through the time index
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.database_operations import AnomalyTransactions
+from backend.dynamo_serializer import to_wire_item
+from backend.time_index import (
+    BUCKET_ATTRIBUTE, INDEX_NAME, SORT_ATTRIBUTE, TIME_INDEX_CONFIG, bucket_day, day_buckets, index_attributes,
+    to_datetime, utc_now, with_index_attributes
+)
+
+
+def test_aware_timestamps_are_bucketed_in_utc():
+    local = datetime(2024, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=-8)))
+    attributes = index_attributes(local)
+    assert attributes[SORT_ATTRIBUTE] == '2024-03-02T07:30:00'
+    assert bucket_day(attributes[BUCKET_ATTRIBUTE]) == '2024-03-02'
+    assert to_datetime('2024-03-02T07:30:00+00:00') == datetime(2024, 3, 2, 7, 30)
+
+
+def test_day_is_spread_over_stable_shards(monkeypatch):
+    monkeypatch.setitem(TIME_INDEX_CONFIG, 'shards', 4)
+    buckets = {index_attributes(f"2024-03-02T07:{minute:02d}:00")[BUCKET_ATTRIBUTE] for minute in range(60)}
+    assert buckets == set(day_buckets('2024-03-02'))
+    assert index_attributes('2024-03-02T07:30:00') == index_attributes('2024-03-02T07:30:00')
+
+    monkeypatch.setitem(TIME_INDEX_CONFIG, 'shards', 1)
+    assert index_attributes('2024-03-02T07:30:00')[BUCKET_ATTRIBUTE] == '2024-03-02'
+
+
+@pytest.fixture
+def database(dynamodb_client):
+    for name, key, key_type in (('transactions', 'transactionID', 'N'), ('detections', 'transactionID', 'N'),
+                                ('alerts', 'alertID', 'S')):
+        dynamodb_client.create_table(
+            TableName=name,
+            KeySchema=[{'AttributeName': key, 'KeyType': 'HASH'}],
+            AttributeDefinitions=[
+                {'AttributeName': key, 'AttributeType': key_type},
+                {'AttributeName': BUCKET_ATTRIBUTE, 'AttributeType': 'S'},
+                {'AttributeName': SORT_ATTRIBUTE, 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexes=[{
+                'IndexName': INDEX_NAME,
+                'KeySchema': [
+                    {'AttributeName': BUCKET_ATTRIBUTE, 'KeyType': 'HASH'},
+                    {'AttributeName': SORT_ATTRIBUTE, 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }],
+            BillingMode='PAY_PER_REQUEST'
+        )
+    database = AnomalyTransactions(region_name='us-east-1')
+    database.initialize_tables()
+    return database
+
+
+def store_alerts(dynamodb_client, count, every):
+    now = utc_now()
+    for index in range(count):
+        timestamp = (now - index * every).isoformat()
+        item = with_index_attributes({'alertID': f"a{index}", SORT_ATTRIBUTE: timestamp})
+        dynamodb_client.put_item(TableName='alerts', Item=to_wire_item(item))
+    return now
+
+
+def test_recent_items_are_merged_across_shards_and_days(database, dynamodb_client):
+    store_alerts(dynamodb_client, 40, timedelta(hours=2))
+
+    alerts = database.recent_alerts(25)
+
+    assert [alert['alertID'] for alert in alerts] == [f"a{index}" for index in range(25)]
+    assert len({alert[BUCKET_ATTRIBUTE] for alert in alerts}) > 1
+
+
+def test_recent_items_since(database, dynamodb_client):
+    now = store_alerts(dynamodb_client, 40, timedelta(hours=2))
+
+    alerts = database.recent_alerts(100, since=now - timedelta(hours=9))
+
+    assert [alert['alertID'] for alert in alerts] == ['a0', 'a1', 'a2', 'a3', 'a4']
+
+
+def test_pages_since_cover_every_shard(database, dynamodb_client):
+    now = store_alerts(dynamodb_client, 40, timedelta(hours=2))
+
+    pages = list(database.query_pages_since('alerts', now - timedelta(hours=30), page_size=3))
+
+    assert sorted(item['alertID'] for page in pages for item in page) == sorted(f"a{index}" for index in range(15))
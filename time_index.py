@@ -0,0 +1,98 @@
+"""
+Time-bucketed sort key shared by the writers and the recent_* queries
+
+Every stored transaction, detection and alert carries a ``time_bucket``
+(the UTC date the item was written plus a shard, ``YYYY-MM-DD#N``) and an
+ISO ``timestamp``. Stored timestamps are naive UTC. A global secondary
+index on (time_bucket, timestamp) lets readers fetch the newest N items by
+querying today's shards backwards instead of scanning the whole table.
+Sharding spreads each day's writes over TIME_INDEX_CONFIG['shards'] index
+partitions; with one shard the bucket is the plain date. Writers and
+readers must use the same shard count.
+
+Index definition (per table):
+    IndexName: time_bucket-timestamp-index
+    KeySchema: time_bucket (HASH, S), timestamp (RANGE, S)
+    Projection: ALL
+"""
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Union
+
+from .config import TIME_INDEX_CONFIG
+
+INDEX_NAME = 'time_bucket-timestamp-index'
+BUCKET_ATTRIBUTE = 'time_bucket'
+SORT_ATTRIBUTE = 'timestamp'
+BUCKET_FORMAT = '%Y-%m-%d'
+SHARD_SEPARATOR = '#'
+MAX_LOOKBACK_BUCKETS = 30
+
+
+def utc_now() -> datetime:
+    """Current time as the naive UTC datetime every stored timestamp uses"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_datetime(value: Union[str, datetime]) -> datetime:
+    """Accept either a datetime or an ISO timestamp string; aware values are converted to naive UTC"""
+    value = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def time_bucket(value: Union[str, datetime]) -> str:
+    """Day (unsharded bucket) for a timestamp"""
+    return to_datetime(value).strftime(BUCKET_FORMAT)
+
+
+def bucket_day(bucket: str) -> str:
+    """Day part of a stored bucket value"""
+    return str(bucket).split(SHARD_SEPARATOR, 1)[0]
+
+
+def day_buckets(day: str) -> List[str]:
+    """Every index partition of one day"""
+    shards = TIME_INDEX_CONFIG['shards']
+    if shards <= 1:
+        return [day]
+    return [f"{day}{SHARD_SEPARATOR}{shard}" for shard in range(shards)]
+
+
+def index_attributes(timestamp: Optional[Union[str, datetime]] = None) -> Dict[str, str]:
+    """Attributes a writer adds so an item appears in the recent index"""
+    timestamp = to_datetime(timestamp) if timestamp is not None else utc_now()
+    sort_value = timestamp.isoformat()
+    bucket = timestamp.strftime(BUCKET_FORMAT)
+    shards = TIME_INDEX_CONFIG['shards']
+    if shards > 1:
+        # Stable for a given timestamp, so rewriting an item keeps its partition
+        bucket = f"{bucket}{SHARD_SEPARATOR}{zlib.crc32(sort_value.encode('ascii')) % shards}"
+    return {
+        SORT_ATTRIBUTE: sort_value,
+        BUCKET_ATTRIBUTE: bucket
+    }
+
+
+def with_index_attributes(item: Dict) -> Dict:
+    """Copy of an item with index attributes, keeping an existing timestamp"""
+    try:
+        return {**item, **index_attributes(item.get(SORT_ATTRIBUTE))}
+    except (TypeError, ValueError):
+        # Unparseable timestamp: index the item under the write time instead
+        return {**item, **index_attributes()}
+
+
+def recent_buckets(since: Optional[Union[str, datetime]] = None,
+                   now: Optional[datetime] = None,
+                   max_buckets: int = MAX_LOOKBACK_BUCKETS) -> Iterator[str]:
+    """Yield days (UTC) newest first, stopping at ``since`` or the lookback limit"""
+    day = now or utc_now()
+    oldest = time_bucket(since) if since is not None else None
+    for _ in range(max_buckets):
+        bucket = day.strftime(BUCKET_FORMAT)
+        if oldest is not None and bucket < oldest:
+            return
+        yield bucket
+        day -= timedelta(days=1)
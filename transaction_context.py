@@ -0,0 +1,91 @@
+"""
+Per-transaction derived fields shared across the detection pipeline
+"""
+from datetime import datetime
+from functools import cached_property
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+COORDINATE_FIELDS = ('lat', 'long', 'merch_lat', 'merch_long')
+
+
+def parse_timestamp(value) -> datetime:
+    """Parse a timestamp field, using the fast ISO path when possible"""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return pd.to_datetime(value).to_pydatetime()
+
+
+class TransactionContext:
+    """Lazily computed, parse-once view over a raw transaction
+
+    Every derived field is computed on first access and cached on the
+    instance, so the business rules and the SageMaker feature builder can
+    share one context without parsing any field twice.
+    """
+
+    def __init__(self, transaction: Dict):
+        self.transaction = transaction
+
+    @cached_property
+    def timestamp(self) -> datetime:
+        """Parsed transaction timestamp"""
+        return parse_timestamp(self.transaction['trans_date_trans_time'])
+
+    @cached_property
+    def hour(self) -> int:
+        """Hour of day of the transaction"""
+        return self.timestamp.hour
+
+    @cached_property
+    def day_of_week(self) -> int:
+        """Day of week of the transaction (Monday=0)"""
+        return self.timestamp.weekday()
+
+    @cached_property
+    def date_of_birth(self) -> datetime:
+        """Parsed cardholder date of birth"""
+        return parse_timestamp(self.transaction['dob'])
+
+    @cached_property
+    def age(self) -> int:
+        """Cardholder age in years at transaction time"""
+        return (self.timestamp - self.date_of_birth).days // 365
+
+    @cached_property
+    def amount(self) -> float:
+        """Transaction amount as a float"""
+        return float(self.transaction.get('amt', 0))
+
+    @cached_property
+    def whole_amount(self) -> int:
+        """Transaction amount truncated to whole units"""
+        return int(self.amount)
+
+    @cached_property
+    def has_coordinates(self) -> bool:
+        """Whether cardholder and merchant coordinates are present"""
+        return all(field in self.transaction for field in COORDINATE_FIELDS)
+
+    @cached_property
+    def radians(self) -> Dict[str, float]:
+        """Coordinates converted to radians, keyed by field name"""
+        return {
+            field: np.radians(float(self.transaction[field]))
+            for field in COORDINATE_FIELDS
+        }
+
+    @cached_property
+    def distance_to_merchant(self) -> float:
+        """Haversine distance between cardholder and merchant in km"""
+        R = 6371  # Earth radius in km
+        rad = self.radians
+        dlat = rad['merch_lat'] - rad['lat']
+        dlon = rad['merch_long'] - rad['long']
+        a = np.sin(dlat / 2.0) ** 2 + np.cos(rad['lat']) * np.cos(rad['merch_lat']) * np.sin(dlon / 2.0) ** 2
+        return R * (2 * np.arcsin(np.sqrt(a)))
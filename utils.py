@@ -4,6 +4,7 @@ Utility functions for the Fraud Detection Dashboard
 import json
 import pandas as pd
 from decimal import Decimal
+from backend.dynamo.feature_codec import features_to_text
 
 
 def safe_float(value):
@@ -57,6 +58,15 @@ def parse_transaction_data(transaction_data_str):
         return {}
 
 
+def get_alert_transaction(alert):
+    """Transaction summary (reference-mode alerts) or full transaction data of an alert"""
+    for field in ('transaction_summary', 'transaction_data'):
+        transaction_data = parse_transaction_data(alert.get(field, {}))
+        if transaction_data:
+            return transaction_data
+    return {}
+
+
 def format_timestamp_display(timestamp):
     """Format timestamp for better display"""
     try:
@@ -117,8 +127,8 @@ def prepare_results_display(df_results):
     
     processed_results = []
     for _, result in df_results.iterrows():
-        # Handle details field which could be either a string, list or JSON
-        details = result.get('details', '')
+        # Handle details field which could be either a string, list, JSON or packed features
+        details = features_to_text(result.get('details', ''))
         if isinstance(details, str) and len(details) > 100:
             details_display = details[:100] + '...'
         else: